@@ -1,5 +1,12 @@
+import os
+
 import streamlit as st
-import pandas as pd   # <-- add this
+
+from pwt.catalog import session_catalog
+from pwt.data import pin_dataset, session_overlay
+from pwt.preload import start_preload
+from pwt.reload import migrate_session, start_reloader
+from pwt.trace import rerun
 
 # ---------------------------------------
 # GLOBAL STYLES
@@ -13,40 +20,6 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# ---------------------------------------
-# LOAD / SHARE DATA & LABELS ONCE
-# ---------------------------------------
-
-# 1) Main PWT data (Sheet1)
-if "df_panel" not in st.session_state:
-    df = pd.read_excel(
-        "gdppaneldata.xlsx",
-        engine="openpyxl",
-        sheet_name="Sheet1"
-    )
-    st.session_state["df_panel"] = df
-
-# 2) Variable labels from sheet 'VariableInfo'
-#    Expected columns: 'variable' and 'label'
-if "labels_dict" not in st.session_state:
-    varinfo = pd.read_excel(
-        "gdppaneldata.xlsx",
-        engine="openpyxl",
-        sheet_name="VariableInfo"
-    )
-
-    # Build dict: {variable_name: label_text}
-    labels_dict = dict(zip(varinfo["variable"], varinfo["label_short"]))
-    st.session_state["labels_dict"] = labels_dict
-
-# 3) (Optional) track base columns for custom variable logic
-if "base_columns" not in st.session_state:
-    st.session_state["base_columns"] = st.session_state["df_panel"].columns.tolist()
-
-if "custom_vars" not in st.session_state:
-    st.session_state["custom_vars"] = []  # names of user-created variables
-
-
 # ---------------------------------------
 # PAGE SETUP
 # ---------------------------------------
@@ -76,6 +49,16 @@ scatterplot_page = st.Page(
     title="Scatter Plot"
 )
 
+correlation_page = st.Page(
+    page="pages/correlation.py",
+    title="Correlations"
+)
+
+growth_page = st.Page(
+    page="pages/growth.py",
+    title="Growth & Convergence"
+)
+
 customvariable_page = st.Page(
     page="pages/customvariable.py",
     title="Create Own Variables"
@@ -86,21 +69,87 @@ data_page = st.Page(
     title="Get PWT Data"
 )
 
-# --- NAVIGATION SETUP [WITHOUT SECTIONS] ---
-pg = st.navigation(
-    pages=[
-        about_page,
-        variableinfo_page,
-        lineplot_page,
-        scatterplot_page,
-        connectedscatterplot_page,
-        customvariable_page,
-        data_page
-    ]
+memory_page = st.Page(
+    page="pages/memory.py",
+    title="Memory Usage"
 )
 
+profiling_page = st.Page(
+    page="pages/profiling.py",
+    title="Profiling"
+)
+
+# --- NAVIGATION SETUP [WITHOUT SECTIONS] ---
+pages = [
+    about_page,
+    variableinfo_page,
+    lineplot_page,
+    scatterplot_page,
+    connectedscatterplot_page,
+    correlation_page,
+    growth_page,
+    customvariable_page,
+    data_page
+]
+
+# Maintenance pages are only listed when the server runs with PWT_ADMIN=1
+if os.environ.get("PWT_ADMIN", "") not in ("", "0"):
+    pages += [memory_page, profiling_page]
+
+pg = st.navigation(pages=pages)
+
 # --- SIDEBAR FOOTER ---
 st.sidebar.text("By Ahmed Pirzada, Bristol University")
 
+# ---------------------------------------
+# LOAD / SHARE DATA & LABELS ONCE
+# ---------------------------------------
+
+# The workbook (Sheet1 + VariableInfo) is parsed once per server process
+# and shared read-only by every session; see pwt/data.py. A background
+# thread warms it (and the index, cube and labels) from the first run on;
+# until it is done, sessions see a progress bar instead of a blank page.
+preload = start_preload()
+
+if not preload.wait(timeout=1.0):
+    @st.fragment(run_every=0.5)
+    def loading_progress():
+        if preload.ready:
+            st.rerun()
+        fraction, message = preload.progress
+        st.progress(fraction, text=message)
+
+    loading_progress()
+    st.stop()
+
+preload.check()
+# One dataset version for the whole run, even if a reload swaps one in
+# meanwhile (see pwt/data.py)
+dataset = pin_dataset()
+
+# This session's custom variables live in a small overlay, never in the
+# base; pages read base + overlay through pwt.data.session_panel()
+session_overlay()
+
+# A replaced workbook is loaded in the background and swapped in (see
+# pwt/reload.py); custom variables follow on the session's next rerun
+start_reloader()
+carried, dropped = migrate_session()
+if carried or dropped:
+    outcome = []
+    if carried:
+        outcome.append(f"recomputed {', '.join(carried)}")
+    if dropped:
+        outcome.append(f"dropped {', '.join(dropped)}")
+    st.toast(f"The dataset was updated (version {dataset.version}); custom variables: {'; '.join(outcome)}.")
+for name, reason in dropped.items():
+    st.warning(f"Custom variable '{name}' could not be recomputed on the new data: {reason}")
+
+# Variable labels and metadata (sheet 'VariableInfo' + custom variables),
+# rebuilt only when either changes; see pwt/catalog.py
+session_catalog()
+
 # --- RUN NAVIGATION ---
-pg.run()
+# timed per page (see pwt/trace.py and the admin Profiling page)
+with rerun(pg.title):
+    pg.run()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmarks: long-frame filtering (PanelIndex) vs. PanelCube slicing
+for the requests the pages make.
+
+    python benchmarks/bench_cube.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from pwt.cube import PanelCube
+from pwt.data import get_dataset
+from pwt.formula import FormulaEngine
+from pwt.index import PanelIndex
+
+REPEAT = 200
+
+
+def main():
+    panel = get_dataset().panel
+    index = PanelIndex(panel)
+    cube = PanelCube(panel, index)
+
+    few = ["Pakistan", "India", "Bangladesh"]
+    latest = int(panel["year"].max())
+    scatter_cols = ["country", "region", "year", "rgdpo", "hc", "pop"]
+
+    long_engine = FormulaEngine(panel, index)
+    cube_engine = FormulaEngine(panel, index, cube=cube)
+    growth = long_engine.compile("growth(rgdpna) - growth(pop)")
+
+    cases = {
+        # lineplot defaults: 3 countries, one variable, year range
+        "line: 3 countries, range": (
+            lambda: index.filter(panel, country=few, year_range=(1990, 2020))[["country", "region", "year", "rgdpo"]],
+            lambda: cube.frame(panel, ["rgdpo"], country=few, year_range=(1990, 2020)),
+        ),
+        # connectedscatter: two variables
+        "connected: 3 countries": (
+            lambda: index.filter(panel, country=few, year_range=(1970, 2023))[["country", "region", "year", "rgdpo", "hc"]],
+            lambda: cube.frame(panel, ["rgdpo", "hc"], country=few, year_range=(1970, 2023)),
+        ),
+        # scatterplot default: all countries, latest year
+        "scatter: 1 year frame": (
+            lambda: index.filter(panel, year=[latest])[scatter_cols],
+            lambda: cube.frame(panel, ["rgdpo", "hc", "pop"], year=[latest]),
+        ),
+        "scatter: 1 year arrays": (
+            lambda: [index.filter(panel, year=[latest])[c].to_numpy() for c in ("rgdpo", "hc", "pop")],
+            lambda: [cube.cross_section(c, latest) for c in ("rgdpo", "hc", "pop")],
+        ),
+        # one country's series as an array
+        "series: 1 country": (
+            lambda: index.filter(panel, country=["India"])["rgdpo"].to_numpy(),
+            lambda: cube.series("rgdpo", "India"),
+        ),
+        # formula inputs: columns laid out as grids
+        "formula: growth difference": (
+            lambda: long_engine.evaluate(growth),
+            lambda: cube_engine.evaluate(growth),
+        ),
+    }
+
+    print(f"{'case':<30}{'long (ms)':>11}{'cube (ms)':>11}{'speed-up':>10}")
+    for name, (old, new) in cases.items():
+        a, b = old(), new()
+        if isinstance(a, pd.DataFrame):
+            pd.testing.assert_frame_equal(a, b)
+        elif isinstance(a, pd.Series):
+            pd.testing.assert_series_equal(a, b)
+        else:
+            assert all(np.array_equal(x, y, equal_nan=True) for x, y in zip(np.atleast_2d(a), np.atleast_2d(b))), name
+        t_old = min(timeit.repeat(old, number=1, repeat=REPEAT)) * 1e3
+        t_new = min(timeit.repeat(new, number=1, repeat=REPEAT)) * 1e3
+        print(f"{name:<30}{t_old:>11.3f}{t_new:>11.3f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Micro-benchmarks: DataFrame.query (old page code) vs. PanelIndex.
+
+    python benchmarks/bench_filter.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from pwt.data import get_dataset
+from pwt.index import PanelIndex
+
+REPEAT = 200
+
+
+def main():
+    panel = get_dataset().panel
+    index = PanelIndex(panel)
+
+    countries = sorted(panel["country"].unique())
+    regions = list(panel["region"].unique())
+    years = sorted(panel["year"].unique())
+    few = ["Pakistan", "India", "Bangladesh"]
+
+    cases = {
+        # lineplot / connectedscatter defaults
+        "3 countries, year range": (
+            lambda: panel.query(
+                "country in @few & year >= 1990 & year <= 2020",
+                local_dict={"few": few},
+            ),
+            lambda: index.filter(panel, country=few, year_range=(1990, 2020)),
+        ),
+        # scatterplot defaults: all countries/regions, latest year
+        "all countries, 1 year": (
+            lambda: panel.query(
+                "country in @c & region in @r & year in @y",
+                local_dict={"c": countries, "r": regions, "y": [years[-1]]},
+            ),
+            lambda: index.filter(panel, country=countries, region=regions, year=[years[-1]]),
+        ),
+        # getdata default: everything selected
+        "everything": (
+            lambda: panel.query(
+                "country in @c & region in @r & year in @y",
+                local_dict={"c": countries, "r": regions, "y": years},
+            ),
+            lambda: index.filter(panel, country=countries, region=regions, year=years),
+        ),
+    }
+
+    print(f"{'case':<28}{'query (ms)':>12}{'index (ms)':>12}{'speed-up':>10}")
+    for name, (old, new) in cases.items():
+        assert np.array_equal(old().index, new().index), name
+        t_old = min(timeit.repeat(old, number=1, repeat=REPEAT)) * 1e3
+        t_new = min(timeit.repeat(new, number=1, repeat=REPEAT)) * 1e3
+        print(f"{name:<28}{t_old:>12.3f}{t_new:>12.3f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Micro-benchmarks: growth accounting and convergence regressions computed
+per country / per period with pandas vs. the vectorized pwt.growth code,
+over the full panel.
+
+    python benchmarks/bench_growth.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from pwt.cube import PanelCube
+from pwt.data import get_dataset
+from pwt.growth import INPUTS, MEASURES, Convergence, GrowthAccounting
+from pwt.index import PanelIndex
+
+REPEAT = 20
+
+
+def naive_annual(panel: pd.DataFrame) -> pd.DataFrame:
+    """Annual contributions the ad-hoc way: shift within each country."""
+    out = []
+    for country, g in panel.groupby("country", observed=True, sort=True):
+        g = g.sort_values("year")
+        s = (g[INPUTS["labour share"]] + g[INPUTS["labour share"]].shift()) / 2
+        dl = {role: np.log(g[col].where(g[col] > 0)).diff() for role, col in INPUTS.items()}
+        rows = pd.DataFrame({
+            "output": dl["output"],
+            "capital": (1 - s) * dl["capital"],
+            "labour": s * dl["labour"],
+            "human capital": s * dl["human capital"],
+        })
+        rows["tfp"] = rows["output"] - rows["capital"] - rows["labour"] - rows["human capital"]
+        rows["tfp (PWT)"] = dl["tfp (PWT)"]
+        out.append(rows.to_numpy().T)
+    return np.stack(out, axis=1)
+
+
+def naive_decades(panel: pd.DataFrame, starts) -> np.ndarray:
+    """Decade averages of the annual terms, one group-by per decade."""
+    annual = naive_annual(panel)
+    years = np.sort(panel["year"].unique())
+    out = []
+    for start in starts:
+        cols = (years > start) & (years <= start + 10)
+        block = annual[:, :, cols]
+        out.append(np.where(np.isnan(block).any(axis=2), np.nan, block.mean(axis=2)))
+    return np.stack(out, axis=2)
+
+
+def naive_beta(panel: pd.DataFrame, measure: str) -> pd.DataFrame:
+    """One least-squares fit per (start, end) pair."""
+    numerator, denominator = MEASURES[measure]
+    income = np.log(panel[numerator] / panel[denominator]).rename("y")
+    wide = pd.concat([panel[["country", "year"]], income], axis=1).pivot(index="country", columns="year", values="y")
+    years = wide.columns.to_numpy()
+    rows = []
+    for i, start in enumerate(years):
+        for end in years[i + 1:]:
+            x = wide[start].to_numpy()
+            y = (wide[end].to_numpy() - x) / (end - start)
+            ok = np.isfinite(x) & np.isfinite(y)
+            if ok.sum() >= 3:
+                rows.append((start, end, np.polyfit(x[ok], y[ok], 1)[0]))
+    return pd.DataFrame(rows, columns=["start", "end", "beta"])
+
+
+def main():
+    panel = get_dataset().panel
+    cube = PanelCube(panel, PanelIndex(panel))
+    starts = np.arange(1970, int(cube.years[-1]) - 9, 10)
+    measure = next(iter(MEASURES))
+
+    cases = {
+        "accounting: annual terms": (
+            lambda: naive_annual(panel),
+            lambda: GrowthAccounting(cube).annual,
+        ),
+        "accounting: decades": (
+            lambda: naive_decades(panel, starts),
+            lambda: GrowthAccounting(cube).average(starts, starts + 10),
+        ),
+        "convergence: beta, all pairs": (
+            lambda: naive_beta(panel, measure)["beta"].to_numpy(),
+            lambda: Convergence(cube, measure).beta["beta"].to_numpy(),
+        ),
+    }
+
+    print(f"{'case':<32}{'pandas (ms)':>13}{'vectorized (ms)':>17}{'speed-up':>10}")
+    for name, (old, new) in cases.items():
+        a, b = old(), new()
+        assert np.allclose(a, b, rtol=1e-6, atol=1e-10, equal_nan=True), name
+        t_old = min(timeit.repeat(old, number=1, repeat=REPEAT)) * 1e3
+        t_new = min(timeit.repeat(new, number=1, repeat=REPEAT)) * 1e3
+        print(f"{name:<32}{t_old:>13.3f}{t_new:>17.3f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cold-load benchmark: xlsx (openpyxl) vs. the columnar cache.
+
+Each case runs in a fresh subprocess so import and page-cache effects are
+comparable; peak memory is the growth in max RSS during the load itself.
+
+    python benchmarks/bench_load.py
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CASE = r"""
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+from pwt import cache
+from pwt.data import DATA_FILE, PANEL_SHEET, VARINFO_SHEET
+
+fmt, float32 = {fmt!r}, {float32!r}
+if fmt != "xlsx":
+    # make sure the cache exists; the timed load below is then a pure read
+    cache.load_panel(DATA_FILE, PANEL_SHEET, VARINFO_SHEET, fmt=fmt, float32=float32)
+
+rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+if fmt == "xlsx":
+    panel, varinfo = cache.read_workbook(DATA_FILE, PANEL_SHEET, VARINFO_SHEET)
+else:
+    panel, varinfo, _ = cache.load_panel(
+        DATA_FILE, PANEL_SHEET, VARINFO_SHEET, fmt=fmt, float32=float32
+    )
+elapsed = time.perf_counter() - t0
+rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "seconds": elapsed,
+    "peak_rss_mb": (rss1 - rss0) / 1024,
+    "frame_mb": panel.memory_usage(deep=True).sum() / 2**20,
+}}))
+"""
+
+CASES = [
+    ("xlsx", False),
+    ("parquet", False),
+    ("feather", False),
+    ("parquet", True),
+    ("feather", True),
+]
+
+
+def run_case(fmt: str, float32: bool) -> dict:
+    code = CASE.format(root=str(ROOT), fmt=fmt, float32=float32)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    print(f"{'format':<16}{'load (s)':>10}{'peak RSS (MB)':>15}{'frame (MB)':>12}")
+    for fmt, float32 in CASES:
+        res = run_case(fmt, float32)
+        name = fmt + (" float32" if float32 else "")
+        print(
+            f"{name:<16}{res['seconds']:>10.3f}"
+            f"{res['peak_rss_mb']:>15.1f}{res['frame_mb']:>12.2f}"
+        )
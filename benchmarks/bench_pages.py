@@ -0,0 +1,311 @@
+"""
+Headless page benchmark: replays scripted interactions through AppTest.
+
+Each scenario opens Main.py, switches to a page and changes widgets the way
+a user would. Every rerun goes through Main.py, as in a live session, so the
+timings include its per-rerun work (preload gate, custom variable
+migration, catalog, `rerun()` tracing) as well as the page's. For every
+rerun it records the wall time, the size of the Plotly figures sent to the
+browser and the peak Python memory allocated during the rerun. Results go
+to a JSON file; with --compare, a previous file is used as the baseline and
+slower or heavier steps are reported (the exit status is 1 if there are
+any).
+
+    python benchmarks/bench_pages.py                            # writes benchmarks/baseline_pages.json
+    python benchmarks/bench_pages.py --out new.json --compare benchmarks/baseline_pages.json
+
+Every scenario runs --repeat times (median and first-run times are kept;
+the first run of a scenario is the one with cold figure caches), then once
+more under tracemalloc for the memory figures. Process caches are cleared
+once at the start, so the "startup" scenario includes loading the data.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import streamlit as st
+from streamlit.runtime.pages_manager import PagesManager
+from streamlit.testing.v1 import AppTest
+
+DEFAULT_OUT = ROOT / "benchmarks" / "baseline_pages.json"
+
+# a step is slower if it takes TOLERANCE x the baseline and NOISE_MS more
+TOLERANCE = 1.5
+NOISE_MS = 5.0
+PAYLOAD_TOLERANCE = 1.10
+
+
+# AppTest looks for a pages/ folder again on every run and, finding one, runs
+# a switched-to page script on its own. A live server stops doing that once
+# Main.py has called st.navigation; do the same so pages run through Main.py.
+_pages_manager_init = PagesManager.__init__
+
+
+def _navigation_only(self, *args, **kwargs):
+    _pages_manager_init(self, *args, **kwargs)
+    PagesManager.uses_pages_directory = False
+
+
+PagesManager.__init__ = _navigation_only
+
+
+# ---- widget helpers ----
+def _find(elements, label: str):
+    """First widget whose label starts with `label`."""
+    for element in elements:
+        if element.label.startswith(label):
+            return element
+    raise LookupError(f"No widget labelled {label!r}.")
+
+
+def sidebar(kind: str, label: str):
+    return lambda at: _find(getattr(at.sidebar, kind), label)
+
+
+def main_area(kind: str, label: str):
+    return lambda at: _find(getattr(at.main, kind), label)
+
+
+def set_value(widget, value):
+    return lambda at: widget(at).set_value(value)
+
+
+def select(widget, value):
+    return lambda at: widget(at).select(value)
+
+
+def click(label: str):
+    return lambda at: _find(at.button, label).click()
+
+
+def type_text(label: str, text: str):
+    return lambda at: _find(at.text_input, label).input(text)
+
+
+def actions(*steps):
+    def run(at):
+        for step in steps:
+            step(at)
+    return run
+
+
+def open_page(path: str):
+    return lambda at: at.switch_page(path)
+
+
+# ---- scenarios: [(step name, action before the rerun), ...] ----
+SCENARIOS = {
+    "startup": [
+        ("main", None),
+    ],
+    "lineplot": [
+        ("open", open_page("pages/lineplot.py")),
+        ("add country", set_value(sidebar("multiselect", "Select the Country:"),
+                                  ["Pakistan", "India", "Bangladesh", "China"])),
+        ("change variable", select(sidebar("selectbox", "Select Y-axis variable:"), "Population (in mil.)")),
+        ("year range", set_value(sidebar("select_slider", "Select Year Range:"), (1990, 2020))),
+        ("log scale", set_value(sidebar("radio", "Y-axis scale:"), "Log")),
+    ],
+    "scatterplot": [
+        ("open", open_page("pages/scatterplot.py")),
+        ("all years", set_value(sidebar("multiselect", "Select the Year:"), ["All"])),
+        ("decade means", select(sidebar("selectbox", "Points to show:"), "Country-decade means")),
+        ("binned density", select(sidebar("selectbox", "Points to show:"), "Binned density")),
+        ("OLS trendline", actions(
+            select(sidebar("selectbox", "Points to show:"), "All points"),
+            select(sidebar("selectbox", "Add trendline:"), "Linear (OLS)"),
+        )),
+        ("log x", set_value(sidebar("radio", "X-axis scale:"), "Log")),
+    ],
+    "scatteranimation": [
+        ("open", open_page("pages/scatterplot.py")),
+        ("animate", set_value(sidebar("radio", "Show:"), "Animation over years")),
+        ("log x", set_value(sidebar("radio", "X-axis scale:"), "Log")),
+        ("one region", set_value(sidebar("multiselect", "Select the Region:"), ["Asia"])),
+    ],
+    "connectedscatter": [
+        ("open", open_page("pages/connectedscatter.py")),
+        ("change x", select(sidebar("selectbox", "Select X-axis variable:"), "Human Capital Index")),
+        ("log y", set_value(sidebar("radio", "Y-axis scale:"), "Log")),
+    ],
+    "correlation": [
+        ("open", open_page("pages/correlation.py")),
+        ("spearman", set_value(sidebar("radio", "Correlation:"), "Spearman (rank)")),
+        ("within country", actions(
+            set_value(sidebar("radio", "Correlation:"), "Pearson"),
+            select(sidebar("selectbox", "Remove means:"), "Within country"),
+        )),
+        ("year range", set_value(sidebar("select_slider", "Select Year Range:"), (1990, 2020))),
+    ],
+    "growth": [
+        ("open", open_page("pages/growth.py")),
+        ("decades", set_value(sidebar("radio", "Periods:"), "Decades")),
+        ("convergence", set_value(sidebar("radio", "Analysis:"), "Convergence")),
+        ("year range", set_value(sidebar("select_slider", "Select Year Range:"), (1970, 2010))),
+        ("per worker", select(sidebar("selectbox", "Income measure:"), "GDP per worker (PPP)")),
+    ],
+    "customvariable": [
+        ("open", open_page("pages/customvariable.py")),
+        ("add gdp_pc", actions(
+            type_text("New variable name (no spaces):", "gdp_pc"),
+            type_text("Formula:", "rgdpo / pop"),
+            click("Add variable"),
+        )),
+        ("add growth", actions(
+            type_text("New variable name (no spaces):", "gdp_pc_growth"),
+            type_text("Formula:", "growth(gdp_pc)"),
+            click("Add variable"),
+        )),
+        ("open lineplot", open_page("pages/lineplot.py")),
+        ("plot gdp_pc", select(sidebar("selectbox", "Select Y-axis variable:"), "gdp_pc")),
+        ("back", open_page("pages/customvariable.py")),
+        ("remove", actions(
+            set_value(main_area("multiselect", "Select custom variables to remove:"),
+                      ["gdp_pc", "gdp_pc_growth"]),
+            click("Remove selected variables"),
+        )),
+    ],
+    "getdata": [
+        ("open", open_page("pages/getdata.py")),
+        ("page 3", set_value(main_area("number_input", "Page (of"), 3)),
+        ("full table", set_value(sidebar("radio", "Table display:"), "Full table")),
+        ("filter country", set_value(sidebar("multiselect", "Select the Country:"), ["Kenya"])),
+    ],
+}
+
+
+# ---- measurement ----
+def _payload(at) -> int:
+    """Bytes of Plotly JSON in the current page."""
+    return sum(len(chart.proto.spec) for chart in at.get("plotly_chart"))
+
+
+def run_scenario(name: str, traced: bool = False) -> list:
+    """Replay one scenario; one record per rerun."""
+    at = AppTest.from_file(str(ROOT / "Main.py"), default_timeout=300)
+    records = []
+    steps = SCENARIOS[name]
+    if steps[0][1] is not None:
+        # every scenario starts from the app's landing page
+        at.run()
+    for step, action in steps:
+        if action is not None:
+            action(at)
+        if traced:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - t0
+        errors = [str(e.value) for e in at.exception] + [e.body for e in at.error]
+        record = {"step": step, "ms": elapsed * 1e3, "payload_bytes": _payload(at), "errors": errors}
+        if traced:
+            record["peak_kb"] = (tracemalloc.get_traced_memory()[1] - before) / 1024
+        records.append(record)
+    return records
+
+
+def benchmark(repeat: int, only=None) -> dict:
+    os.chdir(ROOT)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    results = {}
+    for name in SCENARIOS:
+        if only and name not in only:
+            continue
+        runs = [run_scenario(name) for _ in range(repeat)]
+        tracemalloc.start()
+        try:
+            traced = run_scenario(name, traced=True)
+        finally:
+            tracemalloc.stop()
+
+        steps = []
+        for i, first in enumerate(runs[0]):
+            times = [run[i]["ms"] for run in runs]
+            steps.append({
+                "step": first["step"],
+                "first_ms": round(times[0], 2),
+                "median_ms": round(statistics.median(times), 2),
+                "payload_bytes": first["payload_bytes"],
+                "peak_kb": round(traced[i]["peak_kb"], 1),
+                "errors": sorted({e for run in runs for e in run[i]["errors"]}),
+            })
+        results[name] = steps
+        print(f"{name}:")
+        for s in steps:
+            flag = "  ERROR: " + "; ".join(s["errors"]) if s["errors"] else ""
+            print(
+                f"  {s['step']:<18}{s['first_ms']:>9.1f} ms first {s['median_ms']:>9.1f} ms median"
+                f"{s['payload_bytes']:>11,} B fig {s['peak_kb']:>10,.0f} kB peak{flag}"
+            )
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "machine": platform.platform(),
+        "repeat": repeat,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list:
+    """Steps that got slower or heavier than the baseline."""
+    problems = []
+    for name, steps in current["scenarios"].items():
+        before = {s["step"]: s for s in baseline.get("scenarios", {}).get(name, [])}
+        for s in steps:
+            if s["errors"]:
+                problems.append(f"{name}/{s['step']}: errors: {'; '.join(s['errors'])}")
+            old = before.get(s["step"])
+            if old is None:
+                continue
+            if s["median_ms"] > old["median_ms"] * TOLERANCE and s["median_ms"] - old["median_ms"] > NOISE_MS:
+                problems.append(f"{name}/{s['step']}: {old['median_ms']:.1f} -> {s['median_ms']:.1f} ms")
+            if s["payload_bytes"] > old["payload_bytes"] * PAYLOAD_TOLERANCE:
+                problems.append(
+                    f"{name}/{s['step']}: figure {old['payload_bytes']:,} -> {s['payload_bytes']:,} bytes"
+                )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="where to write the results")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--repeat", type=int, default=3, help="untraced runs per scenario")
+    parser.add_argument("--only", nargs="*", choices=list(SCENARIOS), help="run only these scenarios")
+    args = parser.parse_args()
+
+    # read the baseline first: --out may point at the same file
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    results = benchmark(max(1, args.repeat), args.only)
+    args.out.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nwrote {args.out} (max RSS {results['max_rss_mb']} MB)")
+
+    if baseline is not None:
+        problems = compare(results, baseline)
+        if problems:
+            print(f"\n{len(problems)} regression(s) against {args.compare}:")
+            for p in problems:
+                print("  " + p)
+            sys.exit(1)
+        print(f"\nno regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
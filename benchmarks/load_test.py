@@ -0,0 +1,310 @@
+"""
+Load test: many simulated browser sessions against a local server.
+
+Starts `streamlit run Main.py` headless (or uses --url), then opens N
+websocket sessions that talk Streamlit's own protocol the way a browser
+tab does: run the landing page, then replay a short scripted visit (open
+pages, change widgets) with a little think time between reruns. The
+number of concurrent sessions is ramped through the levels given with
+--sessions; every level starts from a fresh server so the first sessions
+pay the cold start, as a lecture hall opening the dashboard at once would.
+
+Per level it reports rerun latency percentiles (send to script finished),
+throughput (reruns per second), errors, and the server's resident memory:
+peak RSS and (peak - baseline) / sessions. The baseline is the fresh
+server, so shared data loading is spread over the sessions; with --warm
+one untimed visit runs first and the baseline is taken after it, which
+leaves only what each extra session costs.
+
+    python benchmarks/load_test.py --sessions 1 10 25 50
+    python benchmarks/load_test.py --sessions 20 --ramp 0 --warm --out load.json
+
+Memory is read from /proc, so RSS figures are only available on Linux.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# widget type: the WidgetState field its value is sent in
+VALUE_FIELDS = {
+    "radio": "string_value",
+    "selectbox": "string_value",
+    "multiselect": "string_array_value",
+}
+
+# ---- the visit each session replays: [(step, action, *args), ...] ----
+VISIT = [
+    ("landing", "run"),
+    ("line plot", "open", "Line Plot"),
+    ("add countries", "set", "Select the Country:", ["Pakistan", "India", "China"]),
+    ("log scale", "set", "Y-axis scale:", "Log"),
+    ("scatter plot", "open", "Scatter Plot"),
+    ("decade means", "set", "Points to show:", "Country-decade means"),
+    ("connected scatter", "open", "Connected Scatter Plot"),
+    ("get data", "open", "Get PWT Data"),
+]
+
+
+# ---- server ----
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """`streamlit run Main.py` on `port`; returns once it answers health checks."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "Main.py",
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("streamlit exited during startup")
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit did not start within 60 s")
+
+
+def rss_mb(pid: int):
+    """Resident memory of `pid` in MB (None where /proc is unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+# ---- one simulated browser tab ----
+class Session:
+    """A websocket session replaying VISIT; records (step, seconds, error)."""
+
+    def __init__(self, url: str, think: float):
+        self.url = url
+        self.think = think
+        self.pages = {}            # page title -> page_script_hash
+        self.page_hash = ""
+        self.widgets = {}          # label -> (widget type, widget id, fragment id)
+        self.states = {}           # widget id -> (field, value)
+        self.records = []
+
+    def _rerun_message(self, fragment_id: str = "", auto: bool = False) -> bytes:
+        msg = BackMsg()
+        rerun = msg.rerun_script
+        rerun.query_string = ""
+        rerun.page_script_hash = self.page_hash
+        rerun.fragment_id = fragment_id
+        rerun.is_auto_rerun = auto
+        for widget_id, (field, value) in self.states.items():
+            state = rerun.widget_states.widgets.add()
+            state.id = widget_id
+            if field == "string_array_value":
+                state.string_array_value.data.extend(value)
+            else:
+                setattr(state, field, value)
+        return msg.SerializeToString()
+
+    def _read(self, msg: ForwardMsg):
+        """Remember pages and widgets; return an error message, if any."""
+        kind = msg.WhichOneof("type")
+        if kind == "navigation":
+            self.pages = {p.page_name: p.page_script_hash for p in msg.navigation.app_pages}
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            etype = element.WhichOneof("type")
+            if etype in VALUE_FIELDS:
+                widget = getattr(element, etype)
+                self.widgets[widget.label] = (etype, widget.id, msg.delta.fragment_id)
+            elif etype == "exception":
+                return element.exception.message
+        return None
+
+    async def _rerun(self, ws, step: str, fragment_id: str = "") -> None:
+        """
+        One rerun (of the page, or of the fragment holding the changed
+        widget), timed until it is complete. Like the browser, it reruns
+        `run_every` fragments when asked to, which is how Main.py's loading
+        progress bar polls until the shared data is ready.
+        """
+        t0 = time.perf_counter()
+        await ws.send(self._rerun_message(fragment_id))
+        error, auto_rerun = None, None
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await ws.recv())
+            error = self._read(msg) or error
+            kind = msg.WhichOneof("type")
+            if kind == "auto_rerun":
+                auto_rerun = (msg.auto_rerun.interval, msg.auto_rerun.fragment_id)
+            elif kind == "script_finished":
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    auto_rerun = None
+                    continue
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    error = error or "compile error"
+                elif auto_rerun is not None:
+                    interval, fragment_id = auto_rerun
+                    await asyncio.sleep(interval)
+                    await ws.send(self._rerun_message(fragment_id, auto=True))
+                    continue
+                break
+        self.records.append((step, time.perf_counter() - t0, error))
+
+    async def run(self) -> None:
+        async with websockets.connect(self.url, max_size=None, open_timeout=60) as ws:
+            for step, action, *args in VISIT:
+                fragment_id = ""
+                if action == "open":
+                    self.page_hash = self.pages[args[0]]
+                    self.widgets, self.states = {}, {}
+                elif action == "set":
+                    label, value = args
+                    etype, widget_id, fragment_id = self.widgets[label]
+                    self.states[widget_id] = (VALUE_FIELDS[etype], value)
+                await self._rerun(ws, step, fragment_id)
+                await asyncio.sleep(self.think * random.uniform(0.5, 1.5))
+
+
+# ---- one concurrency level ----
+async def _sample_rss(pid: int, samples: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        samples.append(rss_mb(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _run_level(url: str, pid, sessions: int, ramp: float, think: float) -> dict:
+    clients = [Session(url, think) for _ in range(sessions)]
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(pid, samples, stop)) if pid else None
+
+    async def start(i, client):
+        await asyncio.sleep(ramp * i / sessions)
+        try:
+            await client.run()
+        except Exception as e:  # a dropped or refused connection is a result too
+            client.records.append(("connect", 0.0, f"{type(e).__name__}: {e}"))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(start(i, c) for i, c in enumerate(clients)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    if sampler:
+        await sampler
+
+    records = [r for c in clients for r in c.records]
+    ms = np.array([seconds * 1e3 for step, seconds, error in records if step != "connect"])
+    errors = sorted({error for step, seconds, error in records if error})
+    peak = max((s for s in samples if s is not None), default=None)
+    steps = {}
+    for step, seconds, error in records:
+        steps.setdefault(step, []).append(seconds * 1e3)
+    return {
+        "sessions": sessions,
+        "reruns": len(ms),
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(len(ms) / wall, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1) if len(ms) else None,
+        "p90_ms": round(float(np.percentile(ms, 90)), 1) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 1) if len(ms) else None,
+        "max_ms": round(float(ms.max()), 1) if len(ms) else None,
+        "step_p50_ms": {s: round(float(np.median(v)), 1) for s, v in steps.items() if s != "connect"},
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "errors": errors,
+    }
+
+
+def run_level(sessions: int, ramp: float, think: float, url: str = None, warm: bool = False) -> dict:
+    """One level; starts (and stops) its own server unless `url` is given."""
+    server = None
+    if url is None:
+        port = _free_port()
+        server = start_server(port)
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    pid = server.pid if server else None
+    try:
+        if warm:
+            asyncio.run(Session(url, 0.0).run())
+        idle = rss_mb(pid) if pid else None
+        result = asyncio.run(_run_level(url, pid, sessions, ramp, think))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(10)
+    result["baseline_rss_mb"] = round(idle, 1) if idle is not None else None
+    if idle is not None and result["peak_rss_mb"] is not None:
+        result["rss_per_session_mb"] = round((result["peak_rss_mb"] - idle) / sessions, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 25],
+                        help="concurrent sessions per level (ramped in this order)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which a level's sessions connect")
+    parser.add_argument("--think", type=float, default=0.5, help="mean pause between reruns, seconds")
+    parser.add_argument("--warm", action="store_true", help="run one untimed visit before each level")
+    parser.add_argument("--url", help="websocket URL of a running server (ws://host:port/_stcore/stream)")
+    parser.add_argument("--out", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+          f" {'peak RSS':>9} {'MB/sess':>8}")
+    levels = []
+    for sessions in args.sessions:
+        r = run_level(sessions, args.ramp, args.think, args.url, args.warm)
+        levels.append(r)
+        rss = f"{r['peak_rss_mb']:>6.0f} MB" if r["peak_rss_mb"] is not None else f"{'-':>9}"
+        per = f"{r['rss_per_session_mb']:>8.2f}" if "rss_per_session_mb" in r else f"{'-':>8}"
+        print(f"{sessions:>8} {r['reruns']:>7} {r['reruns_per_s']:>8.1f} {r['p50_ms']:>8.0f}"
+              f" {r['p90_ms']:>8.0f} {r['p99_ms']:>8.0f} {rss} {per}")
+        for error in r["errors"]:
+            print(f"{'':>8} ERROR: {error}")
+
+    if args.out:
+        args.out.write_text(json.dumps({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+            "ramp_s": args.ramp,
+            "think_s": args.think,
+            "warm": args.warm,
+            "visit": [step for step, *_ in VISIT],
+            "levels": levels,
+        }, indent=2) + "\n")
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
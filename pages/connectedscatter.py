@@ -2,47 +2,55 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+from pwt.aggregate import STATS, aggregate_frame, get_aggregates
+from pwt.catalog import session_catalog
+from pwt.cube import get_cube
+from pwt.data import session_overlay, session_panel
+from pwt.export import download_button
+from pwt.figcache import cached_figure, set_axis_types
+from pwt.index import get_index
+from pwt.trace import span
+
 
 # --- LOAD / SHARE DATA ----
-df_panel = st.session_state["df_panel"]
-labels_all = st.session_state.get("labels_dict", {})
+with span("load"):
+    df_panel = session_panel()  # shared base + this session's custom variables
+    catalog = session_catalog()  # labels and metadata, built once per change
 
-# All numeric columns available for X/Y (exclude 'year' so it’s not selectable)
-numeric_cols = [
-    col for col in df_panel.select_dtypes(include="number").columns
-    if col != "year"
-]
+# All numeric variables available for plotting (year excluded), in catalog order
+numeric_cols = list(catalog.numeric)
 
 if not numeric_cols:
     st.error("No numeric variables available for plotting.")
     st.stop()
 
-# Helper: get display label for any column
-def get_label(col: str) -> str:
-    # labels_all comes from VariableInfo sheet (via Main.py)
-    return labels_all.get(col, col)
-
-# Helper: map a chosen label back to the column name
-def get_code_from_label(label: str) -> str:
-    # search only among numeric_cols (the ones in the dropdown)
-    for col in numeric_cols:
-        if get_label(col) == label:
-            return col
-    # fallback: if user somehow selected a raw column name
-    if label in df_panel.columns:
-        return label
-    raise KeyError(f"Label '{label}' not found among numeric columns.")
-
 
-# ---- Sidebar ----
+# ---- Sidebar: data selection (reruns the whole page) ----
 st.sidebar.header("Please Filter Here:")
 
+# option lists are built once per dataset version (pwt/index.py);
+# regions and income groups follow the countries (pwt/aggregate.py)
+index = get_index()
+aggregates = get_aggregates()
+
 country = st.sidebar.multiselect(
     "Select the Country:",
-    options=sorted(df_panel["country"].unique()),
-    default=['Pakistan', 'India', 'Bangladesh']
+    options=index.country_options + aggregates.names,
+    default=['Pakistan', 'India', 'Bangladesh'],
+    help="Regions and income groups, e.g. 'Asia (region)', are aggregates of their countries.",
 )
 
+groups = [c for c in country if c in aggregates]
+if groups:
+    stat_label = st.sidebar.selectbox(
+        "Aggregate statistic:",
+        options=[label for label, stat in STATS.items() if stat in aggregates.stats],
+        index=0,
+    )
+    stat = STATS[stat_label]
+else:
+    stat = None
+
 # Choose X / Y from all numeric variables
 # Try to default to something sensible if present
 if "pop" in numeric_cols:
@@ -59,109 +67,146 @@ else:
 
 variablex_label = st.sidebar.selectbox(
     "Select X-axis variable:",
-    options=[get_label(v) for v in numeric_cols],
+    options=catalog.numeric_labels,
     index=0
 )
 
 
 variabley_label = st.sidebar.selectbox(
     "Select Y-axis variable:",
-    options=[get_label(v) for v in numeric_cols],
+    options=catalog.numeric_labels,
     index=1 if len(numeric_cols) > 1 else 0
 )
 
 start_year, end_year = st.sidebar.select_slider(
     "Select Year Range:",
-    options=sorted(df_panel["year"].unique()),
-    value=(df_panel["year"].min(), df_panel["year"].max())
+    options=index.year_options,
+    value=(index.year_min, index.year_max)
 )
 
-# Convert labels → actual column names
-variablex = get_code_from_label(variablex_label)
-variabley = get_code_from_label(variabley_label)
+# Convert labels → actual column names (O(1) catalog lookups)
+variablex = catalog.code(variablex_label)
+variabley = catalog.code(variabley_label)
 
-label_x = get_label(variablex)
-label_y = get_label(variabley)
+label_x = catalog.label(variablex)
+label_y = catalog.label(variabley)
 
 # --- Filter data ---
-df_selection = df_panel.query(
-    "country in @country & year >= @start_year & year <= @end_year"
-)
+# Sliced from the shared country x year arrays: only the plotted columns,
+# plus the precomputed aggregates of any selected groups
+with span("filter"):
+    df_selection = get_cube().frame(
+        df_panel, [variablex, variabley], country=[c for c in country if c not in aggregates],
+        year_range=(start_year, end_year)
+    )
+    if groups:
+        df_selection = pd.concat([
+            df_selection,
+            aggregate_frame(df_panel, [variablex, variabley], groups, stat, (start_year, end_year)),
+        ])
 
 if df_selection.empty:
     st.warning("No data for the selected filters.")
     st.stop()
 
-# ---- Axis scales ----
-xscale = st.sidebar.radio(
-    "X-axis scale:",
-    options=["Linear", "Log"],
-    index=0,
-)
-
-yscale = st.sidebar.radio(
-    "Y-axis scale:",
-    options=["Linear", "Log"],
-    index=0,
-)
-
-# ---- CONNECTED SCATTER (time-annotated line) ----
-fig = px.line(
-    df_selection.dropna(subset=[variablex, variabley]),
-    x=variablex,
-    y=variabley,
-    color="country",
-    text="year"   # year labels on the path
-)
-
-fig.update_layout(
-    template="plotly_white",
-    margin=dict(t=140),     # extra top margin for title
-    title={
-        'text': f"{label_y} and {label_x}",
-        'x': 0.5,
-        'xanchor': 'center',
-        'yanchor': 'top',
-        #'font': dict(size=28),
-    },
-    xaxis_title=label_x,
-    yaxis_title=label_y,
-    legend=dict(title='',
-                bgcolor="rgba(0,0,0,0)",
-                bordercolor="rgba(0,0,0,0)",
-                orientation='h',   # horizontal
-                x=0.5,             # centered horizontally
-                xanchor='center',  # anchor to center
-                y=1.15             # positioned just below the title
-                ),
-    xaxis_type="log" if xscale == "Log" else "linear",
-    yaxis_type="log" if yscale == "Log" else "linear",
-)
-
-fig.update_traces(textposition="bottom right", textfont_size=6)
-
-fig.add_annotation(
-    text="SOURCE: Penn World Table, Version 11",
-    xref="paper", yref="paper",
-    x=0, y=-0.3,
-    showarrow=False,
-    #font=dict(size=12),
-)
-
-# Show the Plot
-st.plotly_chart(fig) #, use_container_width=True)
-
-
-# --- Download filtered data as CSV ---
-df_export = df_selection[["country", "year", variablex, variabley]].dropna(
-    subset=[variablex, variabley]
-)
-
-csv_data = df_export.to_csv(index=False).encode("utf-8")
 
-st.download_button(
-    label="Download Plot Data (CSV)",
-    data=csv_data,
-    file_name="pwt_connectedscatter_data.csv",
-    mime="text/csv",
-)
\ No newline at end of file
+def build_figure(df_selection, variablex, variabley, label_x, label_y):
+    # ---- CONNECTED SCATTER (time-annotated line) ----
+    fig = px.line(
+        df_selection.dropna(subset=[variablex, variabley]),
+        x=variablex,
+        y=variabley,
+        color="country",
+        text="year"   # year labels on the path
+    )
+
+    fig.update_layout(
+        template="plotly_white",
+        margin=dict(t=140),     # extra top margin for title
+        title={
+            'text': f"{label_y} and {label_x}",
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            #'font': dict(size=28),
+        },
+        xaxis_title=label_x,
+        yaxis_title=label_y,
+        legend=dict(title='',
+                    bgcolor="rgba(0,0,0,0)",
+                    bordercolor="rgba(0,0,0,0)",
+                    orientation='h',   # horizontal
+                    x=0.5,             # centered horizontally
+                    xanchor='center',  # anchor to center
+                    y=1.15             # positioned just below the title
+                    ),
+    )
+
+    fig.update_traces(textposition="bottom right", textfont_size=6)
+
+    fig.add_annotation(
+        text="SOURCE: Penn World Table, Version 11",
+        xref="paper", yref="paper",
+        x=0, y=-0.3,
+        showarrow=False,
+        #font=dict(size=12),
+    )
+
+    return fig
+
+
+# ---- Chart: display options rerun only this part ----
+@st.fragment
+def chart(df_selection, variablex, variabley, label_x, label_y, country, years, stat):
+    xscale = st.sidebar.radio(
+        "X-axis scale:",
+        options=["Linear", "Log"],
+        index=0,
+    )
+
+    yscale = st.sidebar.radio(
+        "Y-axis scale:",
+        options=["Linear", "Log"],
+        index=0,
+    )
+
+    # Show the Plot (built once per selection, shared across sessions;
+    # the scales are applied to the cached figure)
+    overlay = session_overlay()
+    figure = cached_figure(
+        "connectedscatter",
+        dict(
+            x=variablex,
+            y=variabley,
+            data=(overlay.column_key(variablex), overlay.column_key(variabley)),
+            labels=(label_x, label_y),
+            country=country,
+            years=years,
+            stat=stat,
+        ),
+        lambda: build_figure(df_selection, variablex, variabley, label_x, label_y),
+    )
+    set_axis_types(figure, xscale=xscale, yscale=yscale)
+    with span("render"):
+        st.plotly_chart(figure) #, use_container_width=True)
+
+
+# ---- Download: the format picker reruns only this part ----
+@st.fragment
+def export(df_selection, variablex, variabley, identity):
+    # file written only when clicked
+    df_export = df_selection[["country", "year", variablex, variabley]].dropna(
+        subset=[variablex, variabley]
+    )
+
+    download_button(
+        "Download Plot Data",
+        df_export,
+        file_stem="pwt_connectedscatter_data",
+        key="plot_download",
+        identity=identity,
+    )
+
+
+chart(df_selection, variablex, variabley, label_x, label_y, country, (start_year, end_year), stat)
+export(df_selection, variablex, variabley, (stat, tuple(groups)))
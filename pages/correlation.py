@@ -0,0 +1,164 @@
+import plotly.express as px
+import streamlit as st
+
+from pwt.catalog import session_catalog
+from pwt.correlate import DEMEAN, METHODS, correlations, strongest_pairs
+from pwt.data import session_overlay, session_panel
+from pwt.figcache import cached_figure
+from pwt.index import get_index
+from pwt.trace import span
+
+
+# --- LOAD / SHARE DATA ----
+with span("load"):
+    df_panel = session_panel()  # shared base + this session's custom variables
+    catalog = session_catalog()  # labels and metadata, built once per change
+
+# All numeric variables (year excluded), in catalog order
+numeric_cols = list(catalog.numeric)
+
+if len(numeric_cols) < 2:
+    st.error("At least two numeric variables are needed for correlations.")
+    st.stop()
+
+
+# ---- PAGE TITLE ----
+st.markdown("## Correlations")
+st.markdown(
+    "Correlation between every pair of variables, each over the country-years "
+    "where both are available. Click a cell or a row of the table to open that "
+    "pair in the **Scatter Plot**."
+)
+
+
+# ---- Sidebar ----
+st.sidebar.header("Please Filter Here:")
+
+# option lists are built once per dataset version (pwt/index.py)
+index = get_index()
+
+method_label = st.sidebar.radio(
+    "Correlation:",
+    options=list(METHODS),
+    index=0
+)
+
+demean_label = st.sidebar.selectbox(
+    "Remove means:",
+    options=list(DEMEAN),
+    index=0,
+    help="Within year: compare countries with each other in the same year. "
+         "Within country: compare each country with itself over time.",
+)
+
+region = st.sidebar.multiselect(
+    "Select the Region:",
+    options=index.region_options,
+    default=[],
+    help="Leave empty for all regions.",
+)
+
+start_year, end_year = st.sidebar.select_slider(
+    "Select Year Range:",
+    options=index.year_options,
+    value=(index.year_min, index.year_max)
+)
+
+min_obs = st.sidebar.number_input(
+    "Minimum common observations:",
+    min_value=2,
+    value=30,
+    step=10,
+)
+
+
+# ---- Correlation matrix (cached per version, variables and filter) ----
+with span("compute"):
+    r, n = correlations(
+        df_panel, numeric_cols,
+        method=METHODS[method_label],
+        within=DEMEAN[demean_label],
+        region=region or None,
+        year_range=(start_year, end_year),
+    )
+    shown = r.where(n >= min_obs)
+
+
+def open_in_scatter(x, y):
+    # the scatter page starts from this pair (see pages/scatterplot.py)
+    st.session_state["scatter_pair"] = (x, y)
+    st.switch_page("pages/scatterplot.py")
+
+
+def build_figure(shown, n, title):
+    fig = px.imshow(
+        shown,
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale="RdBu",
+        aspect="auto",
+    )
+    fig.update_traces(
+        customdata=n.to_numpy(),
+        hovertemplate="%{y} and %{x}<br>r = %{z:.3f}<br>%{customdata} observations<extra></extra>",
+    )
+    fig.update_layout(
+        template="plotly_white",
+        height=700,
+        title={
+            "text": title,
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        xaxis_title=" ",
+        yaxis_title=" ",
+        coloraxis_colorbar=dict(title="r"),
+    )
+    return fig
+
+
+# ---- Heatmap ----
+overlay = session_overlay()
+figure = cached_figure(
+    "correlation",
+    dict(
+        columns=tuple(numeric_cols),
+        data=tuple(overlay.column_key(c) for c in numeric_cols),
+        method=method_label,
+        demean=demean_label,
+        region=region,
+        years=(start_year, end_year),
+        min_obs=int(min_obs),
+    ),
+    lambda: build_figure(
+        shown, n,
+        f"{method_label} correlations, {start_year}-{end_year}"
+        + ("" if DEMEAN[demean_label] is None else f" ({demean_label.lower()} means removed)"),
+    ),
+)
+with span("render"):
+    event = st.plotly_chart(figure, on_select="rerun", selection_mode="points", key="correlation_heatmap")
+
+points = event.selection.points if event else []
+if points and points[0]["x"] != points[0]["y"]:
+    open_in_scatter(points[0]["x"], points[0]["y"])
+
+
+# ---- Strongest pairs ----
+st.write("### Strongest pairs")
+pairs = strongest_pairs(r, n, min_obs)
+pairs.insert(1, "x label", pairs["x"].map(catalog.label))
+pairs.insert(3, "y label", pairs["y"].map(catalog.label))
+
+with span("render"):
+    selected = st.dataframe(
+        pairs.round({"r": 3}),
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="correlation_pairs",
+    )
+
+rows = selected.selection.rows if selected else []
+if rows:
+    open_in_scatter(pairs["x"].iloc[rows[0]], pairs["y"].iloc[rows[0]])
@@ -1,30 +1,19 @@
 import streamlit as st
-import pandas as pd
 
-# ---------- Load / share data ----------
-if "df_panel" not in st.session_state:
-    df = pd.read_excel(
-        io="gdppaneldata.xlsx",
-        engine="openpyxl",
-        sheet_name="Sheet1",
-    )
-    st.session_state["df_panel"] = df
-    # store the original columns so we know what is "base" vs "custom"
-    st.session_state["base_columns"] = df.columns.tolist()
-
-df_panel = st.session_state["df_panel"]
-
-if "base_columns" not in st.session_state:
-    st.session_state["base_columns"] = df_panel.columns.tolist()
-
-if "custom_vars" not in st.session_state:
-    st.session_state["custom_vars"] = []  # names of user-created variables
+from pwt.batch import FILE_TYPES, import_definitions, parse_definitions
+from pwt.catalog import session_catalog
+from pwt.data import get_dataset, session_overlay, session_panel
+from pwt.derived import derive
+from pwt.trace import span
 
-base_columns = st.session_state["base_columns"]
-custom_vars = st.session_state["custom_vars"]
+# ---------- Load / share data ----------
+# The base panel is shared by all sessions and must never be mutated here;
+# custom variables are kept in this session's overlay (pwt/overlay.py).
+with span("load"):
+    df_panel = session_panel()
+    overlay = session_overlay()
 
-# labels_dict loaded in Main.py from VariableInfo; fallback to empty if not present
-labels_dict = st.session_state.get("labels_dict", {})
+custom_vars = overlay.names
 
 st.write("### Preview of data")
 st.dataframe(df_panel.head())
@@ -33,15 +22,10 @@ st.dataframe(df_panel.head())
 # ---------- Show numeric columns with labels ----------
 st.write("### Current numeric columns")
 
-numeric_cols = df_panel.select_dtypes(include="number").columns.tolist()
-
-rows = []
-for col in numeric_cols:
-    label = labels_dict.get(col, col)          # use label if available, else name
-    is_custom = "Yes" if col in custom_vars else "No"
-    rows.append({"Variable": col, "Label": label, "Custom?": is_custom})
-
-st.dataframe(pd.DataFrame(rows), hide_index=True)
+# labels, units and descriptions from the variable catalog (pwt/catalog.py)
+catalog = session_catalog()
+numeric_cols = [v.code for v in catalog if v.numeric]
+st.dataframe(catalog.table(numeric_cols), hide_index=True)
 
 
 # ---------- Create custom variable ----------
@@ -57,6 +41,7 @@ with st.expander("Examples of formulas you can use"):
 
     **Growth rates**
     - gdp_growth = `(rgdpna - rgdpna.shift(1)) / rgdpna.shift(1) * 100` (annual growth rate in %)
+    - gdp_growth = `growth(rgdpna)`   (same thing, shorter)
 
     **Moving averages**
     - rgdpo_ma3 = `rgdpo.rolling(3).mean()`   (3-year moving average)
@@ -66,9 +51,16 @@ with st.expander("Examples of formulas you can use"):
     - rgdpo_lead = `pop.shift(-1)`    (lead 1 year)
 
     **Index numbers**
-    - `rgdpo / rgdpo.iloc[0] * 100`
+    - `rgdpo / rgdpo.iloc[0] * 100`   (first year of each country = 100)
+    - `index(rgdpo, 2000)`   (2000 = 100)
 
-    These expressions follow pandas `.eval()` rules.
+    **Functions**
+    - `log(x)`, `log10(x)`, `exp(x)`, `sqrt(x)`, `abs(x)`
+    - `lag(x, n)`, `lead(x, n)`, `diff(x, n)`, `rolling_mean(x, w)`
+
+    Lags, leads, growth rates, moving averages and index numbers are
+    computed **within each country**, so they never mix data from two
+    different countries.
     """)
 
 
@@ -78,46 +70,78 @@ custom_expr = st.text_input("Formula:", value="")
 if st.button("Add variable"):
     if not custom_name.strip():
         st.error("Please enter a variable name.")
+    elif not custom_name.isidentifier():
+        # same rules as file imports (pwt/batch.py): the name must be usable in formulas
+        st.error("Names must be letters, digits and underscores.")
     elif custom_name in df_panel.columns:
         st.error("A column with that name already exists.")
     elif not custom_expr.strip():
         st.error("Please enter a formula.")
     else:
         try:
-            df_panel[custom_name] = df_panel.eval(custom_expr)
-            st.session_state["df_panel"] = df_panel
-
-            if custom_name not in st.session_state["custom_vars"]:
-                st.session_state["custom_vars"].append(custom_name)
+            # shared across sessions: an equivalent formula is computed once
+            values, tree = derive(custom_expr)
+            overlay.add(custom_name, values, get_dataset().panel, tree=tree, source=custom_expr)
+            custom_vars = overlay.names
 
             st.success(f"Variable `{custom_name}` created.")
         except Exception as e:
             st.error(f"Could not create variable: {e}")
 
 
+# ---------- Import several variables from a file ----------
+st.write("### Import variables from a file")
+
+with st.expander("File format"):
+    st.markdown("""
+    Upload a **CSV** with columns `name` and `formula`, a **YAML** file with
+    `name: formula` entries, or a **text** file with one `name = formula` per
+    line. Definitions may use each other in any order, e.g.
+
+    ```
+    gdp_pc = rgdpo / pop
+    gdp_pc_growth = growth(gdp_pc)
+    lab_prod = rgdpo / emp
+    ```
+
+    All formulas are checked and computed together; the table below reports
+    the result of each one.
+    """)
+
+uploaded = st.file_uploader("Definitions file:", type=FILE_TYPES)
+
+if uploaded is not None and st.button("Import variables"):
+    try:
+        definitions = parse_definitions(uploaded.name, uploaded.getvalue())
+    except ValueError as e:
+        st.error(f"Could not read the file: {e}")
+    else:
+        if not definitions:
+            st.warning("The file does not contain any definitions.")
+        else:
+            report, added = import_definitions(definitions)
+            custom_vars = overlay.names
+            if added:
+                st.success(f"Added {len(added)} of {len(definitions)} variables.")
+            if len(added) < len(definitions):
+                st.warning("Some definitions could not be added; see the messages below.")
+            st.dataframe(report, hide_index=True)
+
+
 # ---------- Remove custom variables ----------
 st.write("### Remove custom variables")
 
-if not st.session_state["custom_vars"]:
+if not custom_vars:
     st.info("No custom variables have been created yet.")
 else:
     to_remove = st.multiselect(
         "Select custom variables to remove:",
-        options=st.session_state["custom_vars"],
+        options=custom_vars,
     )
 
     if st.button("Remove selected variables"):
-        removed = []
-        for col in to_remove:
-            if col in df_panel.columns:
-                df_panel.drop(columns=[col], inplace=True)
-                removed.append(col)
-
-        # update shared df and custom_vars list
-        st.session_state["df_panel"] = df_panel
-        st.session_state["custom_vars"] = [
-            c for c in st.session_state["custom_vars"] if c not in removed
-        ]
+        removed = overlay.remove(to_remove)
+        custom_vars = overlay.names
 
         if removed:
             st.success(f"Removed: {', '.join(removed)}")
@@ -125,4 +149,4 @@ else:
             st.warning("No variables were removed.")
 
 st.write("Custom variables currently available:")
-st.write(st.session_state["custom_vars"])
+st.write(custom_vars)
@@ -1,7 +1,12 @@
-import pandas as pd 
-import plotly.express as px # pip install plotly
+import math
+
 import streamlit as st # pip install streamlit
 
+from pwt.data import session_panel
+from pwt.export import download_button
+from pwt.index import get_index
+from pwt.trace import span
+
 
 # ---- PAGE TITLE ----
 st.markdown(
@@ -11,11 +16,10 @@ st.markdown(
 
 
 # ---- READ DATA ----
-df_panel = pd.read_excel(
-    io='gdppaneldata.xlsx',
-    engine='openpyxl',
-    sheet_name='Sheet1'
-)
+# Shared panel (columnar cache, loaded once per process) plus this
+# session's custom variables.
+with span("load"):
+    df_panel = session_panel()
 
 
 # ---- Helper: multiselect with 'All' option ----
@@ -23,7 +27,7 @@ def multiselect_with_all(label, options, key):
     """
     Streamlit multiselect with an 'All' option.
 
-    - If 'All' is selected OR nothing is selected → returns full list.
+    - If 'All' is selected OR nothing is selected → returns None (no filter).
     - Otherwise → returns the selected subset.
     """
     options = list(options)
@@ -37,7 +41,7 @@ def multiselect_with_all(label, options, key):
     )
 
     if "All" in selected or len(selected) == 0:
-        return options
+        return None
     else:
         # remove 'All' if user somehow left it with others
         return [x for x in selected if x != "All"]
@@ -46,29 +50,103 @@ def multiselect_with_all(label, options, key):
 # ---- Sidebar ----
 st.sidebar.header("Please Filter Here:")
 
+# option lists are built once per dataset version (pwt/index.py)
+index = get_index()
+
 country = multiselect_with_all(
     "Select the Country:",
-    options=sorted(df_panel["country"].unique()),
+    options=index.country_options,
     key="country_filter"
 )
 
 region = multiselect_with_all(
     "Select the Region:",
-    options=df_panel["region"].unique(),
+    options=index.region_options,
     key="region_filter"
 )
 
 year = multiselect_with_all(
     "Select the Year:",
-    options=sorted(df_panel["year"].unique()),
+    options=index.year_options,
     key="year_filter"
-)   
+)
 
 # --- Filtering Dataframe based on selections ---
-df_selection = df_panel.query(
-    "country == @country & region == @region & year == @year"
-)
+# Served from the shared panel index; a filter left on 'All' costs nothing.
+with span("filter"):
+    df_selection = index.filter(
+        df_panel, country=country, region=region, year=year
+    )
+
+if df_selection.empty:
+    st.warning("No data for the selected filters.")
+    st.stop()
+
+
+# ---- Table: display options and paging rerun only this part ----
+@st.fragment
+def table(df_selection):
+    # Only the visible page is sent to the browser in paginated mode, so each
+    # interaction ships at most `page_size` rows instead of the whole panel.
+    table_mode = st.sidebar.radio(
+        "Table display:",
+        options=["Paginated", "Full table"],
+        index=0,
+        key="table_mode",
+    )
+
+    n_rows = len(df_selection)
+
+    if table_mode == "Full table":
+        st.caption(f"{n_rows:,} rows")
+        with span("render"):
+            st.dataframe(df_selection, hide_index=True)
+    else:
+        col_size, col_page = st.columns(2)
+        page_size = col_size.selectbox(
+            "Rows per page:",
+            options=[25, 50, 100, 250, 500],
+            index=2,
+            key="page_size",
+        )
+        n_pages = max(1, math.ceil(n_rows / page_size))
+        page = col_page.number_input(
+            f"Page (of {n_pages}):",
+            min_value=1,
+            max_value=n_pages,
+            value=1,
+            step=1,
+            key="page_number",
+        )
+        # number_input keeps its old value if the filters shrink the table
+        page = min(int(page), n_pages)
+
+        start = (page - 1) * page_size
+        stop = min(start + page_size, n_rows)
+        st.caption(f"Rows {start + 1:,}–{stop:,} of {n_rows:,}")
+        with span("render"):
+            st.dataframe(df_selection.iloc[start:stop], hide_index=True)
+
+
+# ---- DOWNLOADS ----
+# Files are written when a button is clicked and cached across sessions;
+# the format pickers rerun only this part.
+@st.fragment
+def downloads(df_selection, df_panel):
+    st.write("### Download")
+    download_button(
+        f"Download selection ({len(df_selection):,} rows)",
+        df_selection,
+        file_stem="pwt_selection",
+        key="selection_download",
+    )
+    download_button(
+        f"Download full panel ({len(df_panel):,} rows, incl. custom variables)",
+        df_panel,
+        file_stem="pwt_full_panel",
+        key="panel_download",
+    )
 
 
-# --- DISPLAY DATAFRAME ---
-st.dataframe(df_selection)
\ No newline at end of file
+table(df_selection)
+downloads(df_selection, df_panel)
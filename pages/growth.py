@@ -0,0 +1,263 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from pwt.figcache import cached_figure
+from pwt.growth import MEASURES, TERMS, get_convergence, get_growth_accounting
+from pwt.index import get_index
+from pwt.trace import span
+from pwt.trend import add_trendlines, ols_fit
+
+
+# ---- PAGE TITLE ----
+st.markdown("## Growth Accounting and Convergence")
+
+# ---- Sidebar ----
+st.sidebar.header("Please Filter Here:")
+
+# option lists are built once per dataset version (pwt/index.py)
+index = get_index()
+
+analysis = st.sidebar.radio(
+    "Analysis:",
+    options=["Growth accounting", "Convergence"],
+    index=0
+)
+
+SOURCE = "SOURCE: Penn World Table, Version 11."
+# term: legend label, for the terms that add up to output growth
+COMPONENTS = {"capital": "Capital", "labour": "Labour", "human capital": "Human capital", "tfp": "TFP"}
+
+
+def build_accounting_figure(table):
+    # bars stack to output growth (the diamond); one group per country
+    x = [table["country"].astype(str).tolist(), table["period"].tolist()]
+    fig = go.Figure()
+    for term, name in COMPONENTS.items():
+        fig.add_trace(go.Bar(x=x, y=table[term], name=name))
+    fig.add_trace(go.Scatter(
+        x=x, y=table["output"], name="GDP growth", mode="markers",
+        marker=dict(symbol="diamond", size=11, color="black"),
+    ))
+    fig.update_layout(
+        template="plotly_white",
+        barmode="relative",
+        margin=dict(t=140),
+        title={
+            "text": "Contributions to GDP growth (% per year)",
+            "x": 0.5,
+            "xanchor": "center",
+            "yanchor": "top",
+        },
+        yaxis_title="% per year",
+        legend=dict(
+            bgcolor="rgba(0,0,0,0)",
+            bordercolor="rgba(0,0,0,0)",
+            orientation='h',
+            x=0.5,
+            xanchor='center',
+            y=1.15
+        )
+    )
+    fig.add_annotation(
+        text=f"{SOURCE} TFP is the residual; PWT's own TFP growth is in the table.",
+        xref="paper", yref="paper",
+        x=0, y=-0.3,
+        showarrow=False,
+    )
+    return fig
+
+
+def build_convergence_figure(points, fit, label, start, end):
+    fig = go.Figure(go.Scatter(
+        x=points["log_start"], y=points["growth"], mode="markers", name="Countries",
+        hovertext=points["country"],
+        hovertemplate="<b>%{hovertext}</b><br>log income: %{x:.2f}<br>growth: %{y:.2f}%<extra></extra>",
+    ))
+    if fit is not None:
+        add_trendlines(fig, {"Countries": fit})
+    fig.update_layout(
+        template="plotly_white",
+        showlegend=False,
+        title={
+            "text": f"Growth {start}-{end} against {start} income",
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        xaxis_title=f"log {label}, {start}",
+        yaxis_title="Average growth (% per year)",
+    )
+    return fig
+
+
+def build_sigma_figure(sigma, label, start, end):
+    fig = px.line(sigma, x="year", y="sigma")
+    fig.add_vrect(x0=start, x1=end, fillcolor="grey", opacity=0.1, line_width=0)
+    fig.update_layout(
+        template="plotly_white",
+        title={
+            "text": "Dispersion across countries (sigma)",
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        xaxis_title=" ",
+        yaxis_title=f"Std. dev. of log {label}",
+    )
+    return fig
+
+
+def build_beta_figure(beta):
+    grid = beta.pivot(index="start", columns="end", values="beta")
+    fig = px.imshow(
+        grid,
+        color_continuous_scale="RdBu",
+        color_continuous_midpoint=0,
+        origin="lower",
+        aspect="auto",
+        labels=dict(x="End year", y="Start year", color="beta"),
+    )
+    fig.update_layout(
+        template="plotly_white",
+        title={
+            "text": "Beta for every start and end year (negative: convergence)",
+            "x": 0.5,
+            "xanchor": "center",
+        },
+    )
+    return fig
+
+
+if analysis == "Growth accounting":
+    st.markdown(
+        "Average annual growth of real GDP split into the contributions of "
+        "physical capital, persons engaged, human capital per worker and total "
+        "factor productivity, each weighted by the labour share as in PWT."
+    )
+
+    country = st.sidebar.multiselect(
+        "Select the Country:",
+        options=index.country_options,
+        default=['Pakistan', 'India', 'Bangladesh']
+    )
+
+    periods = st.sidebar.radio(
+        "Periods:",
+        options=["Year range", "Decades"],
+        index=0
+    )
+
+    if periods == "Year range":
+        start_year, end_year = st.sidebar.select_slider(
+            "Select Year Range:",
+            options=index.year_options,
+            value=(index.year_min, index.year_max)
+        )
+        if start_year == end_year:
+            st.warning("Choose a range of at least two years.")
+            st.stop()
+
+    # annual contributions are computed once for every country (pwt/growth.py)
+    with span("compute"):
+        accounting = get_growth_accounting()
+        if periods == "Year range":
+            table = accounting.periods([start_year], [end_year], country)
+        else:
+            table = accounting.decades(country)
+
+    if table.empty:
+        st.warning("No data available for the selected filters.")
+        st.stop()
+
+    table.insert(
+        table.columns.get_loc("start"), "period",
+        table["start"].astype(str) + "-" + table["end"].astype(str),
+    )
+
+    figure = cached_figure(
+        "growth",
+        dict(country=country, periods=periods,
+             years=(start_year, end_year) if periods == "Year range" else None),
+        lambda: build_accounting_figure(table),
+    )
+    with span("render"):
+        st.plotly_chart(figure)
+        st.dataframe(
+            table.drop(columns=["start", "end"]).round({t: 2 for t in TERMS}),
+            hide_index=True,
+        )
+    st.caption("% per year. A contribution is blank where one of its inputs is missing in some year of the period.")
+
+else:
+    st.markdown(
+        "**Beta convergence**: do countries that start poorer grow faster? The "
+        "slope of average growth on starting log income is negative if so; the "
+        "implied speed is the share of the income gap closed per year. "
+        "**Sigma convergence**: does the spread of log income across countries "
+        "shrink over time?"
+    )
+
+    measure = st.sidebar.selectbox(
+        "Income measure:",
+        options=list(MEASURES),
+        index=0
+    )
+
+    region = st.sidebar.multiselect(
+        "Select the Region:",
+        options=index.region_options,
+        default=[],
+        help="Leave empty for all regions.",
+    )
+
+    start_year, end_year = st.sidebar.select_slider(
+        "Select Year Range:",
+        options=index.year_options,
+        value=(index.year_min, index.year_max)
+    )
+
+    if start_year == end_year:
+        st.warning("Choose a range of at least two years.")
+        st.stop()
+
+    # every start/end pair is estimated at once and shared (pwt/growth.py)
+    with span("compute"):
+        convergence = get_convergence(measure, region or None)
+        result = convergence.regression(start_year, end_year)
+        points = convergence.points(start_year, end_year)
+
+    if result is None:
+        st.warning("Too few countries with data in both years.")
+        st.stop()
+
+    label = measure.split(" (")[0].lower()
+    cols = st.columns(4)
+    cols[0].metric("Beta", f"{result['beta']:.4f}", help=f"Standard error {result['se']:.4f}")
+    cols[1].metric("Speed", f"{result['speed'] * 100:.2f}% a year" if np.isfinite(result["speed"]) else "-")
+    cols[2].metric("R²", f"{result['r2']:.3f}")
+    cols[3].metric("Countries", int(result["n"]))
+
+    params = dict(measure=measure, region=region)
+    years = (start_year, end_year)
+    with span("render"):
+        st.plotly_chart(cached_figure(
+            "convergence",
+            dict(params, years=years),
+            lambda: build_convergence_figure(
+                points,
+                ols_fit(points["log_start"].to_numpy(), points["growth"].to_numpy()),
+                label, start_year, end_year,
+            ),
+        ))
+        st.plotly_chart(cached_figure(
+            "sigma",
+            dict(params, years=years),
+            lambda: build_sigma_figure(convergence.sigma, label, start_year, end_year),
+        ))
+        st.plotly_chart(cached_figure(
+            "beta",
+            params,
+            lambda: build_beta_figure(convergence.beta),
+        ))
+
+    st.caption(f"{SOURCE} Income is {measure}.")
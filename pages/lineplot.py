@@ -3,143 +3,184 @@ import plotly.express as px
 import streamlit as st
 import itertools
 
+from pwt.aggregate import STATS, aggregate_frame, get_aggregates
+from pwt.catalog import session_catalog
+from pwt.cube import get_cube
+from pwt.data import session_overlay, session_panel
+from pwt.export import download_button
+from pwt.figcache import cached_figure, set_axis_types
+from pwt.index import get_index
+from pwt.trace import span
+
 
 # --- LOAD / SHARE DATA ----
-df_panel = st.session_state["df_panel"]
-labels_all = st.session_state.get("labels_dict", {})
+with span("load"):
+    df_panel = session_panel()  # shared base + this session's custom variables
+    catalog = session_catalog()  # labels and metadata, built once per change
 
-# All numeric columns available for X/Y (exclude 'year' so it’s not selectable)
-numeric_cols = [
-    col for col in df_panel.select_dtypes(include="number").columns
-    if col != "year"
-]
+# All numeric variables available for plotting (year excluded), in catalog order
+numeric_cols = list(catalog.numeric)
 
 if not numeric_cols:
     st.error("No numeric variables available for plotting.")
     st.stop()
 
-# Helper: get display label for any column
-def get_label(col: str) -> str:
-    # labels_all comes from VariableInfo sheet (via Main.py)
-    return labels_all.get(col, col)
-
-# Helper: map a chosen label back to the column name
-def get_code_from_label(label: str) -> str:
-    # search only among numeric_cols (the ones in the dropdown)
-    for col in numeric_cols:
-        if get_label(col) == label:
-            return col
-    # fallback: if user somehow selected a raw column name
-    if label in df_panel.columns:
-        return label
-    raise KeyError(f"Label '{label}' not found among numeric columns.")
-
 
-# ---- Sidebar ----
+# ---- Sidebar: data selection (reruns the whole page) ----
 st.sidebar.header("Please Filter Here:")
 
+# option lists are built once per dataset version (pwt/index.py);
+# regions and income groups follow the countries (pwt/aggregate.py)
+index = get_index()
+aggregates = get_aggregates()
+
 country = st.sidebar.multiselect(
     "Select the Country:",
-    options=sorted(df_panel["country"].unique()),
-    default=['Pakistan', 'India', 'Bangladesh']
+    options=index.country_options + aggregates.names,
+    default=['Pakistan', 'India', 'Bangladesh'],
+    help="Regions and income groups, e.g. 'Asia (region)', are aggregates of their countries.",
 )
 
+groups = [c for c in country if c in aggregates]
+if groups:
+    stat_label = st.sidebar.selectbox(
+        "Aggregate statistic:",
+        options=[label for label, stat in STATS.items() if stat in aggregates.stats],
+        index=0,
+    )
+    stat = STATS[stat_label]
+else:
+    stat = None
+
 variable_label = st.sidebar.selectbox(
     "Select Y-axis variable:",
-    options=[get_label(v) for v in numeric_cols],
+    options=catalog.numeric_labels,
     index=0
 )
 
 start_year, end_year = st.sidebar.select_slider(
     "Select Year Range:",
-    options=sorted(df_panel["year"].unique()),
-    value=(df_panel["year"].min(), df_panel["year"].max())
+    options=index.year_options,
+    value=(index.year_min, index.year_max)
 )
 
 # Convert label → actual column name
-variable = get_code_from_label(variable_label)
-label_var = get_label(variable)
+variable = catalog.code(variable_label)
+label_var = catalog.label(variable)
 
 # --- Filtered dataframe ---
-df_selection = df_panel.query(
-    "country in @country & year >= @start_year & year <= @end_year"
-)
+# Sliced from the shared country x year arrays: only the plotted column,
+# plus the precomputed aggregates of any selected groups
+with span("filter"):
+    df_selection = get_cube().frame(
+        df_panel, [variable], country=[c for c in country if c not in aggregates],
+        year_range=(start_year, end_year)
+    )
+    if groups:
+        df_selection = pd.concat([
+            df_selection,
+            aggregate_frame(df_panel, [variable], groups, stat, (start_year, end_year)),
+        ])
 
 if df_selection.empty:
     st.warning("No data available for the selected filters.")
     st.stop()
 
-# ---- Axis scale ----
-yscale = st.sidebar.radio(
-    "Y-axis scale:",
-    options=["Linear", "Log"],
-    index=0
-)
-
-# VISUALISATION: Line Plot
-fig = px.line(
-    df_selection.dropna(subset=[variable]),
-    x="year",
-    y=variable,
-    color="country"
-)
-
-# --- Automatic dash patterns ---
-dash_cycle = itertools.cycle(["solid", "dash", "dot", "dashdot", "longdash"])
-
-for trace in fig.data:
-    trace.line.width = 4
-    trace.line.dash = next(dash_cycle)
-
-fig.update_layout(
-    template="plotly_white",
-    margin=dict(t=140),
-    title={
-        'text': f"{label_var} over time",
-        'x': 0.5,
-        'xanchor': 'center',
-        'yanchor': 'top',
-        #'font': dict(size=28)
-    },
-    xaxis_title=" ",
-    yaxis_title=label_var,
-    legend=dict(
-                bgcolor="rgba(0,0,0,0)",
-                bordercolor="rgba(0,0,0,0)",
-                title='',
-                orientation='h',   # horizontal
-                x=0.5,             # centered horizontally
-                xanchor='center',  # anchor to center
-                y=1.15             # positioned just below the title
-                )
-)
-
-fig.update_layout(
-    yaxis_type="log" if yscale == "Log" else "linear"
-)
-
-fig.add_annotation(
-    text="SOURCE: Penn World Table, Version 11",
-    xref="paper", yref="paper",
-    x=0, y=-0.3,
-    showarrow=False,
-    #font=dict(size=12)
-)
-
-# Show the plot
-st.plotly_chart(fig) #, use_container_width=True)
-
-
-# --- Download filtered data as CSV ---
-df_export = df_selection[["country", "year", variable]].dropna(
-    subset=[variable]
-)
-
-csv_data = df_export.to_csv(index=False).encode("utf-8")
 
-st.download_button(
-    label="Download Plot Data (CSV)",
-    data=csv_data,
-    file_name="pwt_line_data.csv",
-    mime="text/csv",
-)
\ No newline at end of file
+def build_figure(df_selection, variable, label_var):
+    # VISUALISATION: Line Plot
+    fig = px.line(
+        df_selection.dropna(subset=[variable]),
+        x="year",
+        y=variable,
+        color="country"
+    )
+
+    # --- Automatic dash patterns ---
+    dash_cycle = itertools.cycle(["solid", "dash", "dot", "dashdot", "longdash"])
+
+    for trace in fig.data:
+        trace.line.width = 4
+        trace.line.dash = next(dash_cycle)
+
+    fig.update_layout(
+        template="plotly_white",
+        margin=dict(t=140),
+        title={
+            'text': f"{label_var} over time",
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            #'font': dict(size=28)
+        },
+        xaxis_title=" ",
+        yaxis_title=label_var,
+        legend=dict(
+                    bgcolor="rgba(0,0,0,0)",
+                    bordercolor="rgba(0,0,0,0)",
+                    title='',
+                    orientation='h',   # horizontal
+                    x=0.5,             # centered horizontally
+                    xanchor='center',  # anchor to center
+                    y=1.15             # positioned just below the title
+                    )
+    )
+
+    fig.add_annotation(
+        text="SOURCE: Penn World Table, Version 11",
+        xref="paper", yref="paper",
+        x=0, y=-0.3,
+        showarrow=False,
+        #font=dict(size=12)
+    )
+
+    return fig
+
+
+# ---- Chart: display options rerun only this part ----
+@st.fragment
+def chart(df_selection, variable, label_var, country, years, stat):
+    yscale = st.sidebar.radio(
+        "Y-axis scale:",
+        options=["Linear", "Log"],
+        index=0
+    )
+
+    # Show the plot (built once per selection, shared across sessions;
+    # the scale is applied to the cached figure)
+    figure = cached_figure(
+        "lineplot",
+        dict(
+            variable=variable,
+            data=session_overlay().column_key(variable),
+            label=label_var,
+            country=country,
+            years=years,
+            stat=stat,
+        ),
+        lambda: build_figure(df_selection, variable, label_var),
+    )
+    set_axis_types(figure, yscale=yscale)
+    with span("render"):
+        st.plotly_chart(figure) #, use_container_width=True)
+
+
+# ---- Download: the format picker reruns only this part ----
+@st.fragment
+def export(df_selection, variable, identity):
+    # file written only when clicked
+    df_export = df_selection[["country", "year", variable]].dropna(
+        subset=[variable]
+    )
+
+    download_button(
+        "Download Plot Data",
+        df_export,
+        file_stem="pwt_line_data",
+        key="plot_download",
+        identity=identity,
+    )
+
+
+chart(df_selection, variable, label_var, country, (start_year, end_year), stat)
+export(df_selection, variable, (stat, tuple(groups)))
@@ -0,0 +1,105 @@
+import streamlit as st
+
+from pwt.aggregate import get_aggregates
+from pwt.animate import get_frame_cache
+from pwt.correlate import get_correlation_cache
+from pwt.cube import get_cube
+from pwt.data import get_dataset, session_overlay
+from pwt.derived import get_derived_cache
+from pwt.export import get_export_cache
+from pwt.figcache import get_figure_cache
+from pwt.reload import start_reloader
+from pwt.schema import (
+    FLOAT32,
+    FLOAT32_RTOL,
+    apply_schema,
+    default_layout,
+    float32_error,
+    memory_report,
+)
+
+
+# ---- PAGE TITLE ----
+st.markdown("## Memory Usage")
+
+st.markdown("""
+Bytes per column of the shared panel: the layout a plain `read_excel` gives
+(object strings, int64, float64) against the compact layout the app keeps in
+memory (categorical identifiers, int16 year, float32 indicators when
+`PWT_FLOAT32=1`). The panel is held once per server, not once per session.
+""")
+
+dataset = get_dataset()
+panel = dataset.panel
+
+# ---- Current layout ----
+st.write("### Loaded panel")
+st.caption(f"Dataset version {dataset.version} · float32 indicators: {'on' if FLOAT32 else 'off'}")
+st.dataframe(memory_report(default_layout(panel), panel), hide_index=True)
+
+# ---- What float32 would do ----
+st.write("### With float32 indicators")
+st.dataframe(
+    memory_report(default_layout(panel), apply_schema(panel, float32=True)),
+    hide_index=True,
+)
+
+max_err = float32_error(panel)
+st.write(
+    f"Largest relative rounding error from float32 on this data: **{max_err:.2e}** "
+    f"(bound {FLOAT32_RTOL:.2e})."
+)
+
+# ---- Country x year arrays ----
+cube = get_cube()
+st.write(
+    f"Country × year arrays: {len(cube.names)} indicators on a "
+    f"{len(cube.countries)} × {len(cube.years)} grid, {cube.nbytes:,} bytes beyond the panel."
+)
+aggregates = get_aggregates()
+st.write(
+    f"Group aggregates: {len(aggregates.names)} regions and income groups × "
+    f"{len(aggregates.stats)} statistics, {aggregates.nbytes:,} bytes."
+)
+
+# ---- This session ----
+st.write("### This session")
+overlay = session_overlay()
+st.write(f"{len(overlay)} custom variable(s), {overlay.nbytes:,} bytes.")
+
+# ---- Shared derived variables ----
+st.write("### Derived-variable cache")
+st.caption("Custom variables shared between sessions, keyed by normalized formula.")
+st.dataframe([get_derived_cache().stats()], hide_index=True)
+
+# ---- Shared figures ----
+st.write("### Figure cache")
+st.caption("Built plot figures shared between sessions, keyed by page, dataset version and parameters.")
+figures = get_figure_cache()
+st.dataframe([figures.stats()], hide_index=True)
+st.dataframe(figures.page_stats(), hide_index=True)
+
+# ---- Shared animation frames ----
+st.write("### Animation frame cache")
+st.caption("Variable pairs laid out for the animated scatter plot, keyed by dataset version and the two columns.")
+st.dataframe([get_frame_cache().stats()], hide_index=True)
+
+# ---- Shared correlation matrices ----
+st.write("### Correlation cache")
+st.caption("Correlation matrices, keyed by dataset version, variables, method, demeaning and filter.")
+st.dataframe([get_correlation_cache().stats()], hide_index=True)
+
+# ---- Shared download files ----
+st.write("### Export cache")
+st.caption("Download files written on click, keyed by dataset version, rows, columns and format.")
+st.dataframe([get_export_cache().stats()], hide_index=True)
+
+# ---- Dataset reloads ----
+st.write("### Dataset reloads")
+reloader = start_reloader()
+st.caption(
+    f"Watching {reloader.store.path.name} every {reloader.interval:g} s: {reloader.status}."
+    if reloader.interval > 0 else "Watching is off (PWT_RELOAD_INTERVAL=0)."
+)
+if reloader.history:
+    st.dataframe(list(reloader.history), hide_index=True)
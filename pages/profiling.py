@@ -0,0 +1,69 @@
+import pandas as pd
+import streamlit as st
+
+from pwt.trace import PROFILERS, current_page, get_tracer, page_titles
+
+
+# ---- PAGE TITLE ----
+st.markdown("## Profiling")
+
+st.markdown("""
+Time spent per page and stage, over every session of this server process
+since it started (or since the last reset). Stages: `load` (shared panel,
+custom variables, catalog), `filter`, `compute` (custom variables,
+aggregation), `figure` (cached figure lookup; `figure build` on a miss),
+`render` (sending the chart or table to the browser), `export` and
+`export build` (download files), and `rerun` for the whole page.
+""")
+
+tracer = get_tracer()
+summary = pd.DataFrame(tracer.summary())
+
+# ---- Stage timings ----
+st.write("### Stage timings")
+if summary.empty:
+    st.info("Nothing recorded yet: open some pages first.")
+else:
+    st.dataframe(summary.round(2), hide_index=True)
+
+    # ---- Histogram of one stage ----
+    st.write("### Histogram")
+    col_page, col_stage = st.columns(2)
+    page = col_page.selectbox("Page:", options=sorted(summary["page"].unique()))
+    stage = col_stage.selectbox(
+        "Stage:", options=summary.loc[summary["page"] == page, "stage"].tolist()
+    )
+    buckets = pd.DataFrame(tracer.histogram(page, stage).buckets(), columns=["bucket", "count"])
+    st.bar_chart(buckets, x="bucket", y="count", sort=False)
+
+if st.button("Reset timings"):
+    tracer.reset()
+    st.rerun()
+
+
+# ---- Profile one rerun ----
+st.write("### Profile a rerun")
+st.caption(
+    "The next rerun of the chosen page, in any session, runs under the "
+    "profiler. Open the page in another tab and interact with it, then "
+    "come back here."
+)
+
+col_target, col_engine = st.columns(2)
+target = col_target.selectbox(
+    "Page to profile:",
+    # every page registered in Main.py, except this one
+    options=[title for title in page_titles() if title != current_page()],
+)
+engine = col_engine.radio("Profiler:", options=PROFILERS, horizontal=True)
+
+if st.button("Profile next rerun"):
+    tracer.request_profile(target, engine)
+
+pending = tracer.pending_profiles()
+if pending:
+    st.caption("Waiting for: " + ", ".join(f"{p} ({e})" for p, e in pending.items()))
+
+for profile in tracer.profiles:
+    with st.expander(f"{profile['time']} · {profile['page']} · {profile['engine']} · {profile['ms']:.0f} ms"):
+        st.code(profile["report"], language=None)
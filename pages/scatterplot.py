@@ -1,42 +1,37 @@
-import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+from pwt.animate import animation_figure, pair_frames, set_animation_scales
+from pwt.catalog import session_catalog
+from pwt.cube import get_cube
+from pwt.data import get_dataset, session_overlay, session_panel
+from pwt.export import download_button
+from pwt.figcache import cached_figure, set_axis_types
+from pwt.index import get_index
+from pwt.scatter import POINT_MODES, binned_density, decade_means, render_mode
+from pwt.trace import span
+from pwt.trend import TRENDLINES, add_trendlines, fit_trendlines
+
 
 # --- LOAD / SHARE DATA ----
-df_panel = st.session_state["df_panel"]
-labels_all = st.session_state.get("labels_dict", {})
+with span("load"):
+    df_panel = session_panel()  # shared base + this session's custom variables
+    catalog = session_catalog()  # labels and metadata, built once per change
 
-# All numeric columns available for X/Y (exclude 'year' so it’s not selectable)
-numeric_cols = [
-    col for col in df_panel.select_dtypes(include="number").columns
-    if col != "year"
-]
+# All numeric variables available for plotting (year excluded), in catalog order
+numeric_cols = list(catalog.numeric)
 
 if not numeric_cols:
     st.error("No numeric variables available for plotting.")
     st.stop()
 
-# Helper: get display label for any column
-def get_label(col: str) -> str:
-    # labels_all comes from VariableInfo sheet (via Main.py)
-    return labels_all.get(col, col)
-
-# Helper: map a chosen label back to the column name
-def get_code_from_label(label: str) -> str:
-    # search only among numeric_cols (the ones in the dropdown)
-    for col in numeric_cols:
-        if get_label(col) == label:
-            return col
-    # fallback: if user somehow selected a raw column name
-    if label in df_panel.columns:
-        return label
-    raise KeyError(f"Label '{label}' not found among numeric columns.")
-
 
-# ---- Sidebar ----
+# ---- Sidebar: data selection (reruns the whole page) ----
 st.sidebar.header("Please Filter Here:")
 
+# option lists are built once per dataset version (pwt/index.py)
+index = get_index()
+
 
 def multiselect_with_all(label, options, key, default="All"):
     """
@@ -67,14 +62,14 @@ def multiselect_with_all(label, options, key, default="All"):
 
 country = multiselect_with_all(
     "Select the Country:",
-    options=sorted(df_panel["country"].unique()),
+    options=index.country_options,
     key="country_filter",
     default=["All"]
 )
 
 region = multiselect_with_all(
     "Select the Region:",
-    options=df_panel["region"].unique(),
+    options=index.region_options,
     key="region_filter",
     default=["All"]
 )
@@ -93,138 +88,288 @@ elif len(numeric_cols) > 1:
 else:
     default_y_index = 0
 
+# ...or to the pair last opened from the Correlations page
+pair = st.session_state.get("scatter_pair")
+if pair is not None and all(v in numeric_cols for v in pair):
+    default_x_index, default_y_index = (numeric_cols.index(v) for v in pair)
+
 variablex_label = st.sidebar.selectbox(
     "Select X-axis variable:",
-    options=[get_label(v) for v in numeric_cols],
+    options=catalog.numeric_labels,
     index=default_x_index,
 )
 
 variabley_label = st.sidebar.selectbox(
     "Select Y-axis variable:",
-    options=[get_label(v) for v in numeric_cols],
+    options=catalog.numeric_labels,
     index=default_y_index,
 )
 
-latest_year = df_panel["year"].max()
-year = multiselect_with_all(
-    "Select the Year:",
-    options=sorted(df_panel["year"].unique()),
-    key="year_filter",
-    default=[latest_year]
+# Animation plays every year of a range in the browser (pwt/animate.py):
+# moving through the years does not rerun the page
+view = st.sidebar.radio(
+    "Show:",
+    options=["Selected years", "Animation over years"],
+    index=0
 )
+animate = view == "Animation over years"
 
-# Convert labels → actual variable names
-variablex = get_code_from_label(variablex_label)
-variabley = get_code_from_label(variabley_label)
+if animate:
+    start_year, end_year = st.sidebar.select_slider(
+        "Select Year Range:",
+        options=index.year_options,
+        value=(index.year_min, index.year_max)
+    )
+    year = None
+else:
+    year = multiselect_with_all(
+        "Select the Year:",
+        options=index.year_options,
+        key="year_filter",
+        default=[index.year_max]
+    )
 
-label_x = get_label(variablex)
-label_y = get_label(variabley)
+# Convert labels → actual variable names (O(1) catalog lookups)
+variablex = catalog.code(variablex_label)
+variabley = catalog.code(variabley_label)
+
+label_x = catalog.label(variablex)
+label_y = catalog.label(variabley)
 
 # --- Filtered DataFrame ---
-df_selection = df_panel.query(
-    "country in @country & region in @region & year in @year"
-)
+# Sliced from the shared country x year arrays (a single year is one column
+# of each array): only the plotted columns and population for bubble sizes
+plot_cols = [variablex, variabley] + (["pop"] if "pop" in df_panel.columns else [])
+with span("filter"):
+    df_selection = get_cube().frame(
+        df_panel, plot_cols, country=country, region=region, year=year,
+        year_range=(start_year, end_year) if animate else None,
+    )
 
 if df_selection.empty:
     st.warning("No data for the selected filters.")
     st.stop()
 
-# ---- Trendline option ----
-trend_option = st.sidebar.selectbox(
-    "Add trendline:",
-    options=[
-        "None",
-        "Linear (OLS)",
-        "LOWESS (Smooth)",
-    ],
-    index=0
-)
 
-trendline_map = {
-    "None": None,
-    "Linear (OLS)": "ols",
-    "LOWESS (Smooth)": "lowess",
-}
+def build_figure(df_points, variablex, variabley, label_x, label_y, color_col, size_col,
+                 hover_col, note, trendline_setting, trend_key):
+    # ---- SCATTER PLOT ----
+    fig = px.scatter(
+        df_points,
+        x=variablex,
+        y=variabley,
+        color=color_col,
+        size=size_col,
+        hover_name=hover_col,
+        size_max=40,
+        # WebGL above a point threshold: far cheaper than SVG in the browser
+        render_mode=render_mode(len(df_points)),
+    )
 
-trendline_setting = trendline_map[trend_option]
+    # ---- Trendlines (fitted once per selection, cached) ----
+    if trendline_setting is not None:
+        groups = {
+            name: (g[variablex].to_numpy(), g[variabley].to_numpy())
+            for name, g in df_points.groupby(color_col, observed=True, sort=False)
+        }
+        add_trendlines(fig, fit_trendlines(trendline_setting, trend_key, groups))
+
+    return style_figure(fig, label_x, label_y, note)
+
+
+def style_figure(fig, label_x, label_y, note, source_y=-0.3):
+    fig.update_layout(
+        template="plotly_white",
+        margin=dict(t=140),
+        title={
+            "text": f"{label_y} and {label_x}",
+            "x": 0.55,
+            "xanchor": "center",
+            "yanchor": "top",
+            #"font": {"size": 28},
+        },
+        xaxis_title=label_x,
+        yaxis_title=label_y,
+        legend=dict(title='',
+                    bgcolor="rgba(0,0,0,0)",
+                    bordercolor="rgba(0,0,0,0)",
+                    orientation='h',   # horizontal
+                    x=0.5,             # centered horizontally
+                    xanchor='center',  # anchor to center
+                    y=1.15             # positioned just below the title
+                    )
+    )
 
-# ---- Axis scales ----
-xscale = st.sidebar.radio(
-    "X-axis scale:",
-    options=["Linear", "Log"],
-    index=0
-)
+    fig.add_annotation(
+        text=f"SOURCE: Penn World Table, Version 11. {note}",
+        xref="paper",
+        yref="paper",
+        x=0,
+        y=source_y,
+        showarrow=False,
+        #font=dict(size=12),
+    )
 
-yscale = st.sidebar.radio(
-    "Y-axis scale:",
-    options=["Linear", "Log"],
-    index=0
-)
+    return fig
 
-# ---- SCATTER PLOT ----
-fig = px.scatter(
-    df_selection.dropna(subset=[variablex, variabley]),
-    x=variablex,
-    y=variabley,
-    color="region",
-    size="pop" if "pop" in df_selection.columns else None,
-    hover_name="country",
-    trendline=trendline_setting,
-    size_max=40,
-)
 
-fig.update_layout(
-    template="plotly_white",
-    margin=dict(t=140),
-    title={
-        "text": f"{label_y} and {label_x}",
-        "x": 0.55,
-        "xanchor": "center",
-        "yanchor": "top",
-        #"font": {"size": 28},
-    },
-    xaxis_title=label_x,
-    yaxis_title=label_y,
-    legend=dict(title='',
-                bgcolor="rgba(0,0,0,0)",
-                bordercolor="rgba(0,0,0,0)",
-                orientation='h',   # horizontal
-                x=0.5,             # centered horizontally
-                xanchor='center',  # anchor to center
-                y=1.15             # positioned just below the title
-                )
-)
+# ---- Chart: display options rerun only this part ----
+@st.fragment
+def chart(df_selection, variablex, variabley, label_x, label_y, country, region, year):
+    # ---- Trendline option ----
+    trend_option = st.sidebar.selectbox(
+        "Add trendline:",
+        options=list(TRENDLINES),
+        index=0
+    )
 
-# Apply axis scaling
-fig.update_layout(
-    xaxis_type="log" if xscale == "Log" else "linear",
-    yaxis_type="log" if yscale == "Log" else "linear",
-)
+    trendline_setting = TRENDLINES[trend_option]
 
-fig.add_annotation(
-    text="SOURCE: Penn World Table, Version 11. The size of the bubbles represents the population of the country.",
-    xref="paper",
-    yref="paper",
-    x=0,
-    y=-0.3,
-    showarrow=False,
-    #font=dict(size=12),
-)
+    # ---- Axis scales ----
+    xscale = st.sidebar.radio(
+        "X-axis scale:",
+        options=["Linear", "Log"],
+        index=0
+    )
 
-# Show the plot
-st.plotly_chart(fig) #, use_container_width=True)
+    yscale = st.sidebar.radio(
+        "Y-axis scale:",
+        options=["Linear", "Log"],
+        index=0
+    )
 
+    # ---- Point display (server-side aggregation for large selections) ----
+    point_mode = st.sidebar.selectbox(
+        "Points to show:",
+        options=POINT_MODES,
+        index=0
+    )
 
-# --- Download filtered data as CSV ---
-df_export = df_selection[["country", "region", "year", variablex, variabley]].dropna(
-    subset=[variablex, variabley]
-)
+    df_points = df_selection.dropna(subset=[variablex, variabley])
+    size_col = "pop" if "pop" in df_selection.columns else None
+    color_col = "region"
+    hover_col = "country"
+    note = "The size of the bubbles represents the population of the country."
+    # scales are applied to the cached figure, except where they change the data
+    binned_scales = None
+
+    if point_mode == "Country-decade means":
+        with span("compute"):
+            df_points = decade_means(df_points, variablex, variabley, size_col)
+        note = "Each bubble is a country's average over a decade; size represents population."
+    elif point_mode == "Binned density":
+        with span("compute"):
+            df_points = binned_density(
+                df_points, variablex, variabley,
+                xlog=xscale == "Log", ylog=yscale == "Log",
+            )
+        size_col = color_col = "count"
+        hover_col = None
+        binned_scales = (xscale, yscale)
+        note = "Each bubble is a bin of the plane; size and colour show how many observations fall in it."
+        if trendline_setting is not None:
+            st.sidebar.caption("Trendlines are not drawn on the binned density view.")
+            trendline_setting = None
+
+    overlay = session_overlay()
+    # selections are order-insensitive, as in cached_figure's key (repr
+    # order: the region options include a missing value)
+    trend_key = (
+        get_dataset().version,
+        *(tuple(sorted(s, key=repr)) for s in (country, region, year)),
+        overlay.column_key(variablex), overlay.column_key(variabley),
+        point_mode,
+    )
+
+    # Show the plot (built once per parameter set, shared across sessions)
+    figure = cached_figure(
+        "scatterplot",
+        dict(
+            x=variablex,
+            y=variabley,
+            data=(overlay.column_key(variablex), overlay.column_key(variabley)),
+            labels=(label_x, label_y),
+            country=country,
+            region=region,
+            year=year,
+            scales=binned_scales,
+            points=point_mode,
+            trendline=trendline_setting,
+        ),
+        lambda: build_figure(
+            df_points, variablex, variabley, label_x, label_y, color_col, size_col,
+            hover_col, note, trendline_setting, trend_key,
+        ),
+    )
+    set_axis_types(figure, xscale=xscale, yscale=yscale)
+    with span("render"):
+        st.plotly_chart(figure) #, use_container_width=True)
+
+
+def build_animation(df_panel, variablex, variabley, label_x, label_y, country, region, years):
+    # frames of the variable pair are laid out once and shared (pwt/animate.py)
+    with span("compute"):
+        frames = pair_frames(df_panel, variablex, variabley)
+    fig = animation_figure(frames, country, region, years, label_x, label_y)
+    fig.update_layout(margin=dict(b=160))
+    note = "The size of the bubbles represents the population of the country. Press ▶ or drag the slider to move through the years."
+    return style_figure(fig, label_x, label_y, note, source_y=-0.5)
+
+
+# ---- Animation: scales rerun only this part; playing never reruns ----
+@st.fragment
+def animation(df_panel, variablex, variabley, label_x, label_y, country, region, years):
+    xscale = st.sidebar.radio(
+        "X-axis scale:",
+        options=["Linear", "Log"],
+        index=0
+    )
+
+    yscale = st.sidebar.radio(
+        "Y-axis scale:",
+        options=["Linear", "Log"],
+        index=0
+    )
+
+    overlay = session_overlay()
+    figure = cached_figure(
+        "scatteranimation",
+        dict(
+            x=variablex,
+            y=variabley,
+            data=(overlay.column_key(variablex), overlay.column_key(variabley)),
+            labels=(label_x, label_y),
+            country=country,
+            region=region,
+            years=years,
+        ),
+        lambda: build_animation(
+            df_panel, variablex, variabley, label_x, label_y, country, region, years,
+        ),
+    )
+    set_animation_scales(figure, xscale, yscale)
+    with span("render"):
+        st.plotly_chart(figure)
 
-csv_data = df_export.to_csv(index=False).encode("utf-8")
 
-st.download_button(
-    label="Download Plot Data (CSV)",
-    data=csv_data,
-    file_name="pwt_scatter_data.csv",
-    mime="text/csv",
-)
\ No newline at end of file
+# ---- Download: the format picker reruns only this part ----
+@st.fragment
+def export(df_selection, variablex, variabley):
+    # file written only when clicked
+    df_export = df_selection[["country", "region", "year", variablex, variabley]].dropna(
+        subset=[variablex, variabley]
+    )
+
+    download_button(
+        "Download Plot Data",
+        df_export,
+        file_stem="pwt_scatter_data",
+        key="plot_download",
+    )
+
+
+if animate:
+    animation(df_panel, variablex, variabley, label_x, label_y, country, region, (start_year, end_year))
+else:
+    chart(df_selection, variablex, variabley, label_x, label_y, country, region, year)
+export(df_selection, variablex, variabley)
@@ -0,0 +1,175 @@
+"""
+Regional and income-group aggregates, selectable as pseudo-countries.
+
+For every indicator and year, `Aggregates` holds four statistics over the
+countries of each region and each income group:
+
+- the population-weighted and GDP-weighted mean (countries missing the
+  value or the weight that year are left out),
+- the median across countries,
+- the total (meaningful for extensive variables such as pop or rgdpo).
+
+All base indicators are aggregated in one vectorized pass over the cube's
+countries x years arrays (a group-membership matrix times the stacked
+arrays), once per dataset version. A custom variable is aggregated the
+first time it is asked for and kept by formula, so adding one never
+recomputes the base.
+
+The line and connected-scatter pages list the groups next to the
+countries, named like "Asia (region)" or "HIC (income group)".
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from pwt.cube import PanelCube, get_cube
+from pwt.data import Dataset, session_overlay, versioned
+from pwt.lru import ByteLRU
+
+# label: statistic
+STATS = {
+    "Mean (population-weighted)": "pop_mean",
+    "Mean (GDP-weighted)": "gdp_mean",
+    "Median": "median",
+    "Total": "total",
+}
+
+# weighted statistic: weight column
+WEIGHTS = {"pop_mean": "pop", "gdp_mean": "rgdpo"}
+
+# identifier column: suffix of its pseudo-countries
+GROUPINGS = {"region": "region", "incgroup": "income group"}
+
+# Byte budget for aggregates of custom variables.
+CUSTOM_MAX_BYTES = 16 * 2**20
+
+
+def aggregate(values: np.ndarray, members: np.ndarray, weights: dict) -> dict:
+    """
+    Group statistics of stacked countries x years arrays.
+
+    `values` is (variables, countries, years) with NaN for missing cells,
+    `members` a (groups, countries) boolean matrix and `weights`
+    {stat: countries x years array}. Returns {stat: (variables, groups,
+    years) array}, NaN where a group has no observation.
+    """
+    # (groups, countries) @ (variables, countries, years) -> (variables, groups, years)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    groups = members.astype(np.float64)
+
+    count = groups @ valid.astype(np.float64)
+    total = groups @ filled
+    total[count == 0] = np.nan
+    out = {"total": total}
+
+    for stat, weight in weights.items():
+        weight = np.where(np.isnan(weight) | (weight < 0), 0.0, weight)
+        used = np.where(valid, weight, 0.0)
+        num = groups @ (filled * used)
+        den = groups @ used
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[stat] = np.where(den > 0, num / den, np.nan)
+
+    median = np.full(total.shape, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN group-years
+        for g, member in enumerate(members):
+            if member.any():
+                median[:, g] = np.nanmedian(values[:, member], axis=1)
+    out["median"] = median
+    return out
+
+
+class Aggregates:
+    """Statistics of every cube indicator by region x year and income group x year."""
+
+    def __init__(self, cube: PanelCube):
+        self.years = cube.years
+        self.names = []                # pseudo-country names
+        rows = []
+        for column, suffix in GROUPINGS.items():
+            try:
+                attribute = np.asarray(cube.attribute(column), dtype=object)
+            except KeyError:
+                continue
+            for group in sorted({g for g in attribute if isinstance(g, str)}):
+                self.names.append(f"{group} ({suffix})")
+                rows.append(attribute == group)
+        self.members = np.array(rows, dtype=bool).reshape(len(rows), len(cube.countries))
+        self._group = {name: g for g, name in enumerate(self.names)}
+
+        self._weights = {stat: cube.grid(col) for stat, col in WEIGHTS.items() if col in cube}
+        self.stats = ["total", "median", *self._weights]
+
+        self.columns = {name: v for v, name in enumerate(cube.names)}  # base column: position
+        stacked = np.stack([cube.grid(n) for n in cube.names]).astype(np.float64, copy=False)
+        self._base = aggregate(stacked, self.members, self._weights)
+        self._custom = ByteLRU(
+            CUSTOM_MAX_BYTES, sizeof=lambda d: sum(a.nbytes for a in d.values())
+        )
+
+    def __contains__(self, name) -> bool:
+        return name in self._group
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._base.values())
+
+    def custom(self, key, grid: np.ndarray) -> dict:
+        """Statistics of a custom column (countries x years `grid`), cached by `key`."""
+        result = self._custom.get(key)
+        if result is None:
+            result = self._custom.put(
+                key, aggregate(np.asarray(grid, dtype=np.float64)[None], self.members, self._weights)
+            )
+        return result
+
+    def values(self, stat: str, column: str, groups: list, custom: dict = None) -> np.ndarray:
+        """(groups, years) array of `stat` for `column` (`custom` if not a base column)."""
+        rows = [self._group[g] for g in groups]
+        if column in self.columns:
+            return self._base[stat][self.columns[column], rows]
+        return custom[stat][0, rows]
+
+    def frame(self, columns: list, groups: list, stat: str, year_range=None, custom: dict = None) -> pd.DataFrame:
+        """
+        Long rows (country, year, `columns`) for the pseudo-countries in
+        `groups`, shaped like `PanelCube.frame`. Rows with no value in any
+        column are left out; the index is negative so it never collides
+        with panel row labels.
+        """
+        cols = np.arange(len(self.years))
+        if year_range is not None:
+            cols = cols[(self.years >= year_range[0]) & (self.years <= year_range[1])]
+        n = len(groups) * len(cols)
+        data = {
+            "country": np.repeat(np.asarray(groups, dtype=object), len(cols)),
+            "year": np.tile(self.years[cols], len(groups)),
+        }
+        for column in dict.fromkeys(columns):
+            data[column] = self.values(stat, column, groups, (custom or {}).get(column))[:, cols].reshape(n)
+        out = pd.DataFrame(data, index=pd.RangeIndex(-1, -n - 1, -1))
+        return out[out[list(dict.fromkeys(columns))].notna().any(axis=1)]
+
+
+@versioned
+def get_aggregates(dataset: Dataset) -> Aggregates:
+    """The shared aggregates for `dataset` (default: the current version)."""
+    return Aggregates(get_cube(dataset))
+
+
+def aggregate_frame(panel: pd.DataFrame, columns: list, groups: list, stat: str, year_range=None) -> pd.DataFrame:
+    """
+    `Aggregates.frame` for this session: custom variables among `columns`
+    are taken from `panel` (the session's view) and aggregated on first use.
+    """
+    aggregates = get_aggregates()
+    overlay = session_overlay()
+    custom = {}
+    for column in columns:
+        if column not in aggregates.columns:
+            grid = get_cube().column_grid(panel, column)
+            custom[column] = aggregates.custom(overlay.column_key(column), grid)
+    return aggregates.frame(columns, groups, stat, year_range, custom)
@@ -0,0 +1,199 @@
+"""
+Year-by-year animation of the scatter plot (Gapminder style).
+
+Stepping through years with the scatter page's year filter costs a full
+rerun per year. In animation mode the page instead sends one figure that
+holds a Plotly frame per year, and the browser plays and scrubs through
+them without going back to the server.
+
+`pair_frames` lays out an x/y pair (plus population for bubble sizes) once
+per dataset version: the cube's countries x years arrays as float32, with
+countries grouped by region so each region's bubbles are a fixed set of
+rows. It is cached by variable pair in a byte-bounded LRU, so changing the
+country, region or year filter - in any session - only slices it.
+`animation_figure` builds the figure from those slices: each frame carries
+just x, y and bubble sizes (serialized as typed arrays), and the axis
+ranges span all frames so the bubbles move against fixed axes.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from pwt.cube import get_cube
+from pwt.data import get_dataset, session_overlay
+from pwt.figcache import set_axis_types
+from pwt.lru import ByteLRU
+
+MAX_BYTES = int(float(os.environ.get("PWT_FRAME_CACHE_MB", "32")) * 2**20)
+
+# Largest bubble diameter in pixels (as px.scatter's size_max).
+SIZE_MAX = 40
+
+# Milliseconds per year when playing.
+FRAME_MS = 300
+
+
+class PairFrames:
+    """An x/y pair (and bubble sizes) as countries x years float32 arrays, countries by region."""
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, size, countries, regions, years):
+        regions = pd.Series(regions, dtype=object)
+        # regions in order of first appearance, like px.scatter's colour
+        # groups; countries without a region are left out, as px does
+        self.regions = list(pd.unique(regions.dropna()))
+        members = [np.flatnonzero(regions.to_numpy() == r) for r in self.regions]
+        order = np.concatenate(members) if members else np.empty(0, np.intp)
+        bounds = np.cumsum([0] + [len(m) for m in members])
+        self.slices = {r: slice(bounds[i], bounds[i + 1]) for i, r in enumerate(self.regions)}
+
+        self.countries = np.asarray(countries, dtype=object)[order]
+        self.years = np.asarray(years)
+        self.x = np.asarray(x, dtype=np.float32)[order]
+        self.y = np.asarray(y, dtype=np.float32)[order]
+        self.size = None if size is None else np.asarray(size, dtype=np.float32)[order]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.x, self.y, self.size) if a is not None)
+
+
+@st.cache_resource
+def get_frame_cache() -> ByteLRU:
+    """Frames by (dataset version, x, y), shared by every session of this server process."""
+    return ByteLRU(MAX_BYTES, sizeof=lambda frames: frames.nbytes)
+
+
+def pair_frames(panel: pd.DataFrame, x: str, y: str) -> PairFrames:
+    """
+    The frames of columns `x` and `y` of `panel` (this session's view), built
+    on first use and cached by dataset version and the pair's data (custom
+    variables by formula).
+    """
+    overlay = session_overlay()
+    key = (get_dataset().version, overlay.column_key(x), overlay.column_key(y))
+    cache = get_frame_cache()
+    frames = cache.get(key)
+    if frames is None:
+        t0 = time.perf_counter()
+        cube = get_cube()
+        frames = PairFrames(
+            cube.column_grid(panel, x), cube.column_grid(panel, y),
+            cube.grid("pop") if "pop" in cube else None,
+            cube.countries, cube.attribute("region"), cube.years,
+        )
+        frames = cache.put(key, frames, time.perf_counter() - t0)
+    return frames
+
+
+def _range(values: np.ndarray, log: bool):
+    """Padded [min, max] of the finite values (in log10 units on log axes)."""
+    values = values[np.isfinite(values)]
+    if log:
+        values = np.log10(values[values > 0])
+    if values.size == 0:
+        return None
+    lo, hi = float(values.min()), float(values.max())
+    pad = (hi - lo) * 0.05 or (0.1 if log else abs(lo) * 0.05 or 1.0)
+    return [lo - pad, hi + pad]
+
+
+def animation_figure(frames: PairFrames, country, region, year_range, label_x: str, label_y: str) -> go.Figure:
+    """
+    Scatter with one frame per year of `year_range` (which must hold at
+    least one year), a year slider and play/pause buttons, for the
+    countries in both `country` and `region`.
+
+    Axis ranges for both linear and log scales are kept in layout.meta;
+    apply the page's scales with `set_animation_scales`.
+    """
+    cols = np.flatnonzero((frames.years >= year_range[0]) & (frames.years <= year_range[1]))
+    wanted = set(country)
+    groups = {}
+    for r in frames.regions:
+        if r not in region:
+            continue
+        rows = np.arange(len(frames.countries))[frames.slices[r]]
+        rows = rows[[c in wanted for c in frames.countries[rows]]]
+        if rows.size:
+            groups[r] = rows
+
+    rows = np.concatenate(list(groups.values())) if groups else np.empty(0, np.intp)
+    x, y = frames.x[np.ix_(rows, cols)], frames.y[np.ix_(rows, cols)]
+
+    if frames.size is not None:
+        size = np.nan_to_num(frames.size[np.ix_(rows, cols)], nan=0.0)
+        # area-proportional bubbles, scaled over all frames
+        sizeref = 2.0 * max(float(size.max(initial=0.0)), 1.0) / SIZE_MAX**2
+    else:
+        size = None
+
+    bounds = np.cumsum([0] + [len(members) for members in groups.values()])
+    parts = [slice(bounds[i], bounds[i + 1]) for i in range(len(groups))]
+
+    def trace_data(c: int) -> list:
+        # plain dicts: frames are validated once, with the figure
+        out = []
+        for part in parts:
+            data = dict(type="scatter", x=x[part, c], y=y[part, c])
+            if size is not None:
+                data["marker"] = dict(size=size[part, c])
+            out.append(data)
+        return out
+
+    traces = []
+    for (r, members), data in zip(groups.items(), trace_data(0)):
+        names = frames.countries[members]
+        marker = dict(data["marker"], sizemode="area", sizeref=sizeref, sizemin=2) \
+            if size is not None else dict(size=10)
+        traces.append(dict(
+            data, marker=marker, mode="markers", name=r, ids=names, hovertext=names,
+            hovertemplate=f"<b>%{{hovertext}}</b><br>{label_x}: %{{x}}<br>{label_y}: %{{y}}<extra>{r}</extra>",
+        ))
+
+    years = [str(int(frames.years[c])) for c in cols]
+    fig = go.Figure(
+        data=traces,
+        frames=[go.Frame(name=year, data=trace_data(c)) for year, c in zip(years, cols)],
+    )
+
+    play = dict(frame=dict(duration=FRAME_MS, redraw=False), fromcurrent=True,
+                transition=dict(duration=FRAME_MS * 0.8, easing="linear"))
+    jump = dict(frame=dict(duration=0, redraw=False), mode="immediate", transition=dict(duration=0))
+    fig.update_layout(
+        updatemenus=[dict(
+            type="buttons", direction="left", showactive=False,
+            x=0, xanchor="right", y=0, yanchor="top", pad=dict(t=60, r=10),
+            buttons=[
+                dict(label="▶", method="animate", args=[None, play]),
+                dict(label="❚❚", method="animate", args=[[None], jump]),
+            ],
+        )],
+        sliders=[dict(
+            active=0, x=0, len=1, y=0, yanchor="top", pad=dict(t=50),
+            currentvalue=dict(prefix="Year: "),
+            steps=[dict(label=year, method="animate", args=[[year], jump]) for year in years],
+        )],
+        meta=dict(ranges={
+            "x": {"Linear": _range(x, False), "Log": _range(x, True)},
+            "y": {"Linear": _range(y, False), "Log": _range(y, True)},
+        }),
+    )
+    return fig
+
+
+def set_animation_scales(figure: dict, xscale: str, yscale: str) -> dict:
+    """
+    `set_axis_types` for a figure from `animation_figure`, also fixing each
+    axis to its range over all frames on that scale.
+    """
+    set_axis_types(figure, xscale=xscale, yscale=yscale)
+    ranges = figure["layout"].get("meta", {}).get("ranges", {})
+    for axis, scale in (("x", xscale), ("y", yscale)):
+        bounds = ranges.get(axis, {}).get(scale)
+        if bounds is not None:
+            figure["layout"][f"{axis}axis"]["range"] = bounds
+    return figure
@@ -0,0 +1,213 @@
+"""
+Batch import of custom variable definitions.
+
+A definitions file lists `name = formula` pairs, as
+
+- CSV with columns `name` and `formula`,
+- YAML, either a mapping {name: formula} or a list of {name, formula},
+- plain text, one `name = formula` per line (# starts a comment).
+
+Definitions may refer to each other in any order. They are sorted by
+dependency, expanded into formulas over base columns, and evaluated in one
+pass through the formula engine, so shared sub-expressions are computed once
+and results are shared with other sessions through the derived-variable
+cache. Every definition gets one row in the returned report.
+"""
+import io
+import time
+
+import pandas as pd
+
+from pwt.cube import get_cube
+from pwt.data import get_dataset, session_overlay, session_panel
+from pwt.derived import get_derived_cache
+from pwt.formula import (
+    Formula,
+    FormulaEngine,
+    FormulaError,
+    columns_of,
+    compile_formula,
+    substitute,
+)
+from pwt.index import get_index
+from pwt.trace import traced
+
+FILE_TYPES = ["csv", "yaml", "yml", "txt"]
+
+
+def parse_definitions(filename: str, data: bytes) -> list:
+    """[(name, formula), ...] from an uploaded file; raises ValueError."""
+    suffix = filename.rsplit(".", 1)[-1].lower()
+    text = data.decode("utf-8-sig")
+
+    if suffix == "csv":
+        table = pd.read_csv(io.StringIO(text), dtype=str, skipinitialspace=True)
+        table.columns = [c.strip().lower() for c in table.columns]
+        if not {"name", "formula"} <= set(table.columns):
+            raise ValueError("The CSV needs a 'name' and a 'formula' column.")
+        table = table.dropna(subset=["name", "formula"])
+        pairs = zip(table["name"], table["formula"])
+
+    elif suffix in ("yaml", "yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading YAML needs PyYAML (pip install pyyaml); use CSV instead.") from None
+        try:
+            loaded = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML: {e}") from None
+        if isinstance(loaded, dict):
+            pairs = loaded.items()
+        elif isinstance(loaded, list) and all(isinstance(d, dict) for d in loaded):
+            pairs = [(d.get("name"), d.get("formula")) for d in loaded]
+        else:
+            raise ValueError("The YAML must be a mapping of name: formula, or a list of {name, formula}.")
+
+    else:
+        pairs = []
+        for n, line in enumerate(text.splitlines(), start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if "=" not in line:
+                raise ValueError(f"Line {n}: expected 'name = formula'.")
+            name, formula = line.split("=", 1)
+            pairs.append((name, formula))
+
+    return [(str(name).strip(), str(formula).strip()) for name, formula in pairs]
+
+
+def dependency_order(formulas: dict) -> tuple:
+    """
+    Topologically sort {name: Formula} by references between batch names.
+
+    Returns (order, cyclic): the names that can be evaluated, dependencies
+    first, and the names caught in (or depending on) a cycle.
+    """
+    deps = {name: set(f.names) & formulas.keys() - {name} for name, f in formulas.items()}
+    self_refs = {name for name, f in formulas.items() if name in f.names}
+
+    order, done = [], set()
+    pending = dict(deps)
+    while pending:
+        ready = sorted(n for n, d in pending.items() if d <= done and n not in self_refs)
+        if not ready:
+            break
+        for name in ready:
+            order.append(name)
+            done.add(name)
+            del pending[name]
+    return order, set(pending) | self_refs
+
+
+@traced("compute")
+def import_definitions(definitions: list) -> tuple:
+    """
+    Evaluate [(name, formula), ...] and add the good ones to this session.
+
+    Returns (report, added): a DataFrame with one row per definition
+    (variable, formula, status, ms, message) and the names added.
+    """
+    dataset = get_dataset()
+    overlay = session_overlay()
+    panel = session_panel()
+    engine = FormulaEngine(panel, get_index(), cube=get_cube())
+    cache = get_derived_cache()
+
+    rows = {}
+    sources = {}
+
+    def report(name, status, message="", seconds=0.0):
+        rows[name] = {
+            "variable": name,
+            "formula": sources.get(name, ""),
+            "status": status,
+            "ms": round(seconds * 1e3, 2),
+            "message": message,
+        }
+
+    # ---- validate names and compile ----
+    batch_names = [n for n, _ in definitions]
+    # a name clashing with an existing column still refers to that column
+    new_names = set(batch_names) - set(panel.columns)
+    columns = set(engine.columns) | new_names
+    compiled = {}
+    for name, source in definitions:
+        if name in sources:
+            report(name, "error", "Defined more than once in the file.")
+            compiled.pop(name, None)
+            continue
+        sources[name] = source
+        if not name.isidentifier():
+            report(name, "error", "Names must be letters, digits and underscores.")
+        elif name in panel.columns:
+            report(name, "error", "A column with that name already exists.")
+        elif not source:
+            report(name, "error", "Empty formula.")
+        else:
+            try:
+                compiled[name] = compile_formula(source, columns)
+            except FormulaError as e:
+                report(name, "error", str(e))
+
+    # ---- dependency order ----
+    order, cyclic = dependency_order(compiled)
+    for name in cyclic:
+        report(name, "error", "Circular reference between definitions.")
+
+    # ---- expand into formulas over existing columns ----
+    known = overlay.definitions
+    trees = {}
+    for name in order:
+        missing = compiled[name].names & new_names - trees.keys()
+        if missing:
+            report(name, "error", f"Depends on failed definition(s): {', '.join(sorted(missing))}.")
+            continue
+        trees[name] = substitute(compiled[name].tree, {**known, **trees})
+
+    # ---- one pass: cache hits first, the rest evaluated together ----
+    base_columns = set(dataset.panel.columns)
+    values, to_compute = {}, {}
+    for name, tree in trees.items():
+        shareable = columns_of(tree) <= base_columns
+        hit = cache.get((dataset.version, tree)) if shareable else None
+        if hit is not None:
+            values[name] = hit
+            report(name, "cached")
+        else:
+            to_compute[name] = Formula(sources[name], tree, frozenset(columns_of(tree)))
+
+    timings = {}
+    try:
+        computed = engine.evaluate_many(to_compute, timings)
+    except FormulaError:
+        # e.g. a base year outside the data: find the culprits one by one
+        computed = {}
+        for name, formula in to_compute.items():
+            t0 = time.perf_counter()
+            try:
+                computed[name] = engine.evaluate(formula)
+                timings[name] = time.perf_counter() - t0
+            except FormulaError as e:
+                report(name, "error", str(e))
+
+    for name, series in computed.items():
+        tree = trees[name]
+        if columns_of(tree) <= base_columns:
+            series = cache.put((dataset.version, tree), series, timings[name])
+        values[name] = series
+        report(name, "added", seconds=timings[name])
+
+    # ---- add to the session, dependencies first ----
+    added = []
+    for name in order:
+        if name in values:
+            overlay.add(name, values[name], dataset.panel, tree=trees[name], source=sources[name])
+            added.append(name)
+
+    table = pd.DataFrame(
+        [rows[n] for n in dict.fromkeys(batch_names) if n in rows],
+        columns=["variable", "formula", "status", "ms", "message"],
+    )
+    return table, added
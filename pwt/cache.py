@@ -0,0 +1,147 @@
+"""
+Columnar on-disk cache of gdppaneldata.xlsx.
+
+Reading the workbook through openpyxl takes several seconds; reading the
+same data back from Parquet (or Feather) takes milliseconds. The cache is
+compiled from the workbook on first use and lives in a directory named after
+the workbook's SHA-256, so replacing the xlsx invalidates it automatically.
+
+Compile ahead of time (e.g. in a deploy step) with:
+
+    python -m pwt.cache [--format parquet|feather] [--float32]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from pwt.schema import FLOAT32, apply_schema
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".pwt_cache"
+
+FORMATS = ("parquet", "feather")
+
+
+def file_checksum(path: Path) -> str:
+    """SHA-256 of the file contents (hex)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_workbook(path: Path, panel_sheet: str, varinfo_sheet: str):
+    """Parse both sheets straight from the xlsx (the slow path)."""
+    sheets = pd.read_excel(
+        path,
+        engine="openpyxl",
+        sheet_name=[panel_sheet, varinfo_sheet],
+    )
+    return sheets[panel_sheet], sheets[varinfo_sheet]
+
+
+def cache_path(checksum: str, fmt: str = "parquet", float32: bool = FLOAT32) -> Path:
+    """Directory holding the cached sheets for one workbook version."""
+    suffix = "-f32" if float32 else ""
+    return CACHE_DIR / f"{checksum[:16]}-{fmt}{suffix}"
+
+
+def _write(frame: pd.DataFrame, path: Path, fmt: str) -> None:
+    if fmt == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.reset_index(drop=True).to_feather(path)
+
+
+def _read(path: Path, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+
+def compile_cache(
+    xlsx: Path,
+    panel_sheet: str,
+    varinfo_sheet: str,
+    checksum: str,
+    fmt: str = "parquet",
+    float32: bool = FLOAT32,
+):
+    """Convert the workbook into the columnar cache and return both frames."""
+    panel, varinfo = read_workbook(xlsx, panel_sheet, varinfo_sheet)
+    panel = apply_schema(panel, float32=float32)
+
+    target = cache_path(checksum, fmt, float32)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write into a scratch directory and rename it into place, so a
+    # concurrent reader never sees a half-written cache.
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=".tmp-"))
+    try:
+        _write(panel, tmp / f"panel.{fmt}", fmt)
+        _write(varinfo, tmp / f"varinfo.{fmt}", fmt)
+        os.replace(tmp, target)
+    except OSError:
+        # Another process won the race (target exists) or the disk is
+        # read-only; either way the parsed frames are still good.
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return panel, varinfo
+
+
+def load_panel(
+    xlsx: Path,
+    panel_sheet: str,
+    varinfo_sheet: str,
+    fmt: str = "parquet",
+    float32: bool = FLOAT32,
+):
+    """
+    Return (panel, varinfo, checksum) for the workbook, using the columnar
+    cache when it matches the workbook's checksum and compiling it otherwise.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown cache format '{fmt}'; use one of {FORMATS}.")
+
+    checksum = file_checksum(xlsx)
+    target = cache_path(checksum, fmt, float32)
+    if target.is_dir():
+        try:
+            panel = _read(target / f"panel.{fmt}", fmt)
+            varinfo = _read(target / f"varinfo.{fmt}", fmt)
+            return panel, varinfo, checksum
+        except (OSError, ValueError):
+            # Corrupt or partial cache: rebuild it below.
+            shutil.rmtree(target, ignore_errors=True)
+
+    panel, varinfo = compile_cache(
+        xlsx, panel_sheet, varinfo_sheet, checksum, fmt=fmt, float32=float32
+    )
+    return panel, varinfo, checksum
+
+
+def clear_cache() -> None:
+    """Delete every cached workbook version."""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    from pwt.data import DATA_FILE, PANEL_SHEET, VARINFO_SHEET
+
+    parser = argparse.ArgumentParser(description="Compile the PWT columnar cache.")
+    parser.add_argument("--xlsx", type=Path, default=DATA_FILE)
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--float32", action="store_true", default=FLOAT32)
+    args = parser.parse_args()
+
+    checksum = file_checksum(args.xlsx)
+    compile_cache(
+        args.xlsx, PANEL_SHEET, VARINFO_SHEET, checksum,
+        fmt=args.format, float32=args.float32,
+    )
+    print(f"Wrote {cache_path(checksum, args.format, args.float32)}")
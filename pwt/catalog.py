@@ -0,0 +1,156 @@
+"""
+Variable catalog: codes, display labels and metadata for every column.
+
+The plot pages used to rebuild their variable lists on each rerun and map
+a chosen label back to its column by scanning every numeric column. The
+catalog is built once per dataset version from the VariableInfo sheet and
+extended with the session's custom variables whenever those change. It
+gives O(1) lookups both ways, a stable order (panel column order, custom
+variables last, in creation order) and a `version` stamp for cache keys.
+
+Display labels are unique: if two variables share a short label, each
+gets its code appended, e.g. "GDP [rgdpo]" and "GDP [gdp]".
+"""
+import hashlib
+import re
+from dataclasses import dataclass, replace
+
+import pandas as pd
+import streamlit as st
+
+from pwt.data import ID_COLUMNS, Dataset, get_dataset, session_overlay, versioned
+
+# "(in mil. 2021US$)", "(2021=1)", "(in millions)" at the end of a label
+_UNITS = re.compile(r"\((?:in )?([^()]+)\)\s*$")
+
+
+@dataclass(frozen=True)
+class Variable:
+    code: str
+    label: str          # unique display label
+    short: str          # short label as given (may be shared)
+    description: str
+    units: str
+    numeric: bool
+    custom: bool = False
+
+
+def units_of(description: str) -> str:
+    """The units in a trailing parenthesis of a VariableInfo label, or ''."""
+    match = _UNITS.search(description or "")
+    return match.group(1).strip() if match else ""
+
+
+class VariableCatalog:
+    """Ordered, read-only set of Variables with O(1) code <-> label lookup."""
+
+    def __init__(self, variables: list, version: str):
+        counts = {}
+        for v in variables:
+            counts[v.short] = counts.get(v.short, 0) + 1
+        self._variables = {
+            v.code: replace(v, label=f"{v.short} [{v.code}]" if counts[v.short] > 1 else v.short)
+            for v in variables
+        }
+        self._codes = {v.label: v.code for v in self._variables.values()}
+        self.version = version
+        self.numeric = tuple(
+            v.code for v in self._variables.values()
+            if v.numeric and v.code not in ID_COLUMNS
+        )
+        self.numeric_labels = tuple(self._variables[c].label for c in self.numeric)
+
+    def __contains__(self, code) -> bool:
+        return code in self._variables
+
+    def __iter__(self):
+        return iter(self._variables.values())
+
+    def __len__(self) -> int:
+        return len(self._variables)
+
+    @property
+    def codes(self) -> tuple:
+        return tuple(self._variables)
+
+    def get(self, code: str) -> Variable:
+        return self._variables[code]
+
+    def label(self, code: str) -> str:
+        """Display label of `code` (the code itself if unknown)."""
+        v = self._variables.get(code)
+        return v.label if v is not None else code
+
+    def code(self, label: str) -> str:
+        """Column for a display label; a column name is accepted as is."""
+        if label in self._codes:
+            return self._codes[label]
+        if label in self._variables:
+            return label
+        raise KeyError(f"Label '{label}' not found among the variables.")
+
+    def table(self, codes=None) -> pd.DataFrame:
+        """Variable, label, units, description and custom flag, one row each."""
+        rows = [self._variables[c] for c in (codes if codes is not None else self._variables)]
+        return pd.DataFrame({
+            "Variable": [v.code for v in rows],
+            "Label": [v.label for v in rows],
+            "Units": [v.units for v in rows],
+            "Description": [v.description for v in rows],
+            "Custom?": ["Yes" if v.custom else "No" for v in rows],
+        })
+
+
+@versioned
+def base_variables(dataset: Dataset) -> tuple:
+    """Variables of `dataset`'s base panel, in column order (default: the current version)."""
+    varinfo, panel = dataset.varinfo, dataset.panel
+    long_labels = dict(zip(varinfo["variable"], varinfo["label"]))
+    short_labels = dict(zip(varinfo["variable"], varinfo["label_short"]))
+    variables = []
+    for code in panel.columns:
+        description = str(long_labels.get(code, ""))
+        short = str(short_labels.get(code, code))
+        variables.append(Variable(
+            code=code,
+            label=short,
+            short=short,
+            description=description,
+            units=units_of(description),
+            numeric=pd.api.types.is_numeric_dtype(panel[code]),
+        ))
+    return tuple(variables)
+
+
+def session_catalog() -> VariableCatalog:
+    """
+    Catalog of the base panel plus this session's custom variables, rebuilt
+    only when the dataset version or the session's variables change.
+    """
+    dataset = get_dataset()
+    overlay = session_overlay()
+    key = (dataset.version, overlay.revision)
+    cached = st.session_state.get("catalog")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    variables = list(base_variables())
+    sources = overlay.sources
+    for name in overlay.names:
+        variables.append(Variable(
+            code=name,
+            label=name,
+            short=name,
+            description=sources.get(name, "Custom variable"),
+            units="",
+            numeric=pd.api.types.is_numeric_dtype(overlay.get(name)),
+            custom=True,
+        ))
+
+    # sessions with the same custom formulas share a stamp
+    stamp = repr((dataset.version, [(n, overlay.column_key(n)) for n in overlay.names]))
+    version = hashlib.blake2b(stamp.encode(), digest_size=8).hexdigest()
+
+    catalog = VariableCatalog(variables, version)
+    st.session_state["catalog"] = (key, catalog)
+    return catalog
@@ -0,0 +1,158 @@
+"""
+Pairwise correlations between every numeric variable.
+
+`correlations` computes the whole matrix at once. Each variable is read as
+its countries x years array from the cube (custom variables are laid out
+the same way), so the panel's filters are a row / column slice and the
+optional demeaning is one NaN-aware mean along an axis:
+
+- within year: each value minus that year's mean across countries (only
+  cross-country variation is left),
+- within country: each value minus that country's mean over the years
+  (only variation over time is left, as in a fixed-effects regression).
+
+Missing values are handled pairwise, like `DataFrame.corr`: each
+coefficient uses the observations where both variables exist, and the
+count is reported with it. All pairwise sums come from a few matrix
+products of the zero-filled values and the observed-mask, so the cost does
+not grow with the number of distinct missingness patterns.
+
+Spearman correlations are Pearson correlations of ranks. Each variable is
+ranked once over all its observations (ties get their average rank)
+rather than re-ranked for every pair's common observations, which keeps
+the computation vectorized; with missing data this can differ slightly
+from `DataFrame.corr(method="spearman")`.
+
+Results are cached per dataset version, variables (custom ones by
+formula), method, demeaning and filter.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pwt.cube import get_cube
+from pwt.data import get_dataset, session_overlay
+from pwt.lru import ByteLRU
+
+MAX_BYTES = int(float(os.environ.get("PWT_CORRELATION_CACHE_MB", "16")) * 2**20)
+
+METHODS = {"Pearson": "pearson", "Spearman (rank)": "spearman"}
+
+DEMEAN = {"None": None, "Within year": "year", "Within country": "country"}
+
+
+def demean(grids: np.ndarray, within: str = None) -> np.ndarray:
+    """
+    (variables, countries, years) `grids` minus the mean of each year
+    (`within="year"`) or of each country (`within="country"`), ignoring NaN.
+    """
+    if within is None:
+        return grids
+    axis = {"year": 1, "country": 2}[within]
+    valid = ~np.isnan(grids)
+    count = valid.sum(axis=axis, keepdims=True)
+    total = np.where(valid, grids, 0.0).sum(axis=axis, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return grids - total / count
+
+
+def rank(values: np.ndarray) -> np.ndarray:
+    """Average ranks of each row of `values` (observations along axis 1), NaN kept."""
+    out = np.full(values.shape, np.nan)
+    for i, row in enumerate(values):
+        observed = ~np.isnan(row)
+        out[i, observed] = pd.Series(row[observed]).rank(method="average").to_numpy()
+    return out
+
+
+def pairwise_corr(values: np.ndarray) -> tuple:
+    """
+    Pearson correlations between the rows of `values` (variables x
+    observations, NaN where missing), each pair over the observations both
+    have. Returns (r, n): r is NaN where a pair has fewer than 2
+    observations or no variance.
+    """
+    valid = ~np.isnan(values)
+    # centring on each variable's own mean first keeps the sums small
+    count = valid.sum(axis=1, keepdims=True)
+    mean = np.where(valid, values, 0.0).sum(axis=1, keepdims=True) / np.maximum(count, 1)
+    x = np.where(valid, values - mean, 0.0)
+    m = valid.astype(np.float64)
+
+    n = m @ m.T                        # n[i, j]: observations of both i and j
+    sx = x @ m.T                       # sum of x_i where j is observed too
+    sxx = (x * x) @ m.T
+    sxy = x @ x.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        r = cov / np.sqrt(var_i * var_i.T)
+    r[(n < 2) | ~np.isfinite(r)] = np.nan
+    np.clip(r, -1.0, 1.0, out=r)
+    return r, n.astype(np.int64)
+
+
+def correlation_matrix(grids: np.ndarray, method: str = "pearson", within: str = None) -> tuple:
+    """(r, n) between the variables of (variables, countries, years) `grids`."""
+    values = demean(np.asarray(grids, dtype=np.float64), within).reshape(len(grids), -1)
+    if method == "spearman":
+        values = rank(values)
+    return pairwise_corr(values)
+
+
+@st.cache_resource
+def get_correlation_cache() -> ByteLRU:
+    """Matrices by (dataset version, variables, method, demeaning, filter), shared by every session."""
+    return ByteLRU(MAX_BYTES, sizeof=lambda result: result[0].nbytes + result[1].nbytes)
+
+
+def correlations(panel: pd.DataFrame, columns: list, method: str = "pearson", within: str = None,
+                 region=None, year_range=None) -> tuple:
+    """
+    (r, n) DataFrames over `columns` of `panel` (this session's view) for
+    the countries in `region` (None: all) and years in `year_range`.
+    """
+    cube = get_cube()
+    overlay = session_overlay()
+    key = (
+        get_dataset().version,
+        tuple(overlay.column_key(c) for c in columns),
+        method, within,
+        None if region is None else tuple(sorted(region)),
+        year_range,
+    )
+    cache = get_correlation_cache()
+    result = cache.get(key)
+    if result is None:
+        t0 = time.perf_counter()
+        rows = np.arange(len(cube.countries))
+        if region is not None:
+            rows = rows[np.isin(np.asarray(cube.attribute("region"), dtype=object), list(region))]
+        cols = np.arange(len(cube.years))
+        if year_range is not None:
+            cols = cols[(cube.years >= year_range[0]) & (cube.years <= year_range[1])]
+        grids = np.stack([cube.column_grid(panel, c)[np.ix_(rows, cols)] for c in columns]) \
+            if columns else np.empty((0, len(rows), len(cols)))
+        result = cache.put(key, correlation_matrix(grids, method, within), time.perf_counter() - t0)
+
+    r, n = result
+    return (
+        pd.DataFrame(r, index=columns, columns=columns),
+        pd.DataFrame(n, index=columns, columns=columns),
+    )
+
+
+def strongest_pairs(r: pd.DataFrame, n: pd.DataFrame, min_obs: int = 0) -> pd.DataFrame:
+    """Each pair once (x, y, r, n), strongest |r| first; pairs with fewer than `min_obs` left out."""
+    upper = np.triu_indices(len(r), k=1)
+    out = pd.DataFrame({
+        "x": r.index.to_numpy()[upper[0]],
+        "y": r.columns.to_numpy()[upper[1]],
+        "r": r.to_numpy()[upper],
+        "n": n.to_numpy()[upper],
+    })
+    out = out[(out["n"] >= min_obs) & out["r"].notna()]
+    return out.iloc[np.argsort(-out["r"].abs().to_numpy(), kind="stable")].reset_index(drop=True)
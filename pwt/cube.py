@@ -0,0 +1,162 @@
+"""
+Wide storage of the panel: one countries x years array per indicator.
+
+The long panel (one row per country-year) has to be filtered and reshaped
+again for every time-series view. `PanelCube` keeps each numeric column as
+a dense 2-D array on the `PanelIndex` grid, with a mask of the cells that
+exist in the panel, so
+
+- a country's time series is a contiguous row slice,
+- a single-year cross-section is one column of the array,
+- formulas (see pwt/formula.py) read their inputs without any reshaping.
+
+For a balanced panel the arrays are reshaped views of the panel's own
+columns, so the cube costs no extra memory. Country attributes (region,
+income group) are stored once per country. `frame` builds the long rows a
+page asks for straight from the arrays, and `to_panel` rebuilds the whole
+long table. The cube is built once per dataset version and shared.
+
+    python benchmarks/bench_cube.py     # long-frame filtering vs. cube
+"""
+import numpy as np
+import pandas as pd
+
+from pwt.data import Dataset, versioned
+from pwt.index import PanelIndex, get_index
+
+
+class PanelCube:
+    """Numeric columns of a (country, year)-sorted panel as countries x years arrays."""
+
+    def __init__(self, panel: pd.DataFrame, index: PanelIndex):
+        self.index = index
+        self.countries = np.asarray(index.countries, dtype=object)
+        self.years = index.grid_years
+        shape = index.grid_shape
+
+        # panel row of each cell (-1 where the panel has no row)
+        self._rows = index.row_grid()
+        self.present = self._rows >= 0
+
+        numeric = [c for c in panel.select_dtypes(include="number").columns if c != "year"]
+        self._grids = {}
+        for name in numeric:
+            values = panel[name].to_numpy(dtype=np.dtype(panel[name].dtype), na_value=np.nan)
+            if index.dense:
+                grid = values.reshape(shape)
+            else:
+                grid = np.full(shape, np.nan, dtype=values.dtype)
+                grid[self.present] = values
+            grid.flags.writeable = False
+            self._grids[name] = grid
+
+        # per-country attributes, stored once per country
+        first = self._rows[np.arange(shape[0]), self.present.argmax(axis=1)]
+        self._attributes = {"country": panel["country"].array.take(first)}
+        for name in panel.columns:
+            if name in self._grids or name in ("country", "year"):
+                continue
+            varies = panel.groupby("country", observed=True, sort=False)[name].nunique(dropna=False)
+            if (varies > 1).any():
+                raise ValueError(f"'{name}' varies within a country; it cannot be stored per country.")
+            self._attributes[name] = panel[name].array.take(first)
+        self._year_dtype = panel["year"].dtype
+        self._columns = list(panel.columns)
+
+    def __contains__(self, name) -> bool:
+        return name in self._grids
+
+    @property
+    def names(self) -> list:
+        return list(self._grids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory owned by the cube (views of the panel count as 0)."""
+        return sum(g.nbytes for g in self._grids.values() if g.base is None)
+
+    # ---- arrays ----
+    def grid(self, name: str) -> np.ndarray:
+        """Read-only countries x years array of `name` (NaN where missing)."""
+        return self._grids[name]
+
+    def column_grid(self, panel: pd.DataFrame, name: str) -> np.ndarray:
+        """`grid(name)`, or column `name` of `panel` laid out on the grid (e.g. a custom variable)."""
+        if name in self._grids:
+            return self._grids[name]
+        return self.index.to_grid(panel[name].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def attribute(self, name: str) -> pd.api.extensions.ExtensionArray:
+        """Per-country value of an identifier column (e.g. region), in `countries` order."""
+        return self._attributes[name]
+
+    def mask(self, name: str) -> np.ndarray:
+        """Cells where `name` is observed."""
+        return self.present & ~np.isnan(self._grids[name])
+
+    def series(self, name: str, country: str) -> np.ndarray:
+        """One country's values over `years` (a contiguous row of the array)."""
+        return self._grids[name][self.index.block(country)]
+
+    def cross_section(self, name: str, year: int) -> np.ndarray:
+        """All countries' values in `year` (one column of the array)."""
+        return self._grids[name][:, int(year) - self.index.year_min]
+
+    # ---- long rows ----
+    def _year_columns(self, year=None, year_range=None) -> np.ndarray:
+        cols = np.arange(len(self.years))
+        if year_range is not None:
+            cols = cols[(self.years >= year_range[0]) & (self.years <= year_range[1])]
+        if year is not None:
+            wanted = np.asarray(list(year), dtype=np.int64) - self.index.year_min
+            cols = np.intersect1d(cols, wanted)
+        return cols
+
+    def frame(self, panel: pd.DataFrame, columns: list, country=None, region=None,
+              year=None, year_range=None) -> pd.DataFrame:
+        """
+        Long rows (country, region, year and `columns`) matching the filters,
+        like `PanelIndex.filter(panel, ...)[...]`: same rows, order and
+        index labels. Cube columns are sliced from the arrays; others (e.g.
+        a session's custom variables) are taken from `panel`.
+        """
+        blocks = self.index.blocks(country, region)
+        cols = self._year_columns(year, year_range)
+        rows = self._rows[np.ix_(blocks, cols)]
+        cells = rows >= 0
+        rows = rows[cells]
+
+        per_row = np.repeat(blocks, cells.sum(axis=1))
+        data = {name: self._attributes[name].take(per_row) for name in ("country", "region")
+                if name in self._attributes}
+        data["year"] = np.broadcast_to(self.years[cols], cells.shape)[cells].astype(self._year_dtype)
+        for name in dict.fromkeys(columns):
+            if name in data:
+                continue
+            if name in self._grids:
+                data[name] = self._grids[name][np.ix_(blocks, cols)][cells]
+            else:
+                data[name] = panel[name].to_numpy()[rows]
+        return pd.DataFrame(data, index=panel.index[rows])
+
+    def to_panel(self) -> pd.DataFrame:
+        """The long panel rebuilt from the cube (original columns and order)."""
+        blocks = np.repeat(np.arange(len(self.countries)), self.present.sum(axis=1))
+        rows = self._rows[self.present]
+        data = {}
+        for name in self._columns:
+            if name == "year":
+                data[name] = np.broadcast_to(self.years, self.present.shape)[self.present].astype(self._year_dtype)
+            elif name in self._attributes:
+                data[name] = self._attributes[name].take(blocks)
+            else:
+                data[name] = self._grids[name][self.present]
+        out = pd.DataFrame(data)
+        # keep the panel's row order (panel rows are sorted like the grid)
+        return out.iloc[np.argsort(rows, kind="stable")].reset_index(drop=True)
+
+
+@versioned
+def get_cube(dataset: Dataset) -> PanelCube:
+    """The shared cube for `dataset` (default: the current version)."""
+    return PanelCube(dataset.panel, get_index(dataset))
@@ -0,0 +1,176 @@
+"""
+Process-wide data layer.
+
+The workbook is loaded once per server process (read through the columnar
+cache in pwt/cache.py) and the resulting base panel is shared, read-only, by
+every session. Each session only owns a small overlay holding the columns
+of its custom variables, see `session_panel` and pwt/overlay.py.
+
+The current version lives in a `DatasetStore`; pwt/reload.py builds a new
+one in the background when the workbook is replaced and swaps it in. Main.py
+pins the version once per script run (`pin_dataset`), so a swap landing
+mid-run never splits one run between two versions.
+"""
+import contextvars
+import functools
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from pwt.cache import load_panel
+from pwt.overlay import SessionOverlay
+from pwt.trace import traced
+
+# pandas < 3 copies on concat/assign unless copy-on-write is switched on.
+# With it on, session views share the base panel's memory and any write
+# made through a view copies that column instead of touching the base.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "gdppaneldata.xlsx"
+
+PANEL_SHEET = "Sheet1"
+VARINFO_SHEET = "VariableInfo"
+
+# Identifier columns; everything else in Sheet1 is an indicator.
+ID_COLUMNS = ["country", "region", "incgroup", "year"]
+
+# Dataset pinned for the script run on this thread (see `pin_dataset`).
+_pinned = contextvars.ContextVar("pwt_dataset", default=None)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """One parsed version of the workbook. Never mutate its frames."""
+    panel: pd.DataFrame
+    varinfo: pd.DataFrame
+    labels: dict
+    version: str
+
+
+@traced("dataset load")
+def _read_dataset(path: Path) -> Dataset:
+    """Load both sheets, from the columnar cache when it is up to date."""
+    panel, varinfo, checksum = load_panel(path, PANEL_SHEET, VARINFO_SHEET)
+
+    # Country-year order lets pwt/index.py treat each country as one block
+    panel = panel.sort_values(["country", "year"], kind="stable", ignore_index=True)
+
+    # Build dict: {variable_name: label_text}
+    labels = dict(zip(varinfo["variable"], varinfo["label_short"]))
+
+    return Dataset(panel=panel, varinfo=varinfo, labels=labels, version=checksum[:12])
+
+
+class DatasetStore:
+    """The current Dataset for one workbook; loaded on first use, then swapped."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.mtime_ns = None
+        self._current = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Dataset:
+        dataset = self._current
+        if dataset is None:
+            # concurrent first callers wait for one load
+            with self._lock:
+                if self._current is None:
+                    self.mtime_ns = self.path.stat().st_mtime_ns
+                    self._current = _read_dataset(self.path)
+                dataset = self._current
+        return dataset
+
+    def read(self) -> Dataset:
+        """Parse the workbook as it is now, without making it current."""
+        return _read_dataset(self.path)
+
+    def swap(self, dataset: Dataset, mtime_ns: int) -> Dataset:
+        """Make `dataset` current (one reference assignment); returns the old one."""
+        with self._lock:
+            old, self._current, self.mtime_ns = self._current, dataset, mtime_ns
+        return old
+
+
+@st.cache_resource(show_spinner=False)
+def get_store(path: str) -> DatasetStore:
+    """The store for `path`, shared by every session of this server process."""
+    return DatasetStore(Path(path))
+
+
+def get_dataset(path: Path = DATA_FILE) -> Dataset:
+    """
+    Return the shared dataset for `path`, parsing it on first use; the
+    version pinned for this script run, if any.
+    """
+    pinned = _pinned.get()
+    if pinned is not None and Path(path) == DATA_FILE:
+        return pinned
+    return get_store(str(path)).current
+
+
+def pin_dataset() -> Dataset:
+    """
+    Resolve the current dataset once for this script run (Main.py): until
+    the next run, `get_dataset` on this thread returns it even if a newer
+    version is swapped in meanwhile, so the custom variables migrated
+    against it, the catalog and the page all see the same version.
+    """
+    dataset = get_store(str(DATA_FILE)).current
+    _pinned.set(dataset)
+    return dataset
+
+
+def versioned(builder):
+    """
+    Decorator for structures derived from a whole dataset (index, cube,
+    labels, ...): `builder(dataset)` runs once per dataset version and its
+    result is shared by every session. The decorated function takes an
+    optional dataset (default: the current version).
+
+    Two versions are kept: the current one and the one pwt/reload.py builds
+    before swapping it in (its `WARMERS` list what is built ahead).
+    """
+    def build(version: str, _dataset: Dataset):
+        # keyed on the dataset version only; the dataset itself is not hashed
+        return builder(_dataset)
+
+    # a cache per builder: Streamlit keys cached functions by module and name
+    build.__module__ = builder.__module__
+    build.__qualname__ = f"{builder.__qualname__}.build"
+    build = st.cache_resource(max_entries=2, show_spinner=False)(build)
+
+    @functools.wraps(builder)
+    def get(dataset: Dataset = None):
+        dataset = dataset or get_dataset()
+        return build(dataset.version, dataset)
+
+    return get
+
+
+# ---------------------------------------
+# PER-SESSION OVERLAY
+# ---------------------------------------
+
+def session_overlay() -> SessionOverlay:
+    """This session's custom variables (see pwt/overlay.py)."""
+    if "overlay" not in st.session_state:
+        st.session_state["overlay"] = SessionOverlay(get_dataset().version)
+    return st.session_state["overlay"]
+
+
+def session_panel() -> pd.DataFrame:
+    """
+    Base panel plus this session's custom variables.
+
+    The result shares the base panel's column data; only the custom
+    columns belong to the session.
+    """
+    dataset = get_dataset()
+    return session_overlay().view(dataset.panel, dataset.version)
@@ -0,0 +1,87 @@
+"""
+Process-wide cache of derived variables.
+
+Many sessions define the same series (GDP per capita, labour productivity,
+growth rates, ...). The cache keys a computed column on the dataset version
+and the formula's canonical tree, with references to other custom variables
+expanded (see `formula.substitute`). So `rgdpo/pop`, `rgdpo / pop` and
+`gdp_pc` (where gdp_pc = rgdpo / pop) all hit the same entry, whoever
+created it. Entries are read-only Series handed out by reference, evicted
+least-recently-used once the cache exceeds its byte budget.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pwt.cube import get_cube
+from pwt.data import get_dataset, session_overlay, session_panel
+from pwt.formula import FormulaEngine, columns_of, substitute
+from pwt.index import get_index
+from pwt.lru import ByteLRU
+from pwt.trace import traced
+
+# Byte budget for cached columns (one float64 column of the panel is ~75 kB).
+MAX_BYTES = int(float(os.environ.get("PWT_DERIVED_CACHE_MB", "64")) * 2**20)
+
+
+class DerivedCache(ByteLRU):
+    """Byte-bounded LRU of {(version, tree): read-only Series}."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        super().__init__(max_bytes, sizeof=lambda s: int(s.memory_usage(index=False)))
+
+    def put(self, key, series: pd.Series, seconds: float = 0.0) -> pd.Series:
+        """Store a freshly computed Series; returns the shared read-only copy."""
+        return super().put(key, _read_only(series), seconds)
+
+    def get_or_compute(self, key, compute) -> pd.Series:
+        """Return the cached Series for `key`, computing it on a miss."""
+        series = self.get(key)
+        if series is not None:
+            return series
+        # computed outside the lock; two sessions racing on the same new
+        # formula both compute it and the second result is simply dropped
+        t0 = time.perf_counter()
+        series = compute()
+        return self.put(key, series, time.perf_counter() - t0)
+
+
+def _read_only(series: pd.Series) -> pd.Series:
+    values = np.array(series.to_numpy(), copy=True)
+    values.flags.writeable = False
+    return pd.Series(values, index=series.index, copy=False)
+
+
+@st.cache_resource
+def get_derived_cache() -> DerivedCache:
+    """The cache shared by every session of this server process."""
+    return DerivedCache()
+
+
+@traced("compute")
+def derive(source: str):
+    """
+    Evaluate `source` against this session's panel through the shared cache.
+
+    Returns (series, tree): the read-only result and the expanded canonical
+    tree to store alongside it. Raises FormulaError for invalid formulas.
+    """
+    dataset = get_dataset()
+    overlay = session_overlay()
+    engine = FormulaEngine(session_panel(), get_index(), cube=get_cube())
+
+    formula = engine.compile(source)
+    tree = substitute(formula.tree, overlay.definitions)
+
+    # A column without a known formula only means something in this
+    # session, so such results are not shared.
+    if not columns_of(tree) <= set(dataset.panel.columns):
+        return engine.evaluate(formula), tree
+
+    series = get_derived_cache().get_or_compute(
+        (dataset.version, tree), lambda: engine.evaluate(formula)
+    )
+    return series, tree
@@ -0,0 +1,157 @@
+"""
+Download payloads, built on demand and shared between sessions.
+
+`st.download_button` needs its file contents up front, so serializing the
+plot data on every rerun cost a full `to_csv` even when nobody downloaded.
+`download_button` passes Streamlit a callable instead: the file is written
+only when the button is clicked, and kept in a byte-bounded LRU keyed on
+the dataset version, the exported rows and columns (custom columns by
+formula) and the format, so the next click - from any session - is free.
+
+Files are encoded in chunks of `CHUNK_ROWS` rows (CSV blocks, Parquet row
+groups, write-only xlsx rows) into an in-memory buffer, so the intermediate
+text or Arrow data never exceeds one chunk. The finished file is then
+copied out of the buffer as one `bytes` object, which is what is served
+and cached: a build briefly holds two copies of the file, not of the table.
+"""
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from pwt.data import get_dataset, session_overlay
+from pwt.lru import ByteLRU
+from pwt.trace import current_page, get_tracer, span
+
+# Byte budget for cached files.
+MAX_BYTES = int(float(os.environ.get("PWT_EXPORT_CACHE_MB", "128")) * 2**20)
+
+CHUNK_ROWS = 20_000
+
+# label: (file extension, MIME type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def _chunks(frame: pd.DataFrame, chunk_rows: int):
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def write_csv(frame: pd.DataFrame, out, chunk_rows: int = CHUNK_ROWS) -> None:
+    """UTF-8 CSV (no index), one block of rows at a time."""
+    if frame.empty:
+        frame.to_csv(out, index=False, encoding="utf-8")
+        return
+    for n, chunk in enumerate(_chunks(frame, chunk_rows)):
+        chunk.to_csv(out, index=False, header=n == 0, encoding="utf-8")
+
+
+def write_parquet(frame: pd.DataFrame, out, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Parquet with one row group per chunk."""
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in _chunks(frame, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_xlsx(frame: pd.DataFrame, out, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Single-sheet workbook, streamed through openpyxl's write-only mode."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("data")
+    ws.append([str(c) for c in frame.columns])
+    for chunk in _chunks(frame, chunk_rows):
+        # plain Python values; missing values become empty cells
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append([v.item() if isinstance(v, np.generic) else v for v in row])
+    wb.save(out)
+
+
+WRITERS = {"CSV": write_csv, "Parquet": write_parquet, "Excel": write_xlsx}
+
+
+def to_bytes(frame: pd.DataFrame, fmt: str, chunk_rows: int = CHUNK_ROWS) -> bytes:
+    """The file contents of `frame` in format `fmt` (a key of FORMATS), encoded chunk by chunk."""
+    buffer = io.BytesIO()
+    WRITERS[fmt](frame, buffer, chunk_rows)
+    return buffer.getvalue()
+
+
+class ExportCache(ByteLRU):
+    """Byte-bounded LRU of {(version, columns, rows, format): file bytes}."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        super().__init__(max_bytes, sizeof=len)
+
+    def get_or_build(self, key, frame: pd.DataFrame, fmt: str) -> bytes:
+        payload = self.get(key)
+        if payload is None:
+            t0 = time.perf_counter()
+            payload = to_bytes(frame, fmt)
+            payload = self.put(key, payload, time.perf_counter() - t0)
+        return payload
+
+
+@st.cache_resource
+def get_export_cache() -> ExportCache:
+    """The cache shared by every session of this server process."""
+    return ExportCache()
+
+
+def export_key(frame: pd.DataFrame, fmt: str, identity: tuple = ()) -> tuple:
+    """
+    Identify the file for `frame`: dataset version, columns (custom ones by
+    formula), a hash of the panel rows it holds and `identity`.
+    """
+    overlay = session_overlay()
+    rows = hashlib.blake2b(np.ascontiguousarray(frame.index.to_numpy()).tobytes(), digest_size=16)
+    return (
+        get_dataset().version,
+        tuple(overlay.column_key(c) for c in frame.columns),
+        rows.hexdigest(),
+        fmt,
+        identity,
+    )
+
+
+def download_button(label: str, frame: pd.DataFrame, file_stem: str, key: str, identity: tuple = ()) -> None:
+    """
+    A format picker and a download button whose file is written on click.
+
+    `frame` must keep the shared panel's row labels (as filtered by the
+    panel index), since they identify the rows in the cache key. Rows that
+    are not panel rows (e.g. aggregates) must be identified by `identity`.
+    """
+    col_fmt, col_button = st.columns([1, 2], vertical_alignment="bottom")
+    fmt = col_fmt.selectbox("Format:", options=list(FORMATS), index=0, key=f"{key}_format")
+    extension, mime = FORMATS[fmt]
+
+    # resolved now, on the script thread; the callable runs on another one
+    with span("export"):
+        cache = get_export_cache()
+        cache_key = export_key(frame, fmt, identity)
+    tracer, page = get_tracer(), current_page()
+
+    def build() -> bytes:
+        with span("export build", page=page, tracer=tracer):
+            return cache.get_or_build(cache_key, frame, fmt)
+
+    col_button.download_button(
+        label=label,
+        data=build,
+        file_name=f"{file_stem}.{extension}",
+        mime=mime,
+        key=key,
+    )
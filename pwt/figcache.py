@@ -0,0 +1,122 @@
+"""
+Process-wide cache of built Plotly figures.
+
+Building a figure (px.* plus layout, annotations and trendlines) is the
+most expensive part of a plot page rerun, and many reruns - and many
+sessions - ask for the same figure. `cached_figure` keys the figure's JSON
+on the page name, dataset version and the page's normalized parameters,
+and hands back the figure as a plain dict that `st.plotly_chart` accepts.
+Entries are evicted least-recently-used by their JSON size.
+"""
+import json
+import os
+import threading
+import time
+
+import plotly.io as pio
+import streamlit as st
+
+from pwt.data import get_dataset
+from pwt.lru import ByteLRU
+from pwt.trace import span
+
+MAX_BYTES = int(float(os.environ.get("PWT_FIGURE_CACHE_MB", "64")) * 2**20)
+
+
+def _normalize(value):
+    """Hashable, order-insensitive form of a parameter value."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (list, set, frozenset)):
+        # selections are order-insensitive: filtered rows come back in
+        # panel order whatever order the user picked them in
+        return tuple(sorted((_normalize(v) for v in value), key=repr))
+    if isinstance(value, tuple):
+        # tuples (ranges, formula trees) keep their order
+        return tuple(_normalize(v) for v in value)
+    if hasattr(value, "item"):
+        return value.item()  # numpy scalar
+    return value
+
+
+class FigureCache(ByteLRU):
+    """Byte-bounded LRU of {(page, version, params): figure JSON}, with per-page counters."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        super().__init__(max_bytes, sizeof=len)
+        self._page_lock = threading.Lock()
+        self.pages = {}
+
+    def _count(self, page: str, field: str, amount=1) -> None:
+        with self._page_lock:
+            counters = self.pages.setdefault(
+                page, {"hits": 0, "misses": 0, "build seconds": 0.0}
+            )
+            counters[field] += amount
+
+    def lookup(self, page: str, key):
+        spec = self.get(key)
+        self._count(page, "hits" if spec is not None else "misses")
+        return spec
+
+    def store(self, page: str, key, spec: str, seconds: float) -> str:
+        self._count(page, "build seconds", seconds)
+        return self.put(key, spec, seconds)
+
+    def page_stats(self) -> list:
+        """One row per page: hits, misses, hit rate and mean build time."""
+        with self._page_lock:
+            rows = []
+            for page, c in sorted(self.pages.items()):
+                lookups = c["hits"] + c["misses"]
+                rows.append({
+                    "page": page,
+                    "hits": c["hits"],
+                    "misses": c["misses"],
+                    "hit rate": c["hits"] / lookups if lookups else 0.0,
+                    "mean build ms": 1e3 * c["build seconds"] / c["misses"] if c["misses"] else 0.0,
+                })
+            return rows
+
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """The cache shared by every session of this server process."""
+    return FigureCache()
+
+
+def cached_figure(page: str, params: dict, build) -> dict:
+    """
+    The figure for `page` with `params`, built by `build()` on a miss.
+
+    `params` must hold everything the figure depends on besides the dataset
+    version (columns, selections, scales, options, ...). Lists are treated
+    as unordered selections, tuples as ordered values. Custom variables must
+    also be identified by their formula (SessionOverlay.column_key), since
+    two sessions can give different data the same name.
+    """
+    cache = get_figure_cache()
+    with span("figure"):
+        key = (page, get_dataset().version, _normalize(params))
+
+        spec = cache.lookup(page, key)
+        if spec is None:
+            t0 = time.perf_counter()
+            with span("figure build"):
+                spec = pio.to_json(build(), validate=False)
+            spec = cache.store(page, key, spec, time.perf_counter() - t0)
+        return json.loads(spec)
+
+
+def set_axis_types(figure: dict, xscale: str = None, yscale: str = None) -> dict:
+    """
+    Apply "Linear"/"Log" axis scales to a figure from `cached_figure`.
+
+    Scales are a layout setting, so pages leave them out of the cache key
+    and set them here: switching scale reuses the cached figure.
+    """
+    layout = figure.setdefault("layout", {})
+    for axis, scale in (("xaxis", xscale), ("yaxis", yscale)):
+        if scale is not None:
+            layout.setdefault(axis, {})["type"] = "log" if scale == "Log" else "linear"
+    return figure
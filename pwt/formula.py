@@ -0,0 +1,421 @@
+"""
+Panel-aware formula engine for custom variables.
+
+`DataFrame.eval` treats the stacked panel as one long series, so a lag or a
+moving average of Albania 1970 silently picks up the last years of the
+previous country. This engine lays every column out as a countries x years
+grid (see `PanelIndex.to_grid`; base columns come straight from `PanelCube`)
+and applies time operations along the year axis, so they never cross a
+country boundary and a lag is a true one-year lag even where a country has
+gaps.
+
+Formulas use the same syntax as before plus a few functions:
+
+    rgdpo / pop                      arithmetic: + - * / ** and unary -
+    rgdpna.shift(1), lag(x, n)       lag (lead(x, n) or shift(-n) for leads)
+    x.diff(n), diff(x, n)            x - lag(x, n)
+    x.pct_change(n)                  x / lag(x, n) - 1
+    growth(x, n)                     100 * (x / lag(x, n) - 1)
+    x.rolling(w).mean()              also .sum() .min() .max() .std()
+    rolling_mean(x, w)
+    x.iloc[k]                        k-th observation of each country
+    index(x, year)                   100 * x / x in `year`, per country
+    log(x) log10(x) exp(x) sqrt(x) abs(x)
+
+Expressions are compiled into a canonical tree of hashable tuples, so
+identical sub-expressions (e.g. the two `rgdpna.shift(1)` in a growth-rate
+formula, or the same lag used by several formulas in one batch) are
+computed once.
+"""
+import ast
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pwt.index import PanelIndex
+
+
+class FormulaError(ValueError):
+    """A formula could not be parsed or refers to unknown variables."""
+
+
+_BINOPS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Pow: "**",
+}
+
+_UFUNCS = {
+    "log": np.log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "sqrt": np.sqrt,
+    "abs": np.abs,
+}
+
+_ROLLING_STATS = ("mean", "sum", "min", "max", "std")
+
+
+# ---------------------------------------
+# COMPILATION: source -> canonical tuple tree
+# ---------------------------------------
+
+def _int_arg(node, what: str) -> int:
+    """An integer literal argument (negative allowed)."""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_int_arg(node.operand, what)
+    if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+        return node.value
+    raise FormulaError(f"{what} must be a whole number.")
+
+
+def _args(call: ast.Call, name: str, n_min: int, n_max: int) -> list:
+    if call.keywords:
+        raise FormulaError(f"{name}() does not take keyword arguments.")
+    if not n_min <= len(call.args) <= n_max:
+        raise FormulaError(f"Wrong number of arguments for {name}().")
+    return call.args
+
+
+def _shift(n: int, node) -> tuple:
+    return node if n == 0 else ("shift", n, node)
+
+
+def _diff(n: int, node) -> tuple:
+    return ("bin", "-", node, _shift(n, node))
+
+
+def _ratio(n: int, node) -> tuple:
+    return ("bin", "-", ("bin", "/", node, _shift(n, node)), ("num", 1.0))
+
+
+def _binop(op: str, left, right) -> tuple:
+    # + and * commute exactly in floating point, so order their operands
+    # canonically: "pop * x" and "x * pop" become the same node.
+    if op in ("+", "*") and repr(right) < repr(left):
+        left, right = right, left
+    return ("bin", op, left, right)
+
+
+class _Compiler:
+    def __init__(self, columns):
+        self.columns = set(columns)
+        self.names = set()
+
+    def compile(self, node) -> tuple:
+        if isinstance(node, ast.Expression):
+            return self.compile(node.body)
+
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+                return ("num", float(node.value))
+            raise FormulaError(f"Unsupported constant: {node.value!r}")
+
+        if isinstance(node, ast.Name):
+            if node.id not in self.columns:
+                raise FormulaError(f"Unknown variable '{node.id}'.")
+            self.names.add(node.id)
+            return ("col", node.id)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            return _binop(_BINOPS[type(node.op)], self.compile(node.left), self.compile(node.right))
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self.compile(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if operand[0] == "num":
+                return ("num", -operand[1])
+            return ("neg", operand)
+
+        if isinstance(node, ast.Subscript):
+            # x.iloc[k]: k-th observation of each country
+            target = node.value
+            if isinstance(target, ast.Attribute) and target.attr == "iloc":
+                return ("nth", _int_arg(node.slice, "iloc position"), self.compile(target.value))
+            raise FormulaError("Only .iloc[k] indexing is supported.")
+
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                return self._function(node.func.id, node)
+            if isinstance(node.func, ast.Attribute):
+                return self._method(node.func, node)
+
+        raise FormulaError(f"Unsupported expression: {ast.unparse(node)}")
+
+    def _function(self, name: str, call: ast.Call) -> tuple:
+        if name in _UFUNCS:
+            (x,) = _args(call, name, 1, 1)
+            return ("func", name, self.compile(x))
+        if name in ("lag", "lead", "diff", "growth"):
+            args = _args(call, name, 1, 2)
+            x = self.compile(args[0])
+            n = _int_arg(args[1], "Lag length") if len(args) > 1 else 1
+            if name == "lag":
+                return _shift(n, x)
+            if name == "lead":
+                return _shift(-n, x)
+            if name == "diff":
+                return _diff(n, x)
+            return _binop("*", ("num", 100.0), _ratio(n, x))
+        if name.startswith("rolling_") and name[len("rolling_"):] in _ROLLING_STATS:
+            x, w = _args(call, name, 2, 2)
+            return self._rolling(name[len("rolling_"):], _int_arg(w, "Window"), self.compile(x))
+        if name == "index":
+            x, year = _args(call, name, 2, 2)
+            return ("index", _int_arg(year, "Base year"), self.compile(x))
+        raise FormulaError(f"Unknown function '{name}'.")
+
+    def _method(self, func: ast.Attribute, call: ast.Call) -> tuple:
+        name = func.attr
+        if name in ("shift", "diff", "pct_change"):
+            args = _args(call, name, 0, 1)
+            n = _int_arg(args[0], "Lag length") if args else 1
+            x = self.compile(func.value)
+            if name == "shift":
+                return _shift(n, x)
+            if name == "diff":
+                return _diff(n, x)
+            return _ratio(n, x)
+        if name in _ROLLING_STATS:
+            inner = func.value
+            if (
+                isinstance(inner, ast.Call)
+                and isinstance(inner.func, ast.Attribute)
+                and inner.func.attr == "rolling"
+            ):
+                _args(call, name, 0, 0)
+                (w,) = _args(inner, "rolling", 1, 1)
+                return self._rolling(name, _int_arg(w, "Window"), self.compile(inner.func.value))
+        if name == "rolling":
+            raise FormulaError("rolling(w) must be followed by .mean(), .sum(), .min(), .max() or .std().")
+        raise FormulaError(f"Unsupported method '.{name}()'.")
+
+    def _rolling(self, stat: str, window: int, node) -> tuple:
+        if window < 1:
+            raise FormulaError("Window must be at least 1.")
+        return ("rolling", stat, window, node)
+
+
+class Formula:
+    """A compiled formula: canonical tree plus the columns it reads."""
+
+    def __init__(self, source: str, tree: tuple, names: frozenset):
+        self.source = source
+        self.tree = tree
+        self.names = names
+
+    def __repr__(self) -> str:
+        return f"Formula({self.source!r})"
+
+
+def compile_formula(source: str, columns) -> Formula:
+    """Parse `source` against the available `columns`; raises FormulaError."""
+    try:
+        parsed = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"Invalid formula: {e.msg}") from None
+    compiler = _Compiler(columns)
+    tree = compiler.compile(parsed)
+    return Formula(source, tree, frozenset(compiler.names))
+
+
+def substitute(tree: tuple, definitions: dict) -> tuple:
+    """
+    Replace references to derived columns with their own (canonical) trees,
+    so the result only refers to base columns. Two formulas that compute the
+    same thing through different custom variables get the same tree.
+    """
+    if not definitions:
+        return tree
+    kind = tree[0]
+    if kind == "col":
+        return definitions.get(tree[1], tree)
+    if kind == "num":
+        return tree
+    if kind == "bin":
+        _, op, left, right = tree
+        return _binop(op, substitute(left, definitions), substitute(right, definitions))
+    return tree[:-1] + (substitute(tree[-1], definitions),)
+
+
+def columns_of(tree: tuple) -> set:
+    """Column names a tree reads."""
+    if tree[0] == "col":
+        return {tree[1]}
+    return set().union(*(columns_of(c) for c in tree[1:] if isinstance(c, tuple)))
+
+
+# ---------------------------------------
+# EVALUATION on countries x years grids
+# ---------------------------------------
+
+def _shift_grid(grid: np.ndarray, n: int) -> np.ndarray:
+    out = np.full_like(grid, np.nan)
+    if n > 0:
+        out[:, n:] = grid[:, :-n]
+    elif n < 0:
+        out[:, :n] = grid[:, -n:]
+    else:
+        out[:] = grid
+    return out
+
+
+def _rolling_grid(grid: np.ndarray, stat: str, window: int) -> np.ndarray:
+    # Like pandas rolling(window) with min_periods=window: NaN until the
+    # window is full or whenever it contains a NaN.
+    out = np.full_like(grid, np.nan)
+    if window > grid.shape[1]:
+        return out
+    windows = sliding_window_view(grid, window, axis=1)
+    if stat == "std":
+        values = windows.std(axis=-1, ddof=1) if window > 1 else np.full(windows.shape[:2], np.nan)
+    else:
+        values = getattr(windows, stat)(axis=-1)
+    out[:, window - 1:] = values
+    return out
+
+
+def _repeated_nodes(trees) -> set:
+    """Sub-trees that appear more than once across `trees`."""
+    seen, repeated = set(), set()
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        if node[0] == "num":
+            continue
+        if node in seen:
+            repeated.add(node)
+            continue
+        seen.add(node)
+        stack.extend(child for child in node[1:] if isinstance(child, tuple))
+    return repeated
+
+
+class FormulaEngine:
+    """Evaluates formulas over one panel (base or base + custom variables)."""
+
+    def __init__(self, panel: pd.DataFrame, index: PanelIndex, cube=None):
+        self.panel = panel
+        self.index = index
+        # base columns are read from the cube's arrays when one is given
+        self.cube = cube
+        self.columns = [
+            c for c in panel.select_dtypes(include="number").columns
+        ]
+        # rows that exist in the grid (all True for a balanced panel)
+        self._present = index.to_grid(np.ones(len(panel))) == 1
+
+    def compile(self, source: str) -> Formula:
+        return compile_formula(source, self.columns)
+
+    def evaluate(self, formula, memo: dict = None) -> pd.Series:
+        """Evaluate one formula (source string or Formula) to a Series."""
+        formula = self.compile(formula) if isinstance(formula, str) else formula
+        return self._to_series(self._eval(formula.tree, {} if memo is None else memo))
+
+    def evaluate_many(self, formulas: dict, timings: dict = None) -> dict:
+        """
+        Evaluate {name: formula} in one pass, sharing intermediate results
+        (column grids, lags, rolling windows) between formulas.
+
+        If `timings` is given it receives {name: seconds} for each formula
+        (shared intermediates are charged to the first formula using them).
+        """
+        compiled = {
+            name: self.compile(f) if isinstance(f, str) else f
+            for name, f in formulas.items()
+        }
+        # Keep only intermediates that occur more than once in the batch;
+        # holding on to every temporary costs more than it saves.
+        memo, keep = {}, _repeated_nodes(f.tree for f in compiled.values())
+        results = {}
+        for name, f in compiled.items():
+            t0 = time.perf_counter()
+            results[name] = self._to_series(self._eval(f.tree, memo, keep)).rename(name)
+            if timings is not None:
+                timings[name] = time.perf_counter() - t0
+        return results
+
+    def _to_series(self, result) -> pd.Series:
+        grid = np.broadcast_to(result, self.index.grid_shape)
+        return pd.Series(self.index.from_grid(grid), index=self.panel.index)
+
+    def _column(self, name: str) -> np.ndarray:
+        if self.cube is not None and name in self.cube:
+            return self.cube.grid(name).astype(np.float64, copy=False)
+        return self.index.to_grid(self.panel[name].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    # ---- tree walk ----
+    def _eval(self, node: tuple, memo: dict, keep: set = None):
+        if node in memo:
+            return memo[node]
+        kind = node[0]
+
+        if kind == "num":
+            return node[1]
+        if kind == "col":
+            value = self._column(node[1])
+        else:
+            with np.errstate(all="ignore"):
+                value = self._apply(node, memo, keep)
+
+        # keep=None memoizes everything (single formulas)
+        if keep is None or node in keep:
+            memo[node] = value
+        return value
+
+    def _apply(self, node: tuple, memo: dict, keep: set):
+        kind = node[0]
+
+        if kind == "bin":
+            _, op, left, right = node
+            a, b = self._eval(left, memo, keep), self._eval(right, memo, keep)
+            if op == "+":
+                return a + b
+            if op == "-":
+                return a - b
+            if op == "*":
+                return a * b
+            if op == "/":
+                return np.divide(a, b)
+            return np.power(a, b)
+
+        if kind == "neg":
+            return -self._eval(node[1], memo, keep)
+
+        if kind == "func":
+            return _UFUNCS[node[1]](self._eval(node[2], memo, keep))
+
+        # time operations need a grid even if the argument is a constant
+        x = np.broadcast_to(self._eval(node[-1], memo, keep), self.index.grid_shape)
+
+        if kind == "shift":
+            return _shift_grid(x, node[1])
+
+        if kind == "rolling":
+            return _rolling_grid(x, node[1], node[2])
+
+        if kind == "nth":
+            # k-th existing row of each country (negative k counts from the end)
+            k = node[1]
+            counts = self._present.sum(axis=1)
+            target = k if k >= 0 else counts + k
+            rank = np.cumsum(self._present, axis=1) - 1
+            hit = self._present & (rank == np.reshape(target, (-1, 1)))
+            found = hit.any(axis=1)
+            pos = hit.argmax(axis=1)
+            values = np.where(found, x[np.arange(len(x)), pos], np.nan)
+            return values[:, None]
+
+        if kind == "index":
+            col = node[1] - self.index.year_min
+            if not 0 <= col < x.shape[1]:
+                raise FormulaError(f"Base year {node[1]} is outside the data.")
+            return 100.0 * x / x[:, col:col + 1]
+
+        raise FormulaError(f"Cannot evaluate node '{kind}'.")
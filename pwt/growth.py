@@ -0,0 +1,274 @@
+"""
+Growth accounting and income convergence.
+
+Growth accounting splits output growth into the contributions of capital,
+labour, human capital and TFP, as in PWT's own productivity measures:
+
+    Y = A K^(1 - s) (h E)^s
+
+with Y real GDP at national prices (rgdpna), K the capital stock (rnna),
+E persons engaged (emp), h the human capital index (hc) and s the labour
+share (labsh). In log differences, with s averaged over the two years
+(a Tornqvist index), each year's growth is
+
+    dlnY = (1 - s) dlnK + s dlnE + s dlnh + dlnA
+
+and TFP growth dlnA is the residual. PWT's rtfpna growth is reported next
+to it as a check.
+
+`GrowthAccounting` computes these annual terms for every country and year
+at once on the cube's countries x years arrays, and keeps their running
+sums, so the average over any period is the difference of two columns; a
+term is reported for a period only if it is observed in every year of it.
+
+`Convergence` regresses average growth of log income between two years on
+its starting level across countries (beta convergence: a negative slope
+means poorer countries grew faster) for every pair of start and end years
+at once, and tracks the cross-country standard deviation of log income
+(sigma convergence: falling dispersion).
+
+Both are built once per dataset version and shared.
+
+    python benchmarks/bench_growth.py
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pwt.cube import PanelCube, get_cube
+from pwt.data import Dataset, get_dataset, versioned
+
+# role: column
+INPUTS = {
+    "output": "rgdpna",
+    "capital": "rnna",
+    "labour": "emp",
+    "human capital": "hc",
+    "labour share": "labsh",
+    "tfp (PWT)": "rtfpna",
+}
+
+# reported terms, in display order; "tfp" is the residual
+TERMS = ["output", "capital", "labour", "human capital", "tfp", "tfp (PWT)"]
+
+# label: (numerator, denominator) of the income measure
+MEASURES = {
+    "GDP per capita (PPP)": ("rgdpo", "pop"),
+    "GDP per worker (PPP)": ("rgdpo", "emp"),
+    "GDP per capita (national prices)": ("rgdpna", "pop"),
+}
+
+
+def _log(grid: np.ndarray) -> np.ndarray:
+    """Natural log, NaN where the value is missing or not positive."""
+    grid = np.asarray(grid, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(grid > 0, np.log(grid), np.nan)
+
+
+def _dlog(grid: np.ndarray) -> np.ndarray:
+    """Year-on-year log change along axis 1; the first year is NaN."""
+    out = np.full(grid.shape, np.nan)
+    out[:, 1:] = np.diff(_log(grid), axis=1)
+    return out
+
+
+class GrowthAccounting:
+    """Annual growth contributions (log points) for every country and year, with running sums."""
+
+    def __init__(self, cube: PanelCube):
+        missing = [c for c in INPUTS.values() if c not in cube]
+        if missing:
+            raise KeyError(f"Growth accounting needs the columns {', '.join(missing)}.")
+        self.countries = cube.countries
+        self.years = cube.years
+        self._attributes = {}
+        for name in ("region", "incgroup"):
+            try:
+                self._attributes[name] = cube.attribute(name)
+            except KeyError:
+                continue
+
+        share = cube.grid(INPUTS["labour share"]).astype(np.float64)
+        s = np.full(share.shape, np.nan)
+        s[:, 1:] = (share[:, 1:] + share[:, :-1]) / 2
+
+        d = {role: _dlog(cube.grid(col)) for role, col in INPUTS.items() if role != "labour share"}
+        annual = {
+            "output": d["output"],
+            "capital": (1 - s) * d["capital"],
+            "labour": s * d["labour"],
+            "human capital": s * d["human capital"],
+        }
+        annual["tfp"] = annual["output"] - annual["capital"] - annual["labour"] - annual["human capital"]
+        annual["tfp (PWT)"] = d["tfp (PWT)"]
+
+        # (terms, countries, years); a term's running sum over years, and
+        # the running count of years it is missing
+        self.annual = np.stack([annual[t] for t in TERMS])
+        observed = np.isfinite(self.annual)
+        self._sums = np.cumsum(np.where(observed, self.annual, 0.0), axis=2)
+        self._gaps = np.cumsum(~observed, axis=2)
+
+    @property
+    def nbytes(self) -> int:
+        return self.annual.nbytes + self._sums.nbytes + self._gaps.nbytes
+
+    def _columns(self, years) -> np.ndarray:
+        cols = np.asarray(years, dtype=np.int64) - int(self.years[0])
+        if ((cols < 0) | (cols >= len(self.years))).any():
+            raise ValueError(f"Years must lie in {self.years[0]}-{self.years[-1]}.")
+        return cols
+
+    def average(self, starts, ends) -> np.ndarray:
+        """
+        (terms, countries, periods) average annual growth over each period
+        from starts[k] to ends[k], in log points; NaN where a year is missing.
+        """
+        i, j = self._columns(starts), self._columns(ends)
+        span = (j - i).astype(np.float64)
+        if (span <= 0).any():
+            raise ValueError("Each period must end after it starts.")
+        total = self._sums[:, :, j] - self._sums[:, :, i]
+        gaps = self._gaps[:, :, j] - self._gaps[:, :, i]
+        return np.where(gaps == 0, total / span, np.nan)
+
+    def periods(self, starts, ends, country=None) -> pd.DataFrame:
+        """
+        Long table (country, region, incgroup, start, end, TERMS) of average
+        annual growth in percent for each period and country (None: all);
+        rows without output growth are left out.
+        """
+        starts, ends = np.atleast_1d(starts), np.atleast_1d(ends)
+        values = self.average(starts, ends) * 100
+        rows = np.arange(len(self.countries))
+        if country is not None:
+            rows = rows[np.isin(self.countries, list(country))]
+        values = values[:, rows]
+        n_periods = len(starts)
+
+        data = {"country": np.repeat(self.countries[rows], n_periods)}
+        for name, attribute in self._attributes.items():
+            data[name] = np.repeat(np.asarray(attribute, dtype=object)[rows], n_periods)
+        data["start"] = np.tile(starts, len(rows))
+        data["end"] = np.tile(ends, len(rows))
+        for t, term in enumerate(TERMS):
+            data[term] = values[t].reshape(-1)
+        out = pd.DataFrame(data)
+        return out[out["output"].notna()].reset_index(drop=True)
+
+    def decades(self, country=None) -> pd.DataFrame:
+        """`periods` for each full decade in the data (1950-1960, 1960-1970, ...)."""
+        first = -(-int(self.years[0]) // 10) * 10
+        starts = np.arange(first, int(self.years[-1]) - 9, 10)
+        return self.periods(starts, starts + 10, country)
+
+
+class Convergence:
+    """Beta and sigma convergence of one income measure across a set of countries."""
+
+    def __init__(self, cube: PanelCube, measure: str, region=None):
+        numerator, denominator = MEASURES[measure]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            income = cube.grid(numerator).astype(np.float64) / cube.grid(denominator)
+        rows = np.arange(len(cube.countries))
+        if region is not None:
+            rows = rows[np.isin(np.asarray(cube.attribute("region"), dtype=object), list(region))]
+        self.measure = measure
+        self.countries = cube.countries[rows]
+        self.years = cube.years
+        self.log_income = _log(income[rows])
+
+        self.sigma = self._sigma()
+        self.beta = self._beta()
+
+    def _sigma(self) -> pd.DataFrame:
+        """Per year: cross-country standard deviation of log income and the count."""
+        x = self.log_income
+        observed = np.isfinite(x)
+        n = observed.sum(axis=0)
+        filled = np.where(observed, x, 0.0)
+        mean = filled.sum(axis=0) / np.maximum(n, 1)
+        ss = (np.where(observed, x - mean, 0.0) ** 2).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sd = np.where(n >= 2, np.sqrt(ss / (n - 1)), np.nan)
+        return pd.DataFrame({"year": self.years, "sigma": sd, "n": n})
+
+    def _beta(self) -> pd.DataFrame:
+        """
+        Every start < end: OLS of average annual log growth between them on
+        the starting log income, over countries observed in both years.
+        """
+        x = self.log_income                              # (countries, years)
+        years = self.years.astype(np.float64)
+        span = years[None, :] - years[:, None]           # (start, end)
+        later = span > 0
+
+        # growth[c, i, j]: average annual log growth of country c from year i to j
+        with np.errstate(invalid="ignore", divide="ignore"):
+            growth = (x[:, None, :] - x[:, :, None]) / np.where(later, span, np.nan)[None]
+        start = np.broadcast_to(x[:, :, None], growth.shape)
+        used = np.isfinite(growth) & np.isfinite(start)
+
+        n = used.sum(axis=0)
+        g = np.where(used, growth, 0.0)
+        s = np.where(used, start, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_s = s.sum(axis=0) / n
+            mean_g = g.sum(axis=0) / n
+            ds = np.where(used, start - mean_s, 0.0)
+            dg = np.where(used, growth - mean_g, 0.0)
+            sxx = (ds * ds).sum(axis=0)
+            sxy = (ds * dg).sum(axis=0)
+            syy = (dg * dg).sum(axis=0)
+            beta = sxy / sxx
+            sse = np.maximum(syy - beta * sxy, 0.0)
+            se = np.sqrt(sse / (n - 2) / sxx)
+            r2 = 1 - sse / syy
+            # implied speed: the share of the gap closed per year
+            speed = -np.log1p(beta * span) / span
+
+        i, j = np.nonzero(later & (n >= 3) & (sxx > 0))
+        return pd.DataFrame({
+            "start": self.years[i],
+            "end": self.years[j],
+            "beta": beta[i, j],
+            "se": se[i, j],
+            "speed": speed[i, j],
+            "r2": r2[i, j],
+            "n": n[i, j],
+        })
+
+    def regression(self, start: int, end: int) -> dict:
+        """The beta row for `start`-`end` (as a dict), or None if too few countries."""
+        row = self.beta[(self.beta["start"] == start) & (self.beta["end"] == end)]
+        return None if row.empty else row.iloc[0].to_dict()
+
+    def points(self, start: int, end: int) -> pd.DataFrame:
+        """Per country: starting log income and average annual growth (percent) from `start` to `end`."""
+        i, j = int(start) - int(self.years[0]), int(end) - int(self.years[0])
+        x = self.log_income
+        out = pd.DataFrame({
+            "country": self.countries,
+            "log_start": x[:, i],
+            "growth": (x[:, j] - x[:, i]) / (end - start) * 100,
+        })
+        return out.dropna().reset_index(drop=True)
+
+
+@versioned
+def get_growth_accounting(dataset: Dataset) -> GrowthAccounting:
+    """The shared growth accounting for `dataset` (default: the current version)."""
+    return GrowthAccounting(get_cube(dataset))
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _build_convergence(version: str, measure: str, region: tuple, _dataset: Dataset) -> Convergence:
+    return Convergence(get_cube(_dataset), measure, region)
+
+
+def get_convergence(measure: str, region=None, dataset: Dataset = None) -> Convergence:
+    """Shared convergence results for `measure` over the countries of `region` (None: all)."""
+    dataset = dataset or get_dataset()
+    region = None if region is None else tuple(sorted(region))
+    return _build_convergence(dataset.version, measure, region, dataset)
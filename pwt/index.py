@@ -0,0 +1,177 @@
+"""
+Country/region/year index over the shared panel.
+
+The base panel is sorted by (country, year), so every country is one
+contiguous block of rows. `PanelIndex` records where each block starts and
+ends, and a monotonic (block, year) key, so a filter becomes a handful of
+binary searches and range concatenations: the cost scales with the rows
+selected instead of a `DataFrame.query` scan over the whole panel.
+
+It is built once per dataset version and shared by every session. Row
+positions also apply to `session_panel()`, which has the base row order.
+"""
+import numpy as np
+import pandas as pd
+
+from pwt.data import Dataset, versioned
+
+
+def _concat_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenate [start, stop) ranges into one position array, vectorized."""
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.intp)
+    # offset of each range relative to where it lands in the output
+    shift = starts - np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return np.arange(total, dtype=np.intp) + np.repeat(shift, lengths)
+
+
+class PanelIndex:
+    """Row-offset tables for a panel sorted by (country, year)."""
+
+    def __init__(self, panel: pd.DataFrame):
+        country = panel["country"].astype(str).to_numpy()
+        years = panel["year"].to_numpy(dtype=np.int64)
+        n = len(panel)
+
+        if n:
+            starts = np.flatnonzero(np.r_[True, country[1:] != country[:-1]])
+        else:
+            starts = np.empty(0, dtype=np.intp)
+        stops = np.r_[starts[1:], n].astype(np.intp)
+
+        self.n_rows = n
+        self.countries = country[starts].tolist()
+        if len(set(self.countries)) != len(self.countries):
+            raise ValueError("Panel must be sorted by country to be indexed.")
+
+        self._starts = starts.astype(np.intp)
+        self._stops = stops
+        self._block = {c: i for i, c in enumerate(self.countries)}
+
+        # countries per region (a country has a single region in PWT)
+        regions = panel["region"].astype(str).to_numpy()[starts]
+        self.regions = {}
+        for block, region in enumerate(regions):
+            self.regions.setdefault(region, []).append(block)
+        self.regions = {r: np.asarray(b, dtype=np.intp) for r, b in self.regions.items()}
+
+        self._years = years
+        self.year_min = int(years.min()) if n else 0
+        self.year_max = int(years.max()) if n else 0
+        self._span = self.year_max - self.year_min + 1
+
+        # (block, year) key; monotonic because rows are sorted by country, year
+        block_of_row = np.repeat(np.arange(len(starts)), stops - starts)
+        self._key = block_of_row * self._span + (years - self.year_min)
+        if n and np.any(np.diff(self._key) <= 0):
+            raise ValueError("Panel must be sorted by (country, year) to be indexed.")
+
+        # balanced panel: the grid below is a plain reshape of the rows
+        self.dense = n == len(starts) * self._span
+
+        # option lists for the pages' filters, built once per version
+        self.country_options = sorted(self.countries)
+        self.region_options = list(self.regions)
+        self.year_options = np.unique(years).tolist()
+
+    # ---- block selection ----
+    def block(self, country: str) -> int:
+        """Block id of `country`: its position in `countries` (and its row of the grid)."""
+        return self._block[country]
+
+    def blocks(self, country=None, region=None) -> np.ndarray:
+        """Sorted block ids for the chosen countries and/or regions."""
+        if country is None:
+            blocks = np.arange(len(self.countries), dtype=np.intp)
+        else:
+            blocks = np.fromiter(
+                (self._block[c] for c in country if c in self._block),
+                dtype=np.intp,
+            )
+        if region is not None:
+            in_region = [self.regions[r] for r in region if r in self.regions]
+            allowed = np.concatenate(in_region) if in_region else np.empty(0, np.intp)
+            blocks = np.intersect1d(blocks, allowed)
+        return np.unique(blocks)
+
+    # ---- public API ----
+    def select(self, country=None, region=None, year=None, year_range=None) -> np.ndarray:
+        """
+        Row positions matching every given filter (None means no filter).
+
+        - country, region: iterables of names
+        - year: iterable of years
+        - year_range: (start, end), inclusive
+        Positions come back in panel order, like `DataFrame.query` would.
+        """
+        blocks = self.blocks(country, region)
+        starts, stops = self._starts[blocks], self._stops[blocks]
+
+        if year_range is not None:
+            lo_year = max(int(year_range[0]), self.year_min) - self.year_min
+            hi_year = min(int(year_range[1]), self.year_max) - self.year_min
+            if hi_year < lo_year:
+                return np.empty(0, dtype=np.intp)
+            base = blocks * self._span
+            starts = np.searchsorted(self._key, base + lo_year, side="left")
+            stops = np.searchsorted(self._key, base + hi_year, side="right")
+
+        rows = _concat_ranges(starts, stops)
+
+        if year is not None:
+            wanted = np.zeros(self._span, dtype=bool)
+            year = np.asarray(list(year), dtype=np.int64) - self.year_min
+            wanted[year[(year >= 0) & (year < self._span)]] = True
+            rows = rows[wanted[self._years[rows] - self.year_min]]
+
+        return rows
+
+    # ---- country x year grid ----
+    @property
+    def grid_shape(self) -> tuple:
+        """(countries, years) of the rectangular grid covering the panel."""
+        return len(self.countries), self._span
+
+    @property
+    def grid_years(self) -> np.ndarray:
+        return np.arange(self.year_min, self.year_max + 1)
+
+    def row_grid(self) -> np.ndarray:
+        """Panel row of each grid cell, countries x years (-1 where no row)."""
+        if self.dense:
+            return np.arange(self.n_rows, dtype=np.intp).reshape(self.grid_shape)
+        rows = np.full(self.grid_shape[0] * self._span, -1, dtype=np.intp)
+        rows[self._key] = np.arange(self.n_rows)
+        return rows.reshape(self.grid_shape)
+
+    def to_grid(self, values: np.ndarray) -> np.ndarray:
+        """Lay a per-row array out as countries x years (NaN where no row)."""
+        values = np.asarray(values, dtype=np.float64)
+        if self.dense:
+            return values.reshape(self.grid_shape)
+        grid = np.full(self.grid_shape[0] * self._span, np.nan)
+        grid[self._key] = values
+        return grid.reshape(self.grid_shape)
+
+    def from_grid(self, grid: np.ndarray) -> np.ndarray:
+        """Inverse of `to_grid`: back to one value per panel row."""
+        flat = np.asarray(grid).reshape(-1)
+        return flat if self.dense else flat[self._key]
+
+    def take(self, frame: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+        """Rows of `frame` (base-ordered panel) at the given positions."""
+        if len(rows) == self.n_rows:
+            return frame
+        return frame.iloc[rows]
+
+    def filter(self, frame: pd.DataFrame, **filters) -> pd.DataFrame:
+        """Shorthand for `take(frame, select(**filters))`."""
+        return self.take(frame, self.select(**filters))
+
+
+@versioned
+def get_index(dataset: Dataset) -> PanelIndex:
+    """The shared index for `dataset` (default: the current version)."""
+    return PanelIndex(dataset.panel)
@@ -0,0 +1,87 @@
+"""
+Byte-bounded LRU cache shared by the process-wide caches in this package.
+"""
+import threading
+from collections import OrderedDict
+
+
+class ByteLRU:
+    """
+    Thread-safe LRU of {key: value}, evicting least-recently-used entries
+    once the summed `sizeof(value)` exceeds `max_bytes`. Counts hits,
+    misses, evictions and the build time reported through `put`.
+    """
+
+    def __init__(self, max_bytes: int, sizeof):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compute_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached value for `key`, or None (counted as a miss)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, seconds: float = 0.0):
+        """
+        Store a freshly built value and return the cached one: if another
+        thread stored the same key meanwhile, theirs is kept.
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            self.compute_seconds += seconds
+            if key in self._entries:
+                return self._entries[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            # keep at least the newest entry even if it alone exceeds the budget
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                old, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old)
+                self.evictions += 1
+        return value
+
+    def discard(self, predicate) -> int:
+        """Drop the entries whose key satisfies `predicate`; returns how many."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+                self.nbytes -= self._sizes.pop(key)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "compute seconds": round(self.compute_seconds, 3),
+            }
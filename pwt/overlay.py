@@ -0,0 +1,133 @@
+"""
+Per-session custom variables layered over the shared base panel.
+
+A session never copies the base panel. Its custom variables are kept as a
+small {name: Series} side table, and `SessionOverlay.view` joins them onto
+the base as extra columns. The joined frame shares the base's column data
+(pandas copy-on-write): writing to it copies the touched column and leaves
+the base untouched. The view is cached until the overlay or the dataset
+version changes, so adding a variable costs one column of memory.
+
+Columns are aligned with one dataset version (`version`). When a new
+version is swapped in, pwt/reload.py re-evaluates the formulas and
+`rebase`s the overlay onto it.
+"""
+import pandas as pd
+
+
+class SessionOverlay:
+    """Custom-variable columns of one session."""
+
+    def __init__(self, version: str = None):
+        self.version = version
+        self._columns = {}
+        self._formulas = {}
+        self._sources = {}
+        self._revision = 0
+        self._view = None
+        self._view_key = None
+
+    def __contains__(self, name) -> bool:
+        return name in self._columns
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    @property
+    def names(self) -> list:
+        """Custom variable names, in creation order."""
+        return list(self._columns)
+
+    @property
+    def revision(self) -> int:
+        """Bumped on every add/remove; part of the view's cache key."""
+        return self._revision
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(s.memory_usage(index=False) for s in self._columns.values()))
+
+    @property
+    def definitions(self) -> dict:
+        """{name: canonical formula tree} for variables built from a formula."""
+        return dict(self._formulas)
+
+    @property
+    def sources(self) -> dict:
+        """{name: formula text as the user wrote it}, where known."""
+        return dict(self._sources)
+
+    def column_key(self, name: str):
+        """
+        Hashable identity of a column's data, for cache keys: the name for
+        base columns, the formula tree for custom ones.
+        """
+        if name in self._formulas:
+            return ("custom", self._formulas[name])
+        if name in self._columns:
+            return ("custom", name, id(self._columns[name]))
+        return name
+
+    def get(self, name: str) -> pd.Series:
+        return self._columns[name]
+
+    def add(self, name: str, values, base: pd.DataFrame, tree: tuple = None, source: str = None) -> pd.Series:
+        """
+        Store `values` (Series or scalar) as column `name`, optionally with
+        the formula tree it was computed from and the formula's text.
+
+        A Series already aligned with the base is kept by reference (it may
+        be shared with other sessions through the derived-variable cache).
+        Raises ValueError if the name clashes with a base column.
+        """
+        if name in base.columns:
+            raise ValueError(f"'{name}' is a column of the base dataset.")
+        if isinstance(values, pd.Series) and values.index.equals(base.index):
+            series = values.rename(name)
+        else:
+            series = pd.Series(values, index=base.index, name=name)
+        self._columns[name] = series
+        if tree is not None:
+            self._formulas[name] = tree
+        else:
+            self._formulas.pop(name, None)
+        if source is not None:
+            self._sources[name] = source
+        else:
+            self._sources.pop(name, None)
+        self._revision += 1
+        return series
+
+    def remove(self, names) -> list:
+        """Drop the given custom variables; returns the names actually removed."""
+        removed = [n for n in names if self._columns.pop(n, None) is not None]
+        for name in removed:
+            self._formulas.pop(name, None)
+            self._sources.pop(name, None)
+        if removed:
+            self._revision += 1
+        return removed
+
+    def rebase(self, version: str) -> None:
+        """Drop every custom variable and align the overlay with `version`."""
+        self._columns.clear()
+        self._formulas.clear()
+        self._sources.clear()
+        self.version = version
+        self._revision += 1
+
+    def view(self, base: pd.DataFrame, version: str) -> pd.DataFrame:
+        """
+        Base panel plus the custom columns, sharing the base's memory.
+        Columns of another dataset version are left out until the overlay
+        is rebased.
+        """
+        key = (version, self._revision)
+        if self._view_key != key:
+            if self._columns and version == self.version:
+                side = pd.DataFrame(self._columns, index=base.index)
+                self._view = pd.concat([base, side], axis=1)
+            else:
+                self._view = base
+            self._view_key = key
+        return self._view
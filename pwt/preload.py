@@ -0,0 +1,103 @@
+"""
+Background warm-up of the shared data.
+
+Without it the first session to reach a fresh server parses the workbook
+(or the columnar cache) inside its own script run, then builds the row
+index, the cube, the group aggregates and the variable catalog, while the
+browser shows a blank page. `start_preload` runs those same steps on a background thread the
+first time any script runs in the process, and Main.py shows a progress
+bar until they are done.
+
+Every step goes through the `st.cache_resource` function pages already
+use, so nothing is loaded twice: a session that asks for the dataset
+while the thread is still reading it waits on the same computation (one
+lock per cache key) instead of starting its own parse.
+"""
+import logging
+import threading
+import time
+
+import streamlit as st
+
+from pwt.aggregate import get_aggregates
+from pwt.catalog import base_variables
+from pwt.cube import get_cube
+from pwt.data import get_dataset
+from pwt.index import get_index
+
+# (progress message, loader), in order
+STEPS = [
+    ("Loading Penn World Table data", get_dataset),
+    ("Indexing countries and years", get_index),
+    ("Building country x year arrays", get_cube),
+    ("Aggregating regions and income groups", get_aggregates),
+    ("Reading variable labels", base_variables),
+]
+
+
+
+class _BackgroundThreadFilter(logging.Filter):
+    # Cached functions called off the script thread log "missing
+    # ScriptRunContext" every time; expected for the pwt-* threads
+    # (this module's and pwt/reload.py's).
+    def filter(self, record) -> bool:
+        return not record.threadName.startswith("pwt-")
+
+
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    _BackgroundThreadFilter()
+)
+
+
+class Preloader:
+    """Runs STEPS once on a daemon thread; thread-safe progress and result."""
+
+    def __init__(self, steps=STEPS):
+        self.steps = steps
+        self._done = threading.Event()
+        self._step = 0
+        self.error = None
+        self.seconds = None
+        self._thread = threading.Thread(target=self._run, name="pwt-preload", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            for i, (_, load) in enumerate(self.steps):
+                self._step = i
+                load()
+            self._step = len(self.steps)
+        except Exception as e:  # surfaced on the page by `check`
+            self.error = e
+        finally:
+            self.seconds = time.perf_counter() - t0
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def progress(self) -> tuple:
+        """(fraction done, message of the running step)."""
+        step = self._step
+        if step >= len(self.steps):
+            return 1.0, "Ready"
+        return step / len(self.steps), self.steps[step][0] + "..."
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block up to `timeout` seconds; True once the warm-up has finished."""
+        return self._done.wait(timeout)
+
+    def check(self) -> None:
+        """Re-raise the warm-up's error, if it failed; the next call retries."""
+        if self.error is not None:
+            start_preload.clear()
+            raise self.error
+
+
+@st.cache_resource(show_spinner=False)
+def start_preload() -> Preloader:
+    """The process's preloader, started on first call."""
+    return Preloader()
@@ -0,0 +1,164 @@
+"""
+Hot reload of the dataset when gdppaneldata.xlsx is replaced.
+
+A `Reloader` thread polls the workbook's modification time every
+`RELOAD_INTERVAL` seconds. When it changes (and has stayed put for one
+poll, so a file still being copied is not read half-written), the thread
+builds the new version in the background - parse through the columnar
+cache, row index, cube, aggregates, growth accounting, variable labels -
+and only then swaps it into the `DatasetStore` in one step. Sessions keep
+using the old version until the swap and see the new one on their next
+rerun; nobody is disconnected.
+
+After a swap, entries of the old version are dropped from the shared
+caches (derived variables, figures, animation frames, correlations,
+downloads, trendlines). Each session's custom variables are migrated on
+its next rerun by `migrate_session`, which re-evaluates their formulas
+against the new version.
+
+Set PWT_RELOAD_INTERVAL=0 to turn watching off.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+from pwt.aggregate import get_aggregates
+from pwt.animate import get_frame_cache
+from pwt.batch import import_definitions
+from pwt.catalog import base_variables
+from pwt.correlate import get_correlation_cache
+from pwt.cube import get_cube
+from pwt.data import DATA_FILE, get_dataset, get_store, session_overlay
+from pwt.derived import get_derived_cache
+from pwt.export import get_export_cache
+from pwt.figcache import get_figure_cache
+from pwt.growth import get_growth_accounting
+from pwt.index import get_index
+from pwt.trend import fit_trendlines
+
+RELOAD_INTERVAL = float(os.environ.get("PWT_RELOAD_INTERVAL", "5"))
+
+# Reloads kept for display.
+HISTORY = 10
+
+# Shared structures built for a new version before it is swapped in.
+WARMERS = [get_index, get_cube, get_aggregates, get_growth_accounting, base_variables]
+
+
+def invalidate(version: str) -> int:
+    """Drop cached entries of dataset `version`; returns how many."""
+    dropped = get_derived_cache().discard(lambda key: key[0] == version)
+    dropped += get_export_cache().discard(lambda key: key[0] == version)
+    dropped += get_figure_cache().discard(lambda key: key[1] == version)
+    dropped += get_frame_cache().discard(lambda key: key[0] == version)
+    dropped += get_correlation_cache().discard(lambda key: key[0] == version)
+    fit_trendlines.clear()
+    return dropped
+
+
+class Reloader:
+    """Watches the store's workbook on a daemon thread and swaps in new versions."""
+
+    def __init__(self, store, interval: float = RELOAD_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self.status = "watching"
+        self.history = deque(maxlen=HISTORY)
+        self._seen = None          # mtime at the previous poll
+        self._failed = None        # mtime whose build failed (not retried)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="pwt-reload", daemon=True)
+        if interval > 0:
+            self._thread.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def poll(self) -> bool:
+        """Check the workbook once; True if a new version was swapped in."""
+        try:
+            mtime = self.store.path.stat().st_mtime_ns
+        except OSError:
+            return False  # e.g. being replaced right now
+        seen, self._seen = self._seen, mtime
+        if self.store.mtime_ns is None:
+            return False  # not loaded yet
+        if mtime in (self.store.mtime_ns, self._failed) or mtime != seen:
+            return False
+        with self._lock:
+            return self._reload(mtime)
+
+    def _reload(self, mtime: int) -> bool:
+        self.status = "building"
+        t0 = time.perf_counter()
+        try:
+            dataset = self.store.read()
+            if dataset.version == self.store.current.version:
+                # touched, same contents
+                self.store.mtime_ns = mtime
+                self.status = "watching"
+                return False
+            for warm in WARMERS:
+                warm(dataset)
+        except Exception as e:
+            self._failed = mtime
+            self.status = f"failed: {type(e).__name__}: {e}"
+            self.history.appendleft({
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "version": "",
+                "seconds": round(time.perf_counter() - t0, 2),
+                "result": self.status,
+            })
+            return False
+
+        old = self.store.swap(dataset, mtime)
+        dropped = invalidate(old.version)
+        self.status = "watching"
+        self.history.appendleft({
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "version": dataset.version,
+            "seconds": round(time.perf_counter() - t0, 2),
+            "result": f"replaced {old.version}, {dropped} cached entries dropped",
+        })
+        return True
+
+
+@st.cache_resource(show_spinner=False)
+def start_reloader() -> Reloader:
+    """The process's workbook watcher, started on first call."""
+    return Reloader(get_store(str(DATA_FILE)))
+
+
+def migrate_session() -> tuple:
+    """
+    Move this session's custom variables onto the current dataset version.
+
+    Formulas are re-evaluated in one batch (through the shared derived
+    cache, so sessions with the same formulas share the work). Returns
+    (carried, dropped): the names carried over and {name: reason} for the
+    ones that could not be; both empty if nothing had to move.
+    """
+    dataset = get_dataset()
+    overlay = session_overlay()
+    if overlay.version == dataset.version:
+        return [], {}
+
+    names, sources = overlay.names, overlay.sources
+    overlay.rebase(dataset.version)
+    if not names:
+        return [], {}
+
+    report, carried = import_definitions([(n, sources[n]) for n in names if n in sources])
+    dropped = {n: "No formula to re-evaluate." for n in names if n not in sources}
+    for row in report.itertuples():
+        if row.variable not in carried:
+            dropped[row.variable] = row.message
+    return carried, dropped
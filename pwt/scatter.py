@@ -0,0 +1,89 @@
+"""
+Keeping the scatter plot's payload bounded.
+
+Selecting every country and year puts ~9k bubbles in one figure. Two things
+keep that manageable:
+
+- `render_mode` switches Plotly to WebGL (scattergl) above a point
+  threshold, which the browser draws far faster than SVG markers;
+- `decade_means` and `binned_density` aggregate on the server, so the
+  figure holds at most one point per country-decade or per 2-D bin no
+  matter how large the selection is.
+"""
+import numpy as np
+import pandas as pd
+
+# Above this many points the figure is drawn with WebGL instead of SVG.
+WEBGL_THRESHOLD = 1000
+
+# Bins per axis for the density view (at most DENSITY_BINS**2 points).
+DENSITY_BINS = 40
+
+POINT_MODES = ["All points", "Country-decade means", "Binned density"]
+
+
+def render_mode(n_points: int) -> str:
+    """Plotly Express render_mode for a scatter of `n_points` markers."""
+    return "webgl" if n_points > WEBGL_THRESHOLD else "svg"
+
+
+def decade_means(df: pd.DataFrame, x: str, y: str, size: str = None) -> pd.DataFrame:
+    """One row per country and decade, with the mean of x, y (and size)."""
+    values = [c for c in dict.fromkeys([x, y, size]) if c is not None]
+    decade = (df["year"].astype(int) // 10) * 10
+    out = (
+        df.assign(decade=decade)
+        .groupby(["country", "region", "decade"], observed=True, sort=False)[values]
+        .mean()
+        .reset_index()
+    )
+    out["country"] = out["country"].astype(str) + " (" + out["decade"].astype(str) + "s)"
+    return out
+
+
+def _edges(values: np.ndarray, bins: int, log: bool) -> np.ndarray:
+    lo, hi = values.min(), values.max()
+    if hi <= lo:
+        # all values equal: a single bin around them
+        return np.array([lo * 0.999, hi * 1.001]) if log else np.array([lo - 0.5, hi + 0.5])
+    if log:
+        return np.logspace(np.log10(lo), np.log10(hi), bins + 1)
+    return np.linspace(lo, hi, bins + 1)
+
+
+def _centres(edges: np.ndarray, log: bool) -> np.ndarray:
+    # geometric centres on log axes so markers sit in the middle of the cell
+    return np.sqrt(edges[:-1] * edges[1:]) if log else (edges[:-1] + edges[1:]) / 2
+
+
+def binned_density(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    bins: int = DENSITY_BINS,
+    xlog: bool = False,
+    ylog: bool = False,
+) -> pd.DataFrame:
+    """
+    Count points in a bins x bins grid (log-spaced on log axes) and return
+    the non-empty cells as rows of (x, y, count) at the cell centres.
+    """
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    keep = np.isfinite(xs) & np.isfinite(ys)
+    if xlog:
+        keep &= xs > 0
+    if ylog:
+        keep &= ys > 0
+    xs, ys = xs[keep], ys[keep]
+    if xs.size == 0:
+        return pd.DataFrame({x: [], y: [], "count": []})
+
+    x_edges = _edges(xs, bins, xlog)
+    y_edges = _edges(ys, bins, ylog)
+    counts, _, _ = np.histogram2d(xs, ys, bins=[x_edges, y_edges])
+
+    x_mid, y_mid = _centres(x_edges, xlog), _centres(y_edges, ylog)
+
+    ix, iy = np.nonzero(counts)
+    return pd.DataFrame({x: x_mid[ix], y: y_mid[iy], "count": counts[ix, iy].astype(int)})
@@ -0,0 +1,97 @@
+"""
+Memory layout of the panel.
+
+`apply_schema` turns the panel as read from the workbook into its compact
+in-memory form:
+
+- country, region, incgroup: categoricals (one small integer code per row
+  instead of a repeated string)
+- year: int16
+- indicators: float64, or float32 when PWT_FLOAT32=1
+
+Float32 precision
+-----------------
+float32 keeps a 24-bit significand, so each stored value carries a relative
+rounding error of at most 2**-24 (about 6e-8), i.e. roughly 7 significant
+digits. That is far below the precision PWT itself reports, but it is not
+bit-identical: differences of nearly equal large numbers, and long chains of
+custom formulas, can lose more. `float32_error` measures the worst case on
+the actual data; `FLOAT32_RTOL` is the bound it is checked against.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Set PWT_FLOAT32=1 to store indicators as float32 (half the memory).
+FLOAT32 = os.environ.get("PWT_FLOAT32", "") not in ("", "0")
+
+FLOAT32_RTOL = 2.0 ** -24
+
+# Identifier columns stored as categoricals instead of repeated strings.
+CATEGORY_COLUMNS = ["country", "region", "incgroup"]
+
+YEAR_DTYPE = np.int16
+
+
+def apply_schema(panel: pd.DataFrame, float32: bool = FLOAT32) -> pd.DataFrame:
+    """Return `panel` with the compact dtypes described above."""
+    panel = panel.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in panel.columns:
+            panel[col] = panel[col].astype("category")
+    if "year" in panel.columns:
+        panel["year"] = panel["year"].astype(YEAR_DTYPE)
+    if float32:
+        floats = panel.select_dtypes(include="float64").columns
+        panel[floats] = panel[floats].astype(np.float32)
+    return panel
+
+
+def default_layout(panel: pd.DataFrame) -> pd.DataFrame:
+    """The layout a plain `read_excel` gives: object strings, int64, float64."""
+    panel = panel.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in panel.columns:
+            panel[col] = panel[col].astype(object)
+    if "year" in panel.columns:
+        panel["year"] = panel["year"].astype(np.int64)
+    floats = panel.select_dtypes(include="floating").columns
+    panel[floats] = panel[floats].astype(np.float64)
+    return panel
+
+
+def float32_error(panel: pd.DataFrame) -> float:
+    """Largest relative error from storing the float columns as float32."""
+    floats = panel.select_dtypes(include="floating").to_numpy(dtype=np.float64)
+    rounded = floats.astype(np.float32).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.abs(rounded - floats) / np.abs(floats)
+    rel = rel[np.isfinite(rel)]
+    return float(rel.max()) if rel.size else 0.0
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column for two layouts of the same panel, plus a total row."""
+    bytes_before = before.memory_usage(deep=True, index=False)
+    bytes_after = after.memory_usage(deep=True, index=False)
+
+    report = pd.DataFrame({
+        "column": before.columns,
+        "dtype before": [str(t) for t in before.dtypes],
+        "bytes before": bytes_before.to_numpy(),
+        "dtype after": [str(after[c].dtype) if c in after else "" for c in before.columns],
+        "bytes after": bytes_after.reindex(before.columns).fillna(0).astype(np.int64).to_numpy(),
+    })
+    total = pd.DataFrame([{
+        "column": "TOTAL",
+        "dtype before": "",
+        "bytes before": int(report["bytes before"].sum()),
+        "dtype after": "",
+        "bytes after": int(report["bytes after"].sum()),
+    }])
+    report = pd.concat([report, total], ignore_index=True)
+    report["saving %"] = (
+        100 * (1 - report["bytes after"] / report["bytes before"])
+    ).round(1)
+    return report
@@ -0,0 +1,249 @@
+"""
+Lightweight timing of the app's hot paths.
+
+Main.py runs every page inside `rerun(page)`, which times the whole rerun
+and remembers the page name for the rest of the script thread (spans
+outside it fall back to the page Streamlit reports as running). Code on the
+hot path marks its stages with
+
+    with span("filter"):
+        df_selection = ...
+
+or decorates a function with `@traced("load")`. Timings are aggregated per
+(page, stage) in a process-wide `Tracer`: a fixed-bucket histogram plus the
+most recent samples for percentiles. The cost is two `perf_counter` calls
+and a lock per span.
+
+The admin Profiling page can also ask for the next rerun of a page to run
+under cProfile (or pyinstrument, if installed); the report is kept in the
+tracer for display.
+"""
+import bisect
+import cProfile
+import contextvars
+import functools
+import importlib.util
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Histogram bucket upper edges, in milliseconds (the last bucket is open).
+BUCKETS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Recent samples kept per stage for percentiles.
+RECENT = 1000
+
+# Profiles kept for display.
+MAX_PROFILES = 5
+
+# Stages outside any page rerun (e.g. process-wide loads).
+PROCESS = "(process)"
+
+# Profilers offered on the Profiling page (pyinstrument is optional).
+PROFILERS = ["cProfile"] + (["pyinstrument"] if importlib.util.find_spec("pyinstrument") else [])
+
+_page = contextvars.ContextVar("pwt_trace_page", default=PROCESS)
+
+
+class Histogram:
+    """Counts per bucket, plus count/sum/max and a window of recent samples."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=RECENT)
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def summary(self) -> dict:
+        p50, p90, p99 = np.percentile(self.recent, [50, 90, 99]) if self.recent else (0.0, 0.0, 0.0)
+        return {
+            "count": self.count,
+            "mean ms": self.total_ms / self.count if self.count else 0.0,
+            "p50 ms": p50,
+            "p90 ms": p90,
+            "p99 ms": p99,
+            "max ms": self.max_ms,
+        }
+
+    def buckets(self) -> list:
+        """[(bucket label, count), ...]"""
+        labels = [f"≤{b:g} ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g} ms"]
+        return list(zip(labels, self.counts))
+
+
+class Tracer:
+    """Process-wide {(page, stage): Histogram} and on-demand profiles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._profile_requests = {}
+        self.profiles = deque(maxlen=MAX_PROFILES)
+
+    def record(self, page: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get((page, stage))
+            if histogram is None:
+                histogram = self._histograms[(page, stage)] = Histogram()
+            histogram.add(seconds * 1e3)
+
+    def histogram(self, page: str, stage: str) -> Histogram:
+        return self._histograms[(page, stage)]
+
+    def summary(self) -> list:
+        """One row per (page, stage), sorted."""
+        with self._lock:
+            return [
+                {"page": page, "stage": stage, **h.summary()}
+                for (page, stage), h in sorted(self._histograms.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    # ---- profiling ----
+    def request_profile(self, page: str, engine: str = "cProfile") -> None:
+        """Profile the next rerun of `page` (in any session)."""
+        with self._lock:
+            self._profile_requests[page] = engine
+
+    def pending_profiles(self) -> dict:
+        with self._lock:
+            return dict(self._profile_requests)
+
+    def _take_request(self, page: str):
+        with self._lock:
+            return self._profile_requests.pop(page, None)
+
+
+@st.cache_resource
+def get_tracer() -> Tracer:
+    """The tracer shared by every session of this server process."""
+    return Tracer()
+
+
+def current_page() -> str:
+    """
+    Page of the rerun running on this thread: the one set by `rerun`, else
+    the page Streamlit is running (e.g. under AppTest, which runs page
+    scripts without Main.py), else "(process)".
+    """
+    page = _page.get()
+    if page != PROCESS:
+        return page
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return PROCESS
+    info = ctx.pages_manager.get_pages().get(ctx.page_script_hash)
+    return info["page_name"] if info else PROCESS
+
+
+def page_titles() -> list:
+    """Titles of the pages registered with st.navigation (Main.py), in order."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return []
+    return [info["page_name"] for info in ctx.pages_manager.get_pages().values()]
+
+
+@contextmanager
+def span(stage: str, page: str = None, tracer: Tracer = None):
+    """Time the enclosed block as `stage` of the current (or given) page."""
+    tracer = tracer or get_tracer()
+    page = page or current_page()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.record(page, stage, time.perf_counter() - t0)
+
+
+def traced(stage: str):
+    """Decorator form of `span`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class _Profiler:
+    """cProfile or pyinstrument behind one start/stop interface."""
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        if engine == "pyinstrument":
+            from pyinstrument import Profiler
+
+            self._profiler = Profiler()
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if self.engine == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> str:
+        """Stop and return a text report."""
+        if self.engine == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+
+@contextmanager
+def rerun(page: str):
+    """
+    Time a whole page rerun as stage "rerun", and make `page` the current
+    page for spans inside it. Runs the block under a profiler if one was
+    requested for this page.
+    """
+    tracer = get_tracer()
+    token = _page.set(page)
+    engine = tracer._take_request(page)
+    profiler = _Profiler(engine) if engine else None
+    t0 = time.perf_counter()
+    if profiler is not None:
+        try:
+            profiler.start()
+        except ValueError:
+            # cProfile allows one active profiler per process; try next time
+            tracer.request_profile(page, engine)
+            profiler = None
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        if profiler is not None:
+            tracer.profiles.appendleft({
+                "page": page,
+                "engine": engine,
+                "time": time.strftime("%H:%M:%S"),
+                "ms": seconds * 1e3,
+                "report": profiler.stop(),
+            })
+        tracer.record(page, "rerun", seconds)
+        _page.reset(token)
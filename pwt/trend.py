@@ -0,0 +1,210 @@
+"""
+Trendlines for the scatter page, fitted with NumPy and cached.
+
+`px.scatter(trendline=...)` refits through statsmodels on every rerun, even
+when only the axis scale changed, and its LOWESS evaluates a local
+regression at every observation. Here:
+
+- `ols_fit` is a closed-form least-squares line with a confidence band for
+  the mean, evaluated on a fixed grid of x values;
+- `lowess_fit` is a robust locally-linear smoother whose cost is bounded:
+  at most `LOWESS_MAX_POINTS` observations (an even subsample of the sorted
+  data) and a fixed evaluation grid;
+- `fit_trendlines` caches the fitted lines by (dataset version, selection,
+  x, y, ...), so changing the axis scale or the legend never refits.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from pwt.trace import traced
+
+GRID_POINTS = 100
+LOWESS_MAX_POINTS = 1000
+LOWESS_FRAC = 2 / 3
+LOWESS_ITERATIONS = 3
+
+TRENDLINES = {
+    "None": None,
+    "Linear (OLS)": "ols",
+    "LOWESS (Smooth)": "lowess",
+}
+
+
+# normal quantiles for the supported confidence levels (90/95/99%)
+_NORMAL_QUANTILES = {0.95: 1.644854, 0.975: 1.959964, 0.995: 2.575829}
+
+
+def _t_quantile(p: float, df: int) -> float:
+    """
+    Student-t quantile: exact for df = 1 and 2, else from the normal one
+    (Cornish-Fisher; within 1% of the exact value for df >= 3 up to p = 0.975).
+    """
+    z = _NORMAL_QUANTILES[p]
+    if df <= 0:
+        return np.nan
+    if df == 1:
+        return np.tan(np.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / np.sqrt(2 * p * (1 - p))
+    z3, z5, z7 = z**3, z**5, z**7
+    return (
+        z
+        + (z3 + z) / (4 * df)
+        + (5 * z5 + 16 * z3 + 3 * z) / (96 * df**2)
+        + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df**3)
+    )
+
+
+def ols_fit(x: np.ndarray, y: np.ndarray, grid: int = GRID_POINTS, level: float = 0.95) -> dict:
+    """
+    y = a + b x by least squares.
+
+    Returns {"line": DataFrame(x, y, lo, hi), "slope", "intercept", "r2", "n"};
+    lo/hi bound the mean of y at the chosen confidence level.
+    """
+    n = len(x)
+    if n < 3 or np.ptp(x) == 0:
+        return None
+    x_mean, y_mean = x.mean(), y.mean()
+    dx = x - x_mean
+    sxx = dx @ dx
+    slope = (dx @ (y - y_mean)) / sxx
+    intercept = y_mean - slope * x_mean
+
+    resid = y - (intercept + slope * x)
+    sse = resid @ resid
+    sst = (y - y_mean) @ (y - y_mean)
+    s2 = sse / (n - 2)
+
+    xs = np.linspace(x.min(), x.max(), grid)
+    fit = intercept + slope * xs
+    se = np.sqrt(s2 * (1 / n + (xs - x_mean) ** 2 / sxx))
+    t = _t_quantile(0.5 + level / 2, n - 2)
+
+    return {
+        "line": pd.DataFrame({"x": xs, "y": fit, "lo": fit - t * se, "hi": fit + t * se}),
+        "slope": slope,
+        "intercept": intercept,
+        "r2": 1 - sse / sst if sst > 0 else np.nan,
+        "n": n,
+    }
+
+
+def _local_linear(x0: np.ndarray, x: np.ndarray, y: np.ndarray, w: np.ndarray, k: int) -> np.ndarray:
+    """Tricube-weighted local linear fit at each x0, using the k nearest x."""
+    dist = np.abs(x0[:, None] - x[None, :])
+    h = np.partition(dist, k - 1, axis=1)[:, k - 1:k]
+    h = np.where(h > 0, h, 1e-12)
+    u = np.clip(dist / h, 0, 1)
+    wt = (1 - u**3) ** 3 * w[None, :]
+
+    sw = wt.sum(axis=1)
+    swx = wt @ x
+    swy = wt @ y
+    swxx = wt @ (x * x)
+    swxy = wt @ (x * y)
+    denom = sw * swxx - swx**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # all neighbours at one x: fall back to the weighted mean (slope 0)
+        flat = np.abs(denom) <= 1e-12 * np.abs(sw * swxx)
+        slope = np.where(flat, 0.0, (sw * swxy - swx * swy) / denom)
+        intercept = (swy - slope * swx) / sw
+    return intercept + slope * x0
+
+
+def lowess_fit(
+    x: np.ndarray,
+    y: np.ndarray,
+    frac: float = LOWESS_FRAC,
+    iterations: int = LOWESS_ITERATIONS,
+    max_points: int = LOWESS_MAX_POINTS,
+    grid: int = GRID_POINTS,
+) -> dict:
+    """
+    Robust LOWESS (locally linear, tricube kernel, bisquare reweighting).
+
+    Cost is O(m**2) for the robustness passes and O(grid * m) for the final
+    curve, with m = min(len(x), max_points).
+    """
+    n = len(x)
+    if n < 3 or np.ptp(x) == 0:
+        return None
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], y[order]
+    if n > max_points:
+        # even subsample across the x range keeps the shape of the cloud
+        pick = np.linspace(0, n - 1, max_points).round().astype(int)
+        x, y = x[pick], y[pick]
+    m = len(x)
+    k = max(2, min(m, int(np.ceil(frac * m))))
+
+    robust = np.ones(m)
+    for _ in range(iterations):
+        resid = y - _local_linear(x, x, y, robust, k)
+        s = np.median(np.abs(resid))
+        if s == 0:
+            break
+        u = np.clip(resid / (6 * s), -1, 1)
+        robust = (1 - u**2) ** 2
+
+    xs = np.linspace(x[0], x[-1], grid)
+    return {"line": pd.DataFrame({"x": xs, "y": _local_linear(xs, x, y, robust, k)}), "n": n}
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+@traced("trendline fit")
+def fit_trendlines(kind: str, key: tuple, _groups: dict) -> dict:
+    """
+    Fit one trendline per group ({name: (x, y)}) and cache the result.
+
+    `key` must identify the data in `_groups` (dataset version, selection,
+    x and y columns, ...); the arrays themselves are not hashed.
+    """
+    fit = ols_fit if kind == "ols" else lowess_fit
+    out = {}
+    for name, (x, y) in _groups.items():
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ok = np.isfinite(x) & np.isfinite(y)
+        result = fit(x[ok], y[ok])
+        if result is not None:
+            out[name] = result
+    return out
+
+
+def add_trendlines(fig: go.Figure, fits: dict) -> None:
+    """Draw fitted lines (and OLS bands) in the colour of each group's trace."""
+    colours = {t.name: t.marker.color for t in fig.data if t.marker is not None}
+    for name, result in fits.items():
+        line = result["line"]
+        colour = colours.get(name)
+        if "lo" in line:
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([line["x"], line["x"][::-1]]),
+                y=np.concatenate([line["hi"], line["lo"][::-1]]),
+                fill="toself",
+                fillcolor=colour,
+                opacity=0.15,
+                line=dict(width=0),
+                hoverinfo="skip",
+                showlegend=False,
+                legendgroup=name,
+            ))
+            hover = (
+                f"{name}<br>y = {result['intercept']:.4g} + {result['slope']:.4g} x"
+                f"<br>R² = {result['r2']:.3f}, n = {result['n']}<extra></extra>"
+            )
+        else:
+            hover = f"{name}<br>LOWESS, n = {result['n']}<extra></extra>"
+        fig.add_trace(go.Scatter(
+            x=line["x"],
+            y=line["y"],
+            mode="lines",
+            line=dict(color=colour, width=2),
+            name=f"{name} trend",
+            hovertemplate=hover,
+            showlegend=False,
+            legendgroup=name,
+        ))
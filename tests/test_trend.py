@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from pwt.trend import _t_quantile, ols_fit
+
+# exact Student-t quantiles: {df: {p: t}}
+T_TABLE = {
+    1: {0.95: 6.313752, 0.975: 12.706205, 0.995: 63.656741},
+    2: {0.95: 2.919986, 0.975: 4.302653, 0.995: 9.924843},
+    3: {0.95: 2.353363, 0.975: 3.182446, 0.995: 5.840909},
+    10: {0.95: 1.812461, 0.975: 2.228139, 0.995: 3.169273},
+}
+
+
+@pytest.mark.parametrize("df", [1, 2])
+@pytest.mark.parametrize("p", [0.95, 0.975, 0.995])
+def test_t_quantile_exact_for_one_and_two_df(df, p):
+    assert _t_quantile(p, df) == pytest.approx(T_TABLE[df][p], rel=1e-6)
+
+
+@pytest.mark.parametrize("df", [3, 10])
+@pytest.mark.parametrize("p", [0.95, 0.975])
+def test_t_quantile_approximation(df, p):
+    assert _t_quantile(p, df) == pytest.approx(T_TABLE[df][p], rel=0.01)
+
+
+def test_t_quantile_ten_df_at_99():
+    assert _t_quantile(0.995, 10) == pytest.approx(T_TABLE[10][0.995], rel=0.01)
+
+
+def test_ols_band_with_three_points():
+    # df = 1: half-width at the mean of x is t * s / sqrt(n)
+    x = np.array([0.0, 1.0, 2.0])
+    y = np.array([0.0, 2.0, 1.0])
+    fit = ols_fit(x, y, grid=3)
+    line = fit["line"]
+    s = np.sqrt(np.sum((y - (fit["intercept"] + fit["slope"] * x)) ** 2) / 1)
+    half = (line["hi"] - line["y"]).iloc[1]
+    assert half == pytest.approx(T_TABLE[1][0.975] * s / np.sqrt(3), rel=1e-6)